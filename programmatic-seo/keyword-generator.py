@@ -4,9 +4,21 @@ MASSIVE Keyword Generator for Bible Verse Randomizer
 Generates 100,000+ keyword variations across all categories
 """
 
+import argparse
 import json
 import itertools
-from typing import List, Dict, Set
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from bible_canon import ChapterRefs, VerseRefs
+from keyword_artifact import KeywordArtifact, write_artifact
+from keyword_dedup import KeywordDeduper
+from keyword_incremental import IncrementalBuild
+from keyword_matcher import DifficultyClassifier
+from keyword_plan import KeywordPlan
+from keyword_table import KeywordTable
 
 # All 66 books of the Bible
 BIBLE_BOOKS = [
@@ -309,227 +321,566 @@ LONGTAIL_SITUATIONS = [
     "special needs parenting", "medically fragile child",
 ]
 
-def generate_verse_keywords(limit=1000):
+# Per-verse keyword patterns, applied to a reference like "John 3:16"
+VERSE_PATTERNS = [
+    "{}",
+    "{} meaning",
+    "{} explained",
+    "{} context",
+    "{} commentary",
+    "{} kjv",
+    "{} niv",
+    "{} esv",
+    "what does {} mean",
+    "{} study",
+    "{} analysis",
+    "{} application",
+    "{} prayer",
+    "{} devotional",
+    "{} sermon",
+]
+
+# Per-chapter keyword patterns, applied to (book, chapter)
+CHAPTER_PATTERNS = [
+    "{} {}",
+    "{} chapter {}",
+    "{} {} summary",
+    "{} {} meaning",
+    "{} {} commentary",
+    "{} {} prayer",
+]
+
+class Expansion(NamedTuple):
+    """Every entity rendered through every template, entity-major
+    
+    Templates are str.format patterns; with `unpack`, each entity is a tuple
+    filling several placeholders. A template without placeholders paired with
+    a single "" entity emits a fixed keyword.
+    """
+    templates: Sequence[str]
+    entities: Sequence
+    unpack: bool = False
+    
+    def size(self) -> int:
+        return len(self.templates) * len(self.entities)
+    
+    def iter_range(self, start=0, stop=None) -> Iterator[str]:
+        """Yield the keywords for entities[start:stop]"""
+        formats = [template.format for template in self.templates]
+        for entity in self.entities[start:stop]:
+            if self.unpack:
+                for fmt in formats:
+                    yield fmt(*entity)
+            else:
+                for fmt in formats:
+                    yield fmt(entity)
+
+def iter_expansions(expansions: List[Expansion]) -> Iterator[str]:
+    for expansion in expansions:
+        yield from expansion.iter_range()
+
+def verse_expansions(limit=1000, full_canon=False) -> List[Expansion]:
+    """Verse-level expansions
+    
+    By default only POPULAR_VERSES are expanded; with full_canon every one of
+    the 31,102 verses in the canon table is, rendered one reference at a time.
+    """
+    if full_canon:
+        refs = VerseRefs()
+    else:
+        # Sample verses
+        refs = [f"{book} {chapter}:{verse}" for book, chapter, verse in POPULAR_VERSES[:limit]]
+    return [Expansion(VERSE_PATTERNS, refs)]
+
+def iter_verse_keywords(limit=1000, full_canon=False) -> Iterator[str]:
+    """Yield verse-level keywords"""
+    return iter_expansions(verse_expansions(limit, full_canon))
+
+def generate_verse_keywords(limit=1000, full_canon=False):
     """Generate verse-level keywords"""
-    keywords = []
-    
-    # Sample verses (in production, would iterate all 31,102)
-    for book, chapter, verse in POPULAR_VERSES[:limit]:
-        base = f"{book} {chapter}:{verse}"
-        keywords.extend([
-            f"{base}",
-            f"{base} meaning",
-            f"{base} explained",
-            f"{base} context",
-            f"{base} commentary",
-            f"{base} kjv",
-            f"{base} niv",
-            f"{base} esv",
-            f"what does {base} mean",
-            f"{base} study",
-            f"{base} analysis",
-            f"{base} application",
-            f"{base} prayer",
-            f"{base} devotional",
-            f"{base} sermon",
-        ])
-    
-    return keywords
+    return list(iter_verse_keywords(limit, full_canon))
+
+TOPIC_PATTERNS = [
+    "bible verse about {}",
+    "bible verses about {}",
+    "scripture about {}",
+    "scriptures about {}",
+    "what does the bible say about {}",
+    "bible passage about {}",
+    "bible passages about {}",
+    "bible quote about {}",
+    "bible quotes about {}",
+    "biblical verses about {}",
+    "verses about {}",
+    "scripture on {}",
+    "bible says about {}",
+    "god's word on {}",
+    "biblical perspective on {}",
+]
+
+def topic_expansions() -> List[Expansion]:
+    """Topic-based expansions"""
+    return [Expansion(TOPIC_PATTERNS, TOPICS)]
+
+def iter_topic_keywords() -> Iterator[str]:
+    """Yield topic-based keywords"""
+    return iter_expansions(topic_expansions())
 
 def generate_topic_keywords():
     """Generate topic-based keywords"""
-    keywords = []
-    
-    patterns = [
-        "bible verse about {}",
-        "bible verses about {}",
-        "scripture about {}",
-        "scriptures about {}",
-        "what does the bible say about {}",
-        "bible passage about {}",
-        "bible passages about {}",
-        "bible quote about {}",
-        "bible quotes about {}",
-        "biblical verses about {}",
-        "verses about {}",
-        "scripture on {}",
-        "bible says about {}",
-        "god's word on {}",
-        "biblical perspective on {}",
+    return list(iter_topic_keywords())
+
+def intent_expansions() -> List[Expansion]:
+    """Intent-based expansions"""
+    return [
+        # Occasions
+        Expansion([
+            "bible verses for {}",
+            "scripture for {}",
+            "bible reading for {}",
+            "bible verse for {} card",
+            "best bible verse for {}",
+            "short bible verse for {}",
+        ], OCCASIONS),
+        # Situations
+        Expansion([
+            "bible verses for {}",
+            "scripture for {}",
+            "verses for {}",
+            "bible verse when you need {}",
+        ], SITUATIONS),
+        # Tattoos
+        Expansion([
+            "bible verses for tattoos {}",
+            "scripture tattoos {}",
+            "bible verse tattoo ideas {}",
+        ], TATTOO_MODIFIERS),
+        Expansion([
+            "bible verses for tattoos",
+            "best bible verses for tattoos",
+            "popular bible verses for tattoos",
+            "short bible verses for tattoos",
+            "meaningful bible verses for tattoos",
+        ], [""]),
+        # Sharing
+        Expansion([
+            "bible verses to share {}",
+            "scripture to share {}",
+            "inspirational bible verses {}",
+        ], SHARING_CONTEXTS),
     ]
-    
-    for topic in TOPICS:
-        for pattern in patterns:
-            keywords.append(pattern.format(topic))
-    
-    return keywords
+
+def iter_intent_keywords() -> Iterator[str]:
+    """Yield intent-based keywords"""
+    return iter_expansions(intent_expansions())
 
 def generate_intent_keywords():
     """Generate intent-based keywords"""
-    keywords = []
-    
-    # Occasions
-    for occasion in OCCASIONS:
-        keywords.extend([
-            f"bible verses for {occasion}",
-            f"scripture for {occasion}",
-            f"bible reading for {occasion}",
-            f"bible verse for {occasion} card",
-            f"best bible verse for {occasion}",
-            f"short bible verse for {occasion}",
-        ])
-    
-    # Situations
-    for situation in SITUATIONS:
-        keywords.extend([
-            f"bible verses for {situation}",
-            f"scripture for {situation}",
-            f"verses for {situation}",
-            f"bible verse when you need {situation}",
-        ])
-    
-    # Tattoos
-    for modifier in TATTOO_MODIFIERS:
-        keywords.extend([
-            f"bible verses for tattoos {modifier}",
-            f"scripture tattoos {modifier}",
-            f"bible verse tattoo ideas {modifier}",
-        ])
-    
-    keywords.extend([
-        "bible verses for tattoos",
-        "best bible verses for tattoos",
-        "popular bible verses for tattoos",
-        "short bible verses for tattoos",
-        "meaningful bible verses for tattoos",
-    ])
-    
-    # Sharing
-    for context in SHARING_CONTEXTS:
-        keywords.extend([
-            f"bible verses to share {context}",
-            f"scripture to share {context}",
-            f"inspirational bible verses {context}",
-        ])
-    
-    return keywords
+    return list(iter_intent_keywords())
+
+LONGTAIL_PATTERNS = [
+    "bible verse about {}",
+    "bible verses for {}",
+    "scripture for {}",
+    "bible verse to help with {}",
+    "what does the bible say about {}",
+    "bible verse when dealing with {}",
+    "god's word on {}",
+]
+
+def longtail_expansions() -> List[Expansion]:
+    """Ultra-specific longtail expansions"""
+    return [Expansion(LONGTAIL_PATTERNS, LONGTAIL_SITUATIONS)]
+
+def iter_longtail_keywords() -> Iterator[str]:
+    """Yield ultra-specific longtail keywords"""
+    return iter_expansions(longtail_expansions())
 
 def generate_longtail_keywords():
     """Generate ultra-specific longtail keywords"""
-    keywords = []
-    
-    for situation in LONGTAIL_SITUATIONS:
-        keywords.extend([
-            f"bible verse about {situation}",
-            f"bible verses for {situation}",
-            f"scripture for {situation}",
-            f"bible verse to help with {situation}",
-            f"what does the bible say about {situation}",
-            f"bible verse when dealing with {situation}",
-            f"god's word on {situation}",
-        ])
-    
-    return keywords
-
-def generate_book_chapter_keywords():
-    """Generate book/chapter overview keywords"""
-    keywords = []
-    
-    for book in BIBLE_BOOKS:
-        keywords.extend([
-            f"{book} overview",
-            f"{book} summary",
-            f"book of {book}",
-            f"{book} meaning",
-            f"{book} study guide",
-            f"{book} commentary",
-            f"{book} outline",
-            f"{book} themes",
-        ])
+    return list(iter_longtail_keywords())
+
+def book_chapter_expansions(full_canon=False) -> List[Expansion]:
+    """Book/chapter overview expansions
+    
+    By default chapter keywords cover Psalms and John only; with full_canon
+    they cover all 1,189 chapters of the canon table.
+    """
+    expansions = [
+        Expansion([
+            "{} overview",
+            "{} summary",
+            "book of {}",
+            "{} meaning",
+            "{} study guide",
+            "{} commentary",
+            "{} outline",
+            "{} themes",
+        ], BIBLE_BOOKS),
+    ]
+    
+    if full_canon:
+        expansions.append(Expansion(CHAPTER_PATTERNS, ChapterRefs(), unpack=True))
+        return expansions
     
     # Psalms and other chapter-specific
-    for i in range(1, 151):  # 150 Psalms
-        keywords.extend([
-            f"psalm {i}",
-            f"psalm {i} meaning",
-            f"psalm {i} commentary",
-            f"psalm {i} prayer",
-        ])
+    expansions.append(Expansion([
+        "psalm {}",
+        "psalm {} meaning",
+        "psalm {} commentary",
+        "psalm {} prayer",
+    ], range(1, 151)))  # 150 Psalms
     
     # John chapters
-    for i in range(1, 22):  # 21 chapters in John
-        keywords.extend([
-            f"john chapter {i}",
-            f"john {i} summary",
-            f"john {i} commentary",
-        ])
-    
-    return keywords
-
-def categorize_by_difficulty(keywords: List[str]) -> Dict[str, List[str]]:
-    """Categorize keywords by estimated SEO difficulty"""
-    categorized = {
-        "low": [],      # 0-20 difficulty
-        "medium": [],   # 20-50 difficulty  
-        "high": []      # 50-100 difficulty
+    expansions.append(Expansion([
+        "john chapter {}",
+        "john {} summary",
+        "john {} commentary",
+    ], range(1, 22)))  # 21 chapters in John
+    
+    return expansions
+
+def iter_book_chapter_keywords(full_canon=False) -> Iterator[str]:
+    """Yield book/chapter overview keywords"""
+    return iter_expansions(book_chapter_expansions(full_canon))
+
+def generate_book_chapter_keywords(full_canon=False):
+    """Generate book/chapter overview keywords"""
+    return list(iter_book_chapter_keywords(full_canon))
+
+def stage_expansions(full_canon=False) -> List[Tuple[str, List[Expansion]]]:
+    """Generation stages in output order: (category, expansions)"""
+    return [
+        ("verse_level", verse_expansions(1000, full_canon)),
+        ("topic_based", topic_expansions()),
+        ("intent_based", intent_expansions()),
+        ("longtail", longtail_expansions()),
+        ("book_chapter", book_chapter_expansions(full_canon)),
+    ]
+
+# Modifier sets that mark a keyword as ultra-specific (= low difficulty)
+DIFFICULTY_MODIFIERS = {
+    "sample": lambda: LONGTAIL_SITUATIONS[:20],
+    "longtail": lambda: LONGTAIL_SITUATIONS,
+    "all": lambda: LONGTAIL_SITUATIONS + TOPICS,
+}
+
+def build_classifier(modifiers="sample") -> DifficultyClassifier:
+    """Difficulty classifier using one of the DIFFICULTY_MODIFIERS sets"""
+    return DifficultyClassifier(low_modifiers=DIFFICULTY_MODIFIERS[modifiers]())
+
+DEFAULT_CLASSIFIER = build_classifier()
+
+def classify_difficulty(kw: str, classifier: DifficultyClassifier = DEFAULT_CLASSIFIER) -> str:
+    """Estimate SEO difficulty ("low", "medium" or "high") for one keyword"""
+    return classifier.classify(kw)
+
+def categorize_by_difficulty(keywords: List[str],
+                             classifier: DifficultyClassifier = DEFAULT_CLASSIFIER) -> Dict[str, List[str]]:
+    """Categorize keywords by estimated SEO difficulty
+    
+    low: 0-20 difficulty, medium: 20-50, high: 50-100
+    """
+    return classifier.categorize(keywords)
+
+# Work unit: keywords of stages[stage][1][expansion] for entities[start:stop]
+Chunk = Tuple[int, int, int, int]
+
+def plan_chunks(stage_list: List[Tuple[str, List[Expansion]]], chunk_keywords=50_000) -> List[Chunk]:
+    """Split every expansion into entity ranges of roughly chunk_keywords keywords"""
+    chunks = []
+    for s, (_, expansions) in enumerate(stage_list):
+        for e, expansion in enumerate(expansions):
+            step = max(1, chunk_keywords // max(1, len(expansion.templates)))
+            for start in range(0, len(expansion.entities), step):
+                chunks.append((s, e, start, min(start + step, len(expansion.entities))))
+    return chunks
+
+class ChunkResult(NamedTuple):
+    category: str
+    keywords: List[str]
+    levels: Optional[List[str]]  # difficulty per keyword, if classified
+    lines: Optional[List[str]]   # JSONL record per keyword, if encoded
+
+# Per-process state for _expand_chunk, set by _init_worker
+_WORKER: Dict = {}
+
+def _init_worker(full_canon: bool, classifier: Optional[DifficultyClassifier], encode: bool):
+    _WORKER["stages"] = stage_expansions(full_canon)
+    _WORKER["classifier"] = classifier
+    _WORKER["encode"] = encode
+
+def _expand_chunk(chunk: Chunk) -> ChunkResult:
+    stage, expansion, start, stop = chunk
+    category, expansions = _WORKER["stages"][stage]
+    keywords = list(expansions[expansion].iter_range(start, stop))
+    levels = lines = None
+    if _WORKER["classifier"] is not None:
+        levels = _WORKER["classifier"].classify_batch(keywords)
+        if _WORKER["encode"]:
+            lines = [json.dumps({"keyword": kw, "category": category, "difficulty": level}) + "\n"
+                     for kw, level in zip(keywords, levels)]
+    return ChunkResult(category, keywords, levels, lines)
+
+def iter_stage_chunks(full_canon=False, classifier: Optional[DifficultyClassifier] = DEFAULT_CLASSIFIER,
+                      workers=1, chunk_keywords=50_000, encode=False) -> Iterator[ChunkResult]:
+    """Yield keyword chunks of every stage in serial output order
+    
+    With workers > 1 the chunks are expanded, classified and (with encode)
+    rendered as JSONL records in a process pool. Results are consumed in
+    submission order through a bounded window of in-flight chunks, so the
+    concatenated output is identical to the serial run and memory stays
+    proportional to workers x chunk_keywords. Pass classifier=None to skip
+    classification.
+    
+    Each worker rebuilds the stage lists and every chunk is pickled back,
+    so the pool only pays off with spare cores and many chunks: workers is
+    capped at the CPU count and at a worker per two chunks, and the serial
+    path is used when that leaves one.
+    """
+    chunks = plan_chunks(stage_expansions(full_canon), chunk_keywords)
+    initargs = (full_canon, classifier, encode)
+    workers = min(workers, os.cpu_count() or 1, len(chunks) // 2)
+    
+    if workers <= 1:
+        _init_worker(*initargs)
+        yield from map(_expand_chunk, chunks)
+        return
+    
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_expand_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def build_keyword_table(full_canon=False) -> KeywordTable:
+    """Unique keywords of every stage, stored as (template, entity) ids"""
+    return KeywordTable.from_stages(stage_expansions(full_canon))
+
+def iter_table_records(table: KeywordTable,
+                       classifier: DifficultyClassifier = DEFAULT_CLASSIFIER,
+                       batch_keywords=50_000) -> Iterator[Tuple[str, str, str]]:
+    """Yield (keyword, category, difficulty) for every table row, in order,
+    rendering and classifying one batch of rows at a time"""
+    rows = table.iter_rows()
+    while True:
+        batch = list(itertools.islice(rows, batch_keywords))
+        if not batch:
+            return
+        levels = classifier.classify_batch([kw for kw, _ in batch])
+        for (kw, category), level in zip(batch, levels):
+            yield kw, category, level
+
+def stream_keyword_table(output_path: str, table: KeywordTable,
+                         classifier: DifficultyClassifier = DEFAULT_CLASSIFIER) -> Dict[str, Dict[str, int]]:
+    """Write a KeywordTable as JSONL; same records, order and stats as stream_keywords"""
+    written = {category: 0 for category in table.categories}
+    difficulty = {"low": 0, "medium": 0, "high": 0}
+    
+    with open(output_path, "w") as f:
+        for kw, category, level in iter_table_records(table, classifier):
+            f.write(json.dumps({"keyword": kw, "category": category, "difficulty": level}) + "\n")
+            written[category] += 1
+            difficulty[level] += 1
+    
+    return {
+        "generated": table.generated,
+        "duplicates": table.duplicates,
+        "written": written,
+        "by_difficulty": difficulty,
+        "spilled_runs": 0,
     }
+
+def stream_keywords(output_path: str, full_canon=False,
+                    classifier: DifficultyClassifier = DEFAULT_CLASSIFIER,
+                    workers=1, memory_budget: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+    """Stream every stage through dedup + classification into a JSONL file.
     
-    # Heuristics for difficulty estimation
-    for kw in keywords:
-        word_count = len(kw.split())
-        
-        # Longtail (4+ words) = usually easier
-        if word_count >= 6:
-            categorized["low"].append(kw)
-        # Ultra-specific modifiers = easier
-        elif any(mod in kw.lower() for mod in LONGTAIL_SITUATIONS[:20]):
-            categorized["low"].append(kw)
-        # Generic high-volume = harder
-        elif word_count <= 3 and not any(char.isdigit() for char in kw):
-            categorized["high"].append(kw)
-        # Everything else = medium
-        else:
-            categorized["medium"].append(kw)
-    
-    return categorized
-
-def main():
-    print("Generating MASSIVE keyword list...")
+    Stages are expanded chunk by chunk (see iter_stage_chunks) and every
+    unique keyword is written as one {"keyword", "category", "difficulty"}
+    record per line, in first-seen order; a keyword produced by more than one
+    stage is attributed to the first stage that yields it. There are no
+    per-category lists and no sorting. Dedup holds a set of seen keywords;
+    with memory_budget (bytes) it spills to disk instead of growing past it
+    (see KeywordDeduper), with identical output.
+    
+    Returns per-category counts of generated, duplicate and written keywords,
+    per-difficulty counts, and the number of spilled dedup runs.
+    """
+    deduper = KeywordDeduper(memory_budget)
+    written: Dict[str, int] = {}
+    difficulty = {"low": 0, "medium": 0, "high": 0}
+    
+    def records():
+        for chunk in iter_stage_chunks(full_canon, classifier, workers, encode=True):
+            written.setdefault(chunk.category, 0)
+            for kw, level, line in zip(chunk.keywords, chunk.levels, chunk.lines):
+                yield kw, chunk.category, (level, line)
+    
+    with open(output_path, "w") as f:
+        for _, category, (level, line) in deduper.dedupe(records()):
+            f.write(line)
+            written[category] += 1
+            difficulty[level] += 1
     
-    all_keywords = []
+    return {
+        "generated": deduper.generated,
+        "duplicates": deduper.duplicates,
+        "written": written,
+        "by_difficulty": difficulty,
+        "spilled_runs": deduper.spilled_runs,
+    }
+
+def main_stream(output_path: str, full_canon=False, classifier=DEFAULT_CLASSIFIER, workers=1,
+                memory_budget=None, compact=False, cache_dir=None):
+    """Streaming mode: write newline-delimited JSON without building lists"""
+    print(f"Streaming keywords to {output_path}...")
+    
+    if cache_dir:
+        stats = IncrementalBuild(cache_dir).update(stage_expansions(full_canon), classifier, output_path)
+        print(f"   (incremental: regenerated {', '.join(stats['regenerated']) or 'nothing'}; "
+              f"re-deduped {', '.join(stats['rededuped']) or 'nothing'})")
+    elif compact:
+        table = build_keyword_table(full_canon)
+        print(f"   (keyword table: {len(table):,} keywords in {table.nbytes() / 2**20:.1f} MB)")
+        stats = stream_keyword_table(output_path, table, classifier)
+    else:
+        stats = stream_keywords(output_path, full_canon, classifier, workers, memory_budget)
     
-    print("1. Verse-level keywords...")
-    verse_kws = generate_verse_keywords(1000)
-    all_keywords.extend(verse_kws)
-    print(f"   Generated {len(verse_kws):,} verse keywords")
+    for i, category in enumerate(stats["generated"], 1):
+        print(f"{i}. {category}: {stats['generated'][category]:,} generated, "
+              f"{stats['duplicates'][category]:,} duplicates, "
+              f"{stats['written'][category]:,} unique")
+    if stats["spilled_runs"]:
+        print(f"   (dedup spilled {stats['spilled_runs']} sorted runs to disk)")
+    
+    total = sum(stats["written"].values())
+    print(f"\n✅ {total:,} unique keywords saved to {output_path}")
+    print(f"   Low difficulty: {stats['by_difficulty']['low']:,}")
+    print(f"   Medium difficulty: {stats['by_difficulty']['medium']:,}")
+    print(f"   High difficulty: {stats['by_difficulty']['high']:,}")
+
+def main_artifact(output_path: str, full_canon=False, classifier=DEFAULT_CLASSIFIER):
+    """Artifact mode: write the memory-mappable binary corpus (keyword_artifact.py)"""
+    print(f"Writing keyword artifact to {output_path}...")
     
-    print("2. Topic-based keywords...")
-    topic_kws = generate_topic_keywords()
-    all_keywords.extend(topic_kws)
-    print(f"   Generated {len(topic_kws):,} topic keywords")
+    table = build_keyword_table(full_canon)
+    write_artifact(output_path, iter_table_records(table, classifier))
     
-    print("3. Intent-based keywords...")
-    intent_kws = generate_intent_keywords()
-    all_keywords.extend(intent_kws)
-    print(f"   Generated {len(intent_kws):,} intent keywords")
+    with KeywordArtifact(output_path) as artifact:
+        facets = artifact.facets()
+        for i, (category, count) in enumerate(facets["category"].items(), 1):
+            print(f"{i}. {category}: {count:,} unique keywords")
+        print(f"\n✅ {len(artifact):,} unique keywords saved to {output_path}")
+        for level in ("low", "medium", "high"):
+            print(f"   {level.capitalize()} difficulty: {facets['difficulty'].get(level, 0):,}")
+
+def main_plan(full_canon=False, workers=1, chunk_keywords=50_000):
+    """Plan mode: count and size a run without generating it (keyword_plan.py)"""
+    stage_list = stage_expansions(full_canon)
+    report = KeywordPlan(stage_list).report(workers, chunk_keywords)
+    
+    for i, stage in enumerate(report["stages"], 1):
+        unique = f"{stage['unique_max']:,}"
+        if stage["unique_min"] != stage["unique_max"]:
+            unique = f"{stage['unique_min']:,}-{unique}"
+        print(f"{i}. {stage['category']}: {stage['generated']:,} generated, {unique} unique "
+              f"(templates x entities: {' + '.join(f'{t} x {e:,}' for t, e in stage['shapes'])})")
+    
+    totals = report["totals"]
+    exactness = "exact" if report["exact"] else "bounded"
+    unique = f"{totals['unique_max']:,}"
+    if not report["exact"]:
+        unique = f"{totals['unique_min']:,}-{unique}"
+    print(f"\nTotal: {totals['generated']:,} generated, {unique} unique ({exactness}; "
+          f"{report['colliding_keywords']:,} colliding keywords)")
+    print(f"Chunks: {len(plan_chunks(stage_list, chunk_keywords)):,} of ~{chunk_keywords:,} keywords")
+    print("\nEstimated output size:")
+    for fmt, size in report["bytes"].items():
+        print(f"   {fmt}: {size / 2**20:,.1f} MB")
+    print(f"Estimated peak memory (workers={workers}):")
+    for mode, size in report["memory"].items():
+        print(f"   {mode}: {size / 2**20:,.1f} MB")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate SEO keyword variations")
+    parser.add_argument("--format", choices=["json", "jsonl", "artifact"], default="json",
+                        help="json: one indented keywords-MASSIVE.json (default); "
+                             "jsonl: stream one record per line; "
+                             "artifact: memory-mappable binary with facet indexes")
+    parser.add_argument("--output", help="Output path (default: keywords-MASSIVE.json/.jsonl/.kwa)")
+    parser.add_argument("--full-canon", action="store_true",
+                        help="Expand verse and chapter keywords across all 31,102 verses "
+                             "and 1,189 chapters instead of the popular-verse sample")
+    parser.add_argument("--difficulty-modifiers", choices=sorted(DIFFICULTY_MODIFIERS), default="sample",
+                        help="Phrases that mark a keyword as low difficulty: sample (first 20 "
+                             "longtail situations, default), longtail (all), all (longtail + topics)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Expand stages in a pool of N processes (output is identical to N=1). "
+                             "Only faster on multi-core machines with --full-canon-sized inputs; "
+                             "capped at the CPU count, default 1 (serial)")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="jsonl only: cap dedup memory at MB megabytes, spilling sorted "
+                             "runs to disk beyond it (output is identical)")
+    parser.add_argument("--compact", action="store_true",
+                        help="jsonl only: dedup into a template-compressed keyword table "
+                             "(~30 bytes per keyword) and render on output (output is identical)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="jsonl only: cache per-stage results and regenerate only the stages "
+                             "whose lists or patterns changed (output is identical)")
+    parser.add_argument("--cache-dir", help="Cache for --incremental (default: <output>.cache)")
+    parser.add_argument("--plan", action="store_true",
+                        help="Print per-stage counts before/after dedup and estimated output "
+                             "bytes and peak memory, without generating anything")
+    args = parser.parse_args(argv)
+    if args.compact and args.format != "jsonl":
+        parser.error("--compact requires --format jsonl")
+    if args.compact and args.incremental:
+        parser.error("--compact cannot be combined with --incremental")
+    if args.memory_budget is not None and (args.format != "jsonl" or args.compact
+                                           or args.incremental):
+        parser.error("--memory-budget requires --format jsonl without --compact or --incremental")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    classifier = build_classifier(args.difficulty_modifiers)
+    
+    if args.plan:
+        main_plan(args.full_canon, args.workers)
+        return
+    
+    if args.format == "jsonl":
+        budget = args.memory_budget * 2**20 if args.memory_budget else None
+        output_path = args.output or "keywords-MASSIVE.jsonl"
+        cache_dir = (args.cache_dir or output_path + ".cache") if args.incremental else None
+        main_stream(output_path, args.full_canon, classifier, args.workers, budget, args.compact,
+                    cache_dir)
+        return
+    if args.format == "artifact":
+        main_artifact(args.output or "keywords-MASSIVE.kwa", args.full_canon, classifier)
+        return
+    
+    output_path = args.output or "keywords-MASSIVE.json"
+    print("Generating MASSIVE keyword list...")
     
-    print("4. Longtail keywords...")
-    longtail_kws = generate_longtail_keywords()
-    all_keywords.extend(longtail_kws)
-    print(f"   Generated {len(longtail_kws):,} longtail keywords")
+    by_category: Dict[str, List[str]] = {}
+    for chunk in iter_stage_chunks(args.full_canon, None, args.workers):
+        by_category.setdefault(chunk.category, []).extend(chunk.keywords)
     
-    print("5. Book/chapter keywords...")
-    book_kws = generate_book_chapter_keywords()
-    all_keywords.extend(book_kws)
-    print(f"   Generated {len(book_kws):,} book/chapter keywords")
+    for i, (category, keywords) in enumerate(by_category.items(), 1):
+        print(f"{i}. {category}: generated {len(keywords):,} keywords")
     
     # Remove duplicates
-    all_keywords = list(set(all_keywords))
+    all_keywords = list({kw for keywords in by_category.values() for kw in keywords})
     print(f"\nTotal unique keywords: {len(all_keywords):,}")
     
     # Categorize by difficulty
     print("\nCategorizing by difficulty...")
-    categorized = categorize_by_difficulty(all_keywords)
+    categorized = categorize_by_difficulty(all_keywords, classifier)
     
     # Save to JSON
     output = {
@@ -539,19 +890,13 @@ def main():
             "medium": {"count": len(categorized["medium"]), "keywords": sorted(categorized["medium"])},
             "high": {"count": len(categorized["high"]), "keywords": sorted(categorized["high"])},
         },
-        "by_category": {
-            "verse_level": sorted(verse_kws),
-            "topic_based": sorted(topic_kws),
-            "intent_based": sorted(intent_kws),
-            "longtail": sorted(longtail_kws),
-            "book_chapter": sorted(book_kws),
-        }
+        "by_category": {category: sorted(keywords) for category, keywords in by_category.items()}
     }
     
-    with open("keywords-MASSIVE.json", "w") as f:
+    with open(output_path, "w") as f:
         json.dump(output, f, indent=2)
     
-    print(f"\n✅ Keywords saved to keywords-MASSIVE.json")
+    print(f"\n✅ Keywords saved to {output_path}")
     print(f"   Low difficulty: {len(categorized['low']):,}")
     print(f"   Medium difficulty: {len(categorized['medium']):,}")
     print(f"   High difficulty: {len(categorized['high']):,}")
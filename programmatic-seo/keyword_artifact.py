@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Keyword Corpus Artifact
+A memory-mappable binary alternative to keywords-MASSIVE.json: keywords are
+stored once, sorted, as a UTF-8 blob plus an offset table, with one id array
+per category and per difficulty. Readers mmap the file and slice, look up or
+iterate by facet without parsing the whole corpus.
+
+Layout (little-endian, sections 8-byte aligned):
+    magic   8s   b"KWARTIF\\0"
+    version u32
+    metalen u32
+    meta    JSON {"count", "blob": [off, len], "offsets": [off, count + 1],
+                  "facets": {facet: {value: [off, count]}}}
+    blob    keyword bytes, sorted by UTF-8 (= code point) order
+    offsets u64[count + 1]; keyword i is blob[offsets[i]:offsets[i + 1]]
+    facets  u32 ids, ascending, per facet value
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"KWARTIF\0"
+VERSION = 1
+_HEADER = struct.Struct("<8sII")
+
+def _align(f) -> int:
+    pad = -f.tell() % 8
+    f.write(b"\0" * pad)
+    return f.tell()
+
+def write_artifact(path: str, records: Iterable[Tuple[str, str, str]]) -> int:
+    """Write (keyword, category, difficulty) records as an artifact.
+
+    Keywords must be unique. Facet values are listed in the order they first
+    appear in `records`. Returns the number of keywords written.
+    """
+    facets: Dict[str, Dict[str, array]] = {"category": {}, "difficulty": {}}
+    rows = []
+    for kw, category, difficulty in records:
+        rows.append((kw.encode("utf-8"), category, difficulty))
+        facets["category"].setdefault(category, array("I"))
+        facets["difficulty"].setdefault(difficulty, array("I"))
+    rows.sort()
+    for prev, cur in zip(rows, rows[1:]):
+        if prev[0] == cur[0]:
+            raise ValueError(f"duplicate keyword: {cur[0].decode('utf-8')!r}")
+
+    offsets = array("Q", [0])
+    for i, (encoded, category, difficulty) in enumerate(rows):
+        offsets.append(offsets[-1] + len(encoded))
+        facets["category"][category].append(i)
+        facets["difficulty"][difficulty].append(i)
+
+    # Section offsets depend on the metadata length, which depends on the
+    # offsets: lay out with a fixed-width placeholder, then patch in place
+    meta = {"count": len(rows), "blob": [0, offsets[-1]], "offsets": [0, len(offsets)],
+            "facets": {name: {value: [0, len(ids)] for value, ids in values.items()}
+                       for name, values in facets.items()}}
+    meta_len = len(json.dumps(meta)) + 64 * (2 + sum(map(len, facets.values())))
+
+    with open(path, "wb") as f:
+        f.write(b"\0" * (_HEADER.size + meta_len))
+        meta["blob"][0] = _align(f)
+        for encoded, _, _ in rows:
+            f.write(encoded)
+        del rows
+        meta["offsets"][0] = _align(f)
+        offsets.tofile(f)
+        for name, values in facets.items():
+            for value, ids in values.items():
+                meta["facets"][name][value][0] = _align(f)
+                ids.tofile(f)
+
+        encoded_meta = json.dumps(meta).encode("utf-8").ljust(meta_len)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, meta_len))
+        f.write(encoded_meta)
+    return meta["count"]
+
+class KeywordArtifact:
+    """Read-only mmap view of an artifact written by write_artifact.
+
+    Ids are positions in sorted keyword order: `artifact[i]` and
+    `artifact[i:j]` decode only the requested keywords, `find` is a binary
+    search over the blob, and `ids(facet, value)` is a zero-copy view of one
+    id array.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, meta_len = _HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a keyword artifact")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported artifact version {version}")
+        meta = json.loads(self._mmap[_HEADER.size:_HEADER.size + meta_len])
+        view = memoryview(self._mmap)
+        self._count = meta["count"]
+        blob_off, blob_len = meta["blob"]
+        self._blob = view[blob_off:blob_off + blob_len]
+        off, n = meta["offsets"]
+        self._offsets = view[off:off + 8 * n].cast("Q")
+        self._facets = {name: {value: view[off:off + 4 * n].cast("I")
+                               for value, (off, n) in values.items()}
+                        for name, values in meta["facets"].items()}
+
+    def close(self) -> None:
+        """Unmap the file, unless a view from ids() is still held: then the
+        mapping stays valid and is freed once the last view is released"""
+        self._blob = self._offsets = self._facets = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "KeywordArtifact":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _raw(self, i: int) -> memoryview:
+        return self._blob[self._offsets[i]:self._offsets[i + 1]]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [str(self._raw(i), "utf-8") for i in range(*key.indices(self._count))]
+        if key < 0:
+            key += self._count
+        if not 0 <= key < self._count:
+            raise IndexError("keyword id out of range")
+        return str(self._raw(key), "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._count):
+            yield str(self._raw(i), "utf-8")
+
+    def find(self, keyword: str) -> Optional[int]:
+        """Id of keyword, or None"""
+        target = keyword.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(self._raw(mid)) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self._count and self._raw(lo) == target else None
+
+    def __contains__(self, keyword: str) -> bool:
+        return self.find(keyword) is not None
+
+    def facets(self) -> Dict[str, Dict[str, int]]:
+        """{facet: {value: keyword count}}"""
+        return {name: {value: len(ids) for value, ids in values.items()}
+                for name, values in self._facets.items()}
+
+    def ids(self, facet: str, value: str) -> memoryview:
+        """Ascending keyword ids with facet == value (empty if none)
+
+        A zero-copy view of the mapped file; copy it (list(), bytes()) to
+        keep the ids independent of the artifact's lifetime.
+        """
+        return self._facets[facet].get(value, memoryview(b"").cast("I"))
+
+    def iter_facet(self, facet: str, value: str) -> Iterator[str]:
+        """Keywords with facet == value, in sorted order"""
+        for i in self.ids(facet, value):
+            yield str(self._raw(i), "utf-8")
+
+    def facet_of(self, facet: str, i: int) -> Optional[str]:
+        """Value of a facet for keyword id i"""
+        for value, ids in self._facets[facet].items():
+            j = bisect_left(ids, i)
+            if j < len(ids) and ids[j] == i:
+                return value
+        return None
+
+def main(argv: List[str] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        sys.exit("usage: keyword_artifact.py ARTIFACT")
+    with KeywordArtifact(argv[0]) as artifact:
+        print(f"{len(artifact):,} keywords")
+        for name, values in artifact.facets().items():
+            for value, count in values.items():
+                print(f"  {name}={value}: {count:,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Keyword Generator Benchmarks
+Times every generation stage, difficulty classification, the JSON writer and
+the full pipeline at scale factors of the input lists, records wall time,
+keywords/sec and peak memory, saves the results as baselines, and compares a
+run against a baseline to flag regressions.
+
+    python keyword_bench.py run --scales 1,10,100 --save before
+    python keyword_bench.py compare before              # re-run and compare
+    python keyword_bench.py compare before after --threshold 0.05
+
+Every case runs in a fresh interpreter, so peak RSS is the case's own. Wall
+time is the best of --repeat runs without tracing; the tracemalloc peak comes
+from one extra traced run.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(HERE, "benchmarks")
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_THRESHOLD = 0.10
+
+def load_generator():
+    """Import keyword-generator.py (not importable by name: hyphenated)"""
+    sys.path.insert(0, HERE)
+    spec = importlib.util.spec_from_file_location("keyword_generator",
+                                                  os.path.join(HERE, "keyword-generator.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Input lists multiplied by the scale factor; copy i > 0 of an entry gets a
+# distinct suffix so the multiplied keywords do not collapse in dedup. The
+# pipeline cases still expand at most 1,000 popular verses, as main() does.
+SCALED_LISTS = ("BIBLE_BOOKS", "TOPICS", "OCCASIONS", "SITUATIONS", "TATTOO_MODIFIERS",
+                "SHARING_CONTEXTS", "LONGTAIL_SITUATIONS")
+
+def scale_inputs(kg, factor: int) -> None:
+    """Multiply the generator's input lists in place by `factor`"""
+    if factor <= 1:
+        return
+    for name in SCALED_LISTS:
+        base = list(getattr(kg, name))
+        getattr(kg, name)[:] = base + [f"{entry} {i}" for i in range(1, factor) for entry in base]
+    # Popular verses: shift the verse number per copy
+    base = list(kg.POPULAR_VERSES)
+    kg.POPULAR_VERSES[:] = base + [(book, chapter, verse + 200 * i)
+                                   for i in range(1, factor) for book, chapter, verse in base]
+
+# A case prepares untimed state and returns the timed callable; the callable
+# returns the number of keywords it processed
+Case = Callable[[object], Callable[[], int]]
+
+def _stage(name: str) -> Case:
+    def setup(kg):
+        generate = getattr(kg, f"generate_{name}_keywords")
+        if name == "verse":
+            return lambda: len(generate(limit=len(kg.POPULAR_VERSES)))
+        return lambda: len(generate())
+    return setup
+
+def _all_keywords(kg) -> List[str]:
+    return list({kw for _, expansions in kg.stage_expansions()
+                 for kw in kg.iter_expansions(expansions)})
+
+def _categorize(kg):
+    keywords = _all_keywords(kg)
+
+    def run():
+        kg.categorize_by_difficulty(keywords)
+        return len(keywords)
+    return run
+
+def _json_writer(kg):
+    by_category = {category: list(kg.iter_expansions(expansions))
+                   for category, expansions in kg.stage_expansions()}
+    keywords = list({kw for kws in by_category.values() for kw in kws})
+    categorized = kg.categorize_by_difficulty(keywords)
+    output = {
+        "total_keywords": len(keywords),
+        "by_difficulty": {level: {"count": len(kws), "keywords": sorted(kws)}
+                          for level, kws in categorized.items()},
+        "by_category": {category: sorted(kws) for category, kws in by_category.items()},
+    }
+
+    def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "keywords.json"), "w") as f:
+                json.dump(output, f, indent=2)
+        return len(keywords)
+    return run
+
+def _pipeline(*extra: str) -> Case:
+    def setup(kg):
+        def run():
+            with tempfile.TemporaryDirectory() as tmp:
+                output = os.path.join(tmp, "keywords")
+                with contextlib.redirect_stdout(io.StringIO()):
+                    kg.main(["--output", output, *extra])
+                if "jsonl" in extra:
+                    with open(output) as f:
+                        return sum(1 for _ in f)
+                with open(output) as f:
+                    return json.load(f)["total_keywords"]
+        return run
+    return setup
+
+CASES: Dict[str, Case] = {
+    "verse": _stage("verse"),
+    "topic": _stage("topic"),
+    "intent": _stage("intent"),
+    "longtail": _stage("longtail"),
+    "book_chapter": _stage("book_chapter"),
+    "categorize": _categorize,
+    "json_writer": _json_writer,
+    "pipeline_json": _pipeline("--format", "json"),
+    "pipeline_jsonl": _pipeline("--format", "jsonl"),
+}
+
+def run_case(name: str, scale: int, repeat: int, traced: bool) -> Dict:
+    """Run one case in this process (called in a fresh interpreter)"""
+    kg = load_generator()
+    scale_inputs(kg, scale)
+    run = CASES[name](kg)
+    if traced:
+        tracemalloc.start()
+        keywords = run()
+        return {"keywords": keywords, "tracemalloc_peak": tracemalloc.get_traced_memory()[1]}
+    best = float("inf")
+    keywords = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        keywords = run()
+        best = min(best, time.perf_counter() - start)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        rss *= 1024  # Linux reports KiB
+    return {"keywords": keywords, "wall": best, "peak_rss": rss}
+
+def _spawn(name: str, scale: int, repeat: int, traced: bool) -> Dict:
+    cmd = [sys.executable, os.path.abspath(__file__), "_case", name, str(scale), str(repeat)]
+    if traced:
+        cmd.append("--traced")
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+def measure(name: str, scale: int, repeat=3, trace=True) -> Dict:
+    result = _spawn(name, scale, repeat, traced=False)
+    result["keywords_per_sec"] = result["keywords"] / result["wall"] if result["wall"] else 0.0
+    if trace:
+        result["tracemalloc_peak"] = _spawn(name, scale, 1, traced=True)["tracemalloc_peak"]
+    return result
+
+def run_suite(cases: List[str], scales: List[int], repeat=3, trace=True) -> Dict:
+    results = {}
+    for scale in scales:
+        for name in cases:
+            result = measure(name, scale, repeat, trace)
+            results[f"{name}@{scale}x"] = result
+            peak = result.get("tracemalloc_peak")
+            print(f"{name + '@' + str(scale) + 'x':<22} {result['keywords']:>10,} kw  "
+                  f"{result['wall']:>8.3f}s  {result['keywords_per_sec']:>12,.0f} kw/s  "
+                  f"rss {result['peak_rss'] / 2**20:>7.1f} MB"
+                  + (f"  traced {peak / 2**20:>7.1f} MB" if peak is not None else ""),
+                  flush=True)
+    return {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "created": time.strftime("%Y-%m-%d %H:%M:%S"), "cases": cases, "scales": scales,
+                 "repeat": repeat},
+        "results": results,
+    }
+
+def baseline_path(name: str) -> str:
+    if name.endswith(".json") or os.sep in name:
+        return name
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+def save_baseline(suite: Dict, name: str) -> str:
+    path = baseline_path(name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(suite, f, indent=2)
+    return path
+
+def load_baseline(name: str) -> Dict:
+    with open(baseline_path(name)) as f:
+        return json.load(f)
+
+# Metric, and whether larger is worse
+METRICS: Tuple[Tuple[str, bool], ...] = (
+    ("wall", True),
+    ("keywords_per_sec", False),
+    ("peak_rss", True),
+    ("tracemalloc_peak", True),
+)
+
+def compare(baseline: Dict, current: Dict, threshold=DEFAULT_THRESHOLD) -> List[Dict]:
+    """Rows of metric changes per shared case; `regression` marks a change
+    worse than `threshold` (relative)"""
+    rows = []
+    for key, before in baseline["results"].items():
+        after = current["results"].get(key)
+        if after is None:
+            continue
+        for metric, larger_is_worse in METRICS:
+            if metric not in before or metric not in after or not before[metric]:
+                continue
+            change = (after[metric] - before[metric]) / before[metric]
+            worse = change if larger_is_worse else -change
+            rows.append({"case": key, "metric": metric, "before": before[metric],
+                         "after": after[metric], "change": change,
+                         "regression": worse > threshold})
+    return rows
+
+def _fmt(metric: str, value: float) -> str:
+    if metric == "wall":
+        return f"{value:.3f}s"
+    if metric == "keywords_per_sec":
+        return f"{value:,.0f}/s"
+    return f"{value / 2**20:.1f}MB"
+
+def print_comparison(rows: List[Dict], threshold: float) -> int:
+    regressions = [row for row in rows if row["regression"]]
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        print(f"{row['case']:<22} {row['metric']:<17} {_fmt(row['metric'], row['before']):>12} -> "
+              f"{_fmt(row['metric'], row['after']):>12} {row['change']:>+8.1%} {flag}")
+    print(f"\n{len(regressions)} regression(s) past {threshold:.0%}")
+    return len(regressions)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the keyword generator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def suite_options(p):
+        p.add_argument("--cases", default=",".join(CASES),
+                       help=f"Comma-separated cases (default: all of {', '.join(CASES)})")
+        p.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                       help="Comma-separated input-list scale factors (default: 1,10,100)")
+        p.add_argument("--repeat", type=int, default=3, help="Timed runs per case, best kept")
+        p.add_argument("--no-trace", action="store_true", help="Skip the tracemalloc pass")
+
+    run = sub.add_parser("run", help="Run the suite")
+    suite_options(run)
+    run.add_argument("--save", metavar="NAME", help="Save results as benchmarks/NAME.json")
+
+    cmp_ = sub.add_parser("compare", help="Compare against a saved baseline")
+    cmp_.add_argument("baseline", help="Baseline name or path")
+    cmp_.add_argument("current", nargs="?",
+                      help="Results to compare (default: re-run the baseline's cases and scales)")
+    cmp_.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                      help="Relative change that counts as a regression (default: 0.10)")
+    cmp_.add_argument("--repeat", type=int, default=3, help="Timed runs per case when re-running")
+    cmp_.add_argument("--save", metavar="NAME", help="Save the re-run as benchmarks/NAME.json")
+
+    case = sub.add_parser("_case")  # internal: one case in a fresh interpreter
+    case.add_argument("name", choices=sorted(CASES))
+    case.add_argument("scale", type=int)
+    case.add_argument("repeat", type=int)
+    case.add_argument("--traced", action="store_true")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.command == "_case":
+        print(json.dumps(run_case(args.name, args.scale, args.repeat, args.traced)))
+        return
+
+    if args.command == "run":
+        cases = args.cases.split(",")
+        unknown = set(cases) - set(CASES)
+        if unknown:
+            sys.exit(f"Unknown case(s): {', '.join(sorted(unknown))}")
+        suite = run_suite(cases, [int(s) for s in args.scales.split(",")], args.repeat,
+                          not args.no_trace)
+        if args.save:
+            print(f"\n✅ Baseline saved to {save_baseline(suite, args.save)}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if args.current:
+        current = load_baseline(args.current)
+    else:
+        meta = baseline["meta"]
+        trace = any("tracemalloc_peak" in r for r in baseline["results"].values())
+        current = run_suite(meta["cases"], meta["scales"], args.repeat, trace)
+        if args.save:
+            print(f"\n✅ Results saved to {save_baseline(current, args.save)}")
+        print()
+    if print_comparison(compare(baseline, current, args.threshold), args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
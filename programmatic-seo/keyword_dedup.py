@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory Keyword Deduplication
+Exact, order-preserving dedup of (keyword, stage, payload) records that stays
+within a configurable memory budget by spilling sorted runs to disk.
+"""
+
+import heapq
+import os
+import pickle
+import tempfile
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# (keyword, stage, payload) -- payload travels with the keyword untouched
+Record = Tuple[str, str, Any]
+
+# Rough CPython cost of one set entry / buffered record beyond its characters
+_SET_ENTRY_OVERHEAD = 90
+_RECORD_OVERHEAD = 200
+
+# Records per pickled block; the k-way merge holds one block per run
+_BLOCK_RECORDS = 1024
+
+def _payload_size(payload: Any) -> int:
+    if isinstance(payload, str):
+        return len(payload)
+    if isinstance(payload, tuple):
+        return sum(_payload_size(item) for item in payload)
+    return 16
+
+class _RunWriter:
+    """Sorted run on disk: a sequence of pickled record blocks"""
+
+    def __init__(self, directory: str):
+        fd, self.path = tempfile.mkstemp(suffix=".run", dir=directory)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, records: List) -> None:
+        for i in range(0, len(records), _BLOCK_RECORDS):
+            pickle.dump(records[i:i + _BLOCK_RECORDS], self._file, pickle.HIGHEST_PROTOCOL)
+
+    def close(self) -> str:
+        self._file.close()
+        return self.path
+
+def _read_run(path: str) -> Iterator:
+    with open(path, "rb") as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from block
+
+class KeywordDeduper:
+    """Exact first-occurrence dedup, optionally within a memory budget.
+
+    Records are deduplicated online against an in-memory set of seen keywords
+    and yielded immediately. Without a budget that is all there is.
+
+    With `memory_budget` (bytes), once the set reaches half the budget it is
+    frozen: later records that hit it are dropped as duplicates, and the rest
+    are buffered and spilled to disk as runs sorted by keyword. When the input
+    ends, the runs are k-way merged to find each keyword's first occurrence,
+    the survivors are re-sorted by arrival order (spilling again if needed),
+    and yielded. Output order and content are
+    therefore identical to a plain `seen`-set dedup; only memory differs.
+
+    `stats` reports, per stage, how many records were seen and how many were
+    dropped as duplicates, plus how many runs were spilled.
+    """
+
+    def __init__(self, memory_budget: Optional[int] = None, spill_dir: Optional[str] = None):
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.generated: Dict[str, int] = {}
+        self.duplicates: Dict[str, int] = {}
+        self.spilled_runs = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "generated": dict(self.generated),
+            "duplicates": dict(self.duplicates),
+            "spilled_runs": self.spilled_runs,
+        }
+
+    def _count(self, stage: str, duplicate: bool) -> None:
+        self.generated[stage] = self.generated.get(stage, 0) + 1
+        self.duplicates.setdefault(stage, 0)
+        if duplicate:
+            self.duplicates[stage] += 1
+
+    def dedupe(self, records: Iterable[Record]) -> Iterator[Record]:
+        """Yield the first occurrence of every keyword, in input order"""
+        seen = set()
+        seen_bytes = 0
+        set_budget = self.memory_budget // 2 if self.memory_budget else float("inf")
+        records = iter(records)
+
+        for record in records:
+            keyword, stage, _ = record
+            if keyword in seen:
+                self._count(stage, True)
+                continue
+            self._count(stage, False)
+            seen.add(keyword)
+            yield record
+            seen_bytes += len(keyword) + _SET_ENTRY_OVERHEAD
+            if seen_bytes >= set_budget:
+                break
+        else:
+            return
+
+        with tempfile.TemporaryDirectory(prefix="keyword-dedup-", dir=self.spill_dir) as tmp:
+            runs = self._spill_by_keyword(records, seen, tmp)
+            del seen
+            yield from self._merge_runs(runs, tmp)
+
+    def _spill_by_keyword(self, records: Iterator[Record], seen: set, tmp: str) -> List[str]:
+        """Phase 1: buffer records not in `seen`, spill keyword-sorted runs"""
+        runs = []
+        buffer = []
+        buffer_bytes = 0
+        budget = self.memory_budget // 2
+
+        def spill():
+            nonlocal buffer_bytes
+            buffer.sort(key=itemgetter(0, 1))
+            run = _RunWriter(tmp)
+            run.write(buffer)
+            runs.append(run.close())
+            self.spilled_runs += 1
+            buffer.clear()
+            buffer_bytes = 0
+
+        # Provisional counts: a record is "generated, not yet known duplicate";
+        # _merge_runs converts the later occurrences into duplicates
+        for seq, (keyword, stage, payload) in enumerate(records):
+            if keyword in seen:
+                self._count(stage, True)
+                continue
+            self._count(stage, False)
+            buffer.append((keyword, seq, stage, payload))
+            buffer_bytes += len(keyword) + _payload_size(payload) + _RECORD_OVERHEAD
+            if buffer_bytes >= budget:
+                spill()
+        if buffer:
+            spill()
+        return runs
+
+    def _merge_runs(self, runs: List[str], tmp: str) -> Iterator[Record]:
+        """Phase 2: keep the first occurrence per keyword, restore arrival order"""
+        merged = heapq.merge(*(_read_run(path) for path in runs), key=itemgetter(0, 1))
+
+        survivors = []
+        survivor_bytes = 0
+        by_seq = []
+        for _, group in groupby(merged, key=itemgetter(0)):
+            keyword, seq, stage, payload = next(group)
+            for _, _, later_stage, _ in group:
+                self.duplicates[later_stage] += 1
+            survivors.append((seq, keyword, stage, payload))
+            survivor_bytes += len(keyword) + _payload_size(payload) + _RECORD_OVERHEAD
+            if survivor_bytes >= self.memory_budget:
+                survivors.sort(key=itemgetter(0))
+                run = _RunWriter(tmp)
+                run.write(survivors)
+                by_seq.append(run.close())
+                self.spilled_runs += 1
+                survivors.clear()
+                survivor_bytes = 0
+
+        for path in runs:
+            os.remove(path)
+
+        survivors.sort(key=itemgetter(0))
+        streams = [_read_run(path) for path in by_seq] + [iter(survivors)]
+        for _, keyword, stage, payload in heapq.merge(*streams, key=itemgetter(0)):
+            yield keyword, stage, payload
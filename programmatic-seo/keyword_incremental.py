@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Incremental Keyword Regeneration
+Caches every stage's keywords under a fingerprint of its templates, entities
+and the difficulty classifier, so a rerun regenerates only the stages whose
+inputs changed, re-dedups only the stages those changes can affect, and
+patches the JSONL output from the first changed stage onwards.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from keyword_matcher import DIFFICULTY_LEVELS, DifficultyClassifier
+
+# Bump when the cache or record format changes
+CACHE_VERSION = 1
+
+def _digest(obj) -> str:
+    return hashlib.sha256(pickle.dumps(obj, protocol=4)).hexdigest()
+
+def stage_fingerprint(category: str, expansions: Sequence) -> str:
+    """Hash of a stage's templates and entities.
+
+    Plain lists are hashed by content; lazy canon views (bible_canon) pickle
+    as their index range, so they are hashed without rendering.
+    """
+    return _digest((category, [(list(e.templates), e.entities, e.unpack) for e in expansions]))
+
+def classifier_fingerprint(classifier: DifficultyClassifier) -> str:
+    return _digest((classifier.low.patterns, classifier.high.patterns,
+                    classifier.longtail_words, classifier.generic_words))
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _record(kw: str, category: str, level: str) -> str:
+    return json.dumps({"keyword": kw, "category": category, "difficulty": level}) + "\n"
+
+class IncrementalBuild:
+    """Per-stage keyword cache in `cache_dir`.
+
+    For every stage the cache keeps its fingerprint, its stage-local unique
+    keywords with their difficulty, and its output segment (the JSONL records
+    left after dropping keywords an earlier stage already produced). A stage
+    is regenerated when its fingerprint changes; a later stage is re-deduped
+    only if its keywords intersect the keywords added to or removed from the
+    regenerated stages. The output file is the concatenation of the segments,
+    so it is truncated at the first changed segment and the rest appended.
+    Output and stats are identical to a full stream_keywords run.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, "manifest.json")
+
+    def _load_manifest(self, classifier_fp: str) -> Dict:
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get("version") != CACHE_VERSION or manifest.get("classifier") != classifier_fp:
+            return {}
+        return manifest
+
+    def _path(self, category: str, kind: str) -> str:
+        return os.path.join(self.cache_dir, f"{category}.{kind}")
+
+    def _load_local(self, category: str) -> Tuple[List[str], bytes]:
+        with open(self._path(category, "pkl"), "rb") as f:
+            return pickle.load(f)
+
+    @staticmethod
+    def _expand(expansions: Sequence, classifier: DifficultyClassifier,
+                batch_keywords=50_000) -> Tuple[List[str], bytes, int]:
+        """Stage-local unique keywords, their difficulty indexes, and the generated count"""
+        seen: Set[str] = set()
+        keywords: List[str] = []
+        generated = 0
+        for expansion in expansions:
+            generated += expansion.size()
+            for kw in expansion.iter_range():
+                if kw not in seen:
+                    seen.add(kw)
+                    keywords.append(kw)
+        level_index = {level: i for i, level in enumerate(DIFFICULTY_LEVELS)}
+        levels = bytearray()
+        for start in range(0, len(keywords), batch_keywords):
+            batch = classifier.classify_batch(keywords[start:start + batch_keywords])
+            levels.extend(level_index[level] for level in batch)
+        return keywords, bytes(levels), generated
+
+    def update(self, stage_list: Sequence[Tuple[str, Sequence]], classifier: DifficultyClassifier,
+               output_path: str) -> Dict:
+        """Bring output_path up to date; returns stream_keywords-style stats
+        plus the "regenerated" and "rededuped" stage lists"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        classifier_fp = classifier_fingerprint(classifier)
+        manifest = self._load_manifest(classifier_fp)
+        cached = {stage["category"]: stage for stage in manifest.get("stages", [])}
+
+        # 1. Regenerate stages whose inputs changed, collecting the keyword delta
+        fingerprints = [stage_fingerprint(category, expansions) for category, expansions in stage_list]
+        regenerated: List[str] = []
+        fresh: Dict[str, Tuple[List[str], bytes]] = {}
+        generated: Dict[str, int] = {}
+        changed: Set[str] = set()
+        for (category, expansions), fp in zip(stage_list, fingerprints):
+            old = cached.get(category)
+            if old is not None and old["fingerprint"] == fp:
+                generated[category] = old["generated"]
+                continue
+            keywords, levels, generated[category] = self._expand(expansions, classifier)
+            if old is not None:
+                changed.symmetric_difference_update(self._load_local(category)[0])
+                changed.symmetric_difference_update(keywords)
+            else:
+                changed.update(keywords)
+            _write_atomic(self._path(category, "pkl"), pickle.dumps((keywords, levels), protocol=4))
+            fresh[category] = (keywords, levels)
+            regenerated.append(category)
+        # Removed stages no longer shadow later ones
+        for category in cached.keys() - generated.keys():
+            changed.update(self._load_local(category)[0])
+
+        # 2. Re-dedup stages that are new, moved, regenerated or touch the delta
+        order = [category for category, _ in stage_list]
+        old_order = [stage["category"] for stage in manifest.get("stages", [])]
+        # Keyword lists of the stages before the current one, loaded on demand
+        earlier: List[Tuple[str, Optional[List[str]]]] = []
+        stages: List[Dict] = []
+        rededuped: List[str] = []
+        first_dirty: Optional[int] = None
+        for i, category in enumerate(order):
+            keywords, levels = fresh.get(category, (None, None))
+            stage = cached.get(category)
+            stale = (keywords is not None or i >= len(old_order) or old_order[i] != category)
+            if not stale and changed:
+                keywords, levels = self._load_local(category)
+                stale = not changed.isdisjoint(keywords)
+            if stale:
+                if keywords is None:
+                    keywords, levels = self._load_local(category)
+                # Probe the earlier lists with this stage's keywords rather than
+                # building a set of everything before it
+                local = set(keywords)
+                shadowed: Set[str] = set()
+                for j, (previous, previous_keywords) in enumerate(earlier):
+                    if previous_keywords is None:
+                        previous_keywords = self._load_local(previous)[0]
+                        earlier[j] = (previous, previous_keywords)
+                    shadowed.update(local.intersection(previous_keywords))
+                segment = []
+                by_difficulty = dict.fromkeys(DIFFICULTY_LEVELS, 0)
+                for kw, level in zip(keywords, levels):
+                    if kw not in shadowed:
+                        segment.append(_record(kw, category, DIFFICULTY_LEVELS[level]))
+                        by_difficulty[DIFFICULTY_LEVELS[level]] += 1
+                data = "".join(segment).encode("utf-8")
+                _write_atomic(self._path(category, "jsonl"), data)
+                stage = {"category": category, "written": len(segment), "bytes": len(data),
+                         "by_difficulty": by_difficulty}
+                rededuped.append(category)
+                if first_dirty is None:
+                    first_dirty = i
+            stages.append({**stage, "fingerprint": fingerprints[i], "generated": generated[category]})
+            earlier.append((category, keywords))
+        if len(order) < len(old_order) and first_dirty is None:
+            first_dirty = len(order)
+
+        # 3. Patch the output: keep the unchanged prefix, rewrite the rest
+        prefix = sum(stage["bytes"] for stage in stages[:first_dirty])
+        reusable = (manifest.get("output") == os.path.abspath(output_path)
+                    and os.path.exists(output_path)
+                    and os.path.getsize(output_path) == manifest.get("output_size"))
+        if not reusable:
+            first_dirty, prefix = 0, 0
+        if first_dirty is not None:
+            with open(output_path, "r+b" if reusable else "wb") as f:
+                f.seek(prefix)
+                f.truncate()
+                for stage in stages[first_dirty:]:
+                    with open(self._path(stage["category"], "jsonl"), "rb") as segment:
+                        f.write(segment.read())
+
+        manifest = {"version": CACHE_VERSION, "classifier": classifier_fp,
+                    "output": os.path.abspath(output_path),
+                    "output_size": sum(stage["bytes"] for stage in stages), "stages": stages}
+        _write_atomic(self.manifest_path, json.dumps(manifest, indent=2).encode("utf-8"))
+        for category in cached.keys() - generated.keys():
+            for kind in ("pkl", "jsonl"):
+                if os.path.exists(self._path(category, kind)):
+                    os.remove(self._path(category, kind))
+
+        return {
+            "generated": {s["category"]: s["generated"] for s in stages},
+            "duplicates": {s["category"]: s["generated"] - s["written"] for s in stages},
+            "written": {s["category"]: s["written"] for s in stages},
+            "by_difficulty": {level: sum(s["by_difficulty"][level] for s in stages)
+                              for level in DIFFICULTY_LEVELS},
+            "spilled_runs": 0,
+            "regenerated": regenerated,
+            "rededuped": rededuped,
+        }
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Multi-pattern Keyword Matcher
+Compiles any number of modifier phrases into one trie-shaped regex so a keyword
+is scanned once, instead of once per modifier, and classifies keyword
+difficulty on top of it.
+"""
+
+import re
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional
+
+DIFFICULTY_LEVELS = ("low", "medium", "high")
+
+def _trie_regex(patterns: Iterable[str]) -> str:
+    """Build a regex source whose alternation is factored along a character trie.
+
+    Every node's branches start with distinct characters, so the regex engine
+    never backtracks across sibling patterns. Because callers only ask whether
+    *some* pattern occurs, a pattern that extends a shorter one is redundant
+    and its subtree is pruned.
+    """
+    trie: Dict = {}
+    for pattern in patterns:
+        node = trie
+        for char in pattern:
+            if "" in node:
+                break  # a shorter pattern already matches here
+            node = node.setdefault(char, {})
+        else:
+            node.clear()
+            node[""] = True
+
+    def emit(node: Dict) -> str:
+        if "" in node:
+            return ""
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items())]
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+class KeywordMatcher:
+    """Case-insensitive "does any of these phrases occur?" matcher.
+
+    A phrase must start at the beginning of a whitespace-separated word, so
+    "art" matches "art therapy" but not "heart".
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = sorted({p.lower() for p in patterns if p})
+        self._regex = None
+        self._blob_regex = None
+        if self.patterns:
+            source = _trie_regex(self.patterns)
+            self._regex = re.compile(r"(?<!\S)" + source)
+            # Leading whitespace gives the regex engine a literal charset
+            # prefix, so it skips straight to word starts in C
+            self._blob_regex = re.compile(r"\s" + source)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def search_lowered(self, text: str) -> Optional[str]:
+        """First (leftmost, shortest) pattern in already-lowercased text"""
+        if self._regex is None:
+            return None
+        match = self._regex.search(text)
+        return match.group() if match else None
+
+    def search(self, text: str) -> Optional[str]:
+        """First pattern occurring in text, or None"""
+        return self.search_lowered(text.lower())
+
+    def matches(self, text: str) -> bool:
+        return self.search(text) is not None
+
+    def matching_lines(self, lowered_blob: str, line_starts: List[int]) -> bytearray:
+        """Flag which lines of a lowercased blob contain a pattern.
+
+        The blob is "\n" followed by the newline-joined lines, and
+        `line_starts` holds the offset of each line in it; the result has one
+        0/1 flag per line.
+        """
+        flags = bytearray(len(line_starts))
+        if self._blob_regex is not None:
+            for match in self._blob_regex.finditer(lowered_blob):
+                flags[bisect_right(line_starts, match.start() + 1) - 1] = 1
+        return flags
+
+class DifficultyClassifier:
+    """Heuristic SEO difficulty classifier, in rule order:
+
+    1. keywords with at least `longtail_words` words are "low"
+    2. keywords containing a `low_modifiers` phrase are "low"
+    3. keywords containing a `high_modifiers` phrase are "high"
+       (phrases match at word starts, see KeywordMatcher)
+    4. keywords with at most `generic_words` words and no digits are "high"
+    5. everything else is "medium"
+    """
+
+    _DIGIT = re.compile(r"\d")
+
+    def __init__(self, low_modifiers: Iterable[str] = (), high_modifiers: Iterable[str] = (),
+                 longtail_words: int = 6, generic_words: int = 3):
+        self.low = KeywordMatcher(low_modifiers)
+        self.high = KeywordMatcher(high_modifiers)
+        self.longtail_words = longtail_words
+        self.generic_words = generic_words
+
+    def _classify(self, kw: str, lowered: str) -> str:
+        word_count = len(kw.split())
+        if word_count >= self.longtail_words:
+            return "low"
+        if self.low.search_lowered(lowered) is not None:
+            return "low"
+        if self.high.search_lowered(lowered) is not None:
+            return "high"
+        if word_count <= self.generic_words and not self._DIGIT.search(kw):
+            return "high"
+        return "medium"
+
+    def classify(self, kw: str) -> str:
+        """Difficulty level of one keyword"""
+        return self._classify(kw, kw.lower())
+
+    def classify_batch(self, keywords: List[str]) -> List[str]:
+        """Difficulty levels for a list of keywords, in order.
+
+        The batch is lowercased as one newline-joined blob and each modifier
+        matcher makes a single regex pass over it, so the per-keyword Python
+        work is a split, a comparison and (for short keywords) a digit check.
+        """
+        if not keywords:
+            return []
+        if any("\n" in kw for kw in keywords):
+            return [self.classify(kw) for kw in keywords]
+        blob = "\n" + "\n".join(keywords)
+        lowered = blob.lower()
+        if len(lowered) == len(blob):
+            lines = keywords
+        else:  # lowercasing changed some lengths (e.g. "İ")
+            lines = lowered[1:].split("\n")
+        starts = list(accumulate((len(line) + 1 for line in lines[:-1]), initial=1))
+        low = self.low.matching_lines(lowered, starts)
+        high = self.high.matching_lines(lowered, starts)
+        longtail, generic, digit = self.longtail_words, self.generic_words, self._DIGIT.search
+        return [
+            "low" if wc >= longtail or lo else
+            "high" if hi or (wc <= generic and digit(kw) is None) else
+            "medium"
+            for kw, wc, lo, hi in zip(keywords, map(len, map(str.split, keywords)), low, high)
+        ]
+
+    def categorize(self, keywords: List[str]) -> Dict[str, List[str]]:
+        """Bucket keywords by difficulty level, preserving input order"""
+        categorized: Dict[str, List[str]] = {level: [] for level in DIFFICULTY_LEVELS}
+        for kw, level in zip(keywords, self.classify_batch(keywords)):
+            categorized[level].append(kw)
+        return categorized
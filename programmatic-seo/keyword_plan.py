@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Keyword-space Planner
+Counts what a generator run will produce -- per stage, before and after dedup
+-- and estimates output bytes and peak memory, straight from the expansion
+lists and templates, without materializing the keyword space.
+
+Two template occurrences can only produce the same keyword if their literal
+prefixes and suffixes are compatible (one prefix extends the other, and
+likewise for suffixes). For every compatible pair the planner solves for the
+entity the other side would need and looks it up, so only keywords that
+actually collide are ever rendered.
+"""
+
+import math
+import string
+from itertools import combinations
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+_FORMATTER = string.Formatter()
+
+# Keyword occurrence: (stage, expansion, entity index, template index),
+# which sorts in generation order
+Occurrence = Tuple[int, int, int, int]
+
+# Rough CPython 3 object costs, in bytes
+_STR_OVERHEAD = 49        # sys.getsizeof("") for an ASCII str
+_BYTES_OVERHEAD = 33      # sys.getsizeof(b"")
+_SLOT = 8                 # one list slot / pointer
+_SET_ENTRY = 40           # set slot at typical load, per entry
+_TUPLE3 = 64              # 3-tuple
+_TABLE_ROW = 6            # KeywordTable row (uint16 + uint32)
+_TABLE_SLOT = 12          # KeywordTable index slot (int64 hash + uint32 row)
+_BASELINE = 3 * 2**20     # generator module state and compiled matchers
+# classify_batch over one blob peaks at roughly this many times the blob size
+# (joined and lowercased copies, line offsets, result lists); measured on 3.11
+_CLASSIFY_FACTOR = 12
+
+# Per-record framing of the output formats, in bytes, excluding the keyword
+_JSONL_FRAME = len('{"keyword": "", "category": "", "difficulty": ""}\n')
+_JSON_ENTRY = len('    "",\n')  # + indentation per nesting level, see estimate_bytes
+
+class _Shape(NamedTuple):
+    prefix: str
+    suffix: str
+    literal_len: int
+    fields: int
+    simple: bool  # exactly one bare "{}" placeholder
+
+def _shape(template: str) -> _Shape:
+    parts = list(_FORMATTER.parse(template))
+    fields = [(name, spec, conversion) for _, name, spec, conversion in parts if name is not None]
+    literal_len = sum(len(literal) for literal, _, _, _ in parts)
+    prefix = parts[0][0] if parts else ""
+    suffix = parts[-1][0] if fields and parts[-1][1] is None else ""
+    if not fields:
+        prefix, suffix = template, ""
+    simple = len(fields) == 1 and fields[0] == ("", "", None)
+    return _Shape(prefix, suffix, literal_len, len(fields), simple)
+
+def _compatible(a: _Shape, b: _Shape) -> bool:
+    return ((a.prefix.startswith(b.prefix) or b.prefix.startswith(a.prefix))
+            and (a.suffix.endswith(b.suffix) or b.suffix.endswith(a.suffix)))
+
+class _Unit:
+    """One template of one expansion: its keywords, indexed for collision probes"""
+
+    def __init__(self, stage: int, exp: int, tmpl: int, template: str, expansion,
+                 entity_index: Optional[Dict[str, List[int]]], render_limit: int):
+        self.stage, self.exp, self.tmpl = stage, exp, tmpl
+        self.shape = _shape(template)
+        self.size = len(expansion.entities)
+        # Simple units index entity string -> entity indexes and are solved
+        # for analytically; the rest index rendered keyword -> entity indexes,
+        # or nothing when the expansion is too large to render
+        self.rendered = not (self.shape.simple and not expansion.unpack)
+        self.index: Optional[Dict[str, List[int]]] = None
+        if not self.rendered:
+            self.index = entity_index
+        elif self.size <= render_limit:
+            fmt = template.format
+            rendered: Dict[str, List[int]] = {}
+            for i, entity in enumerate(expansion.entities):
+                kw = fmt(*entity) if expansion.unpack else fmt(entity)
+                rendered.setdefault(kw, []).append(i)
+            self.index = rendered
+
+    def chars(self, entity_chars: int) -> int:
+        """Total keyword characters before dedup"""
+        if self.rendered and self.index is not None:
+            return sum(len(kw) * len(ids) for kw, ids in self.index.items())
+        return self.shape.literal_len * self.size + (entity_chars if self.shape.fields else 0)
+
+    def occurrence(self, entity: int) -> Occurrence:
+        return self.stage, self.exp, entity, self.tmpl
+
+    def keyword(self, key: str) -> str:
+        return key if self.rendered else self.shape.prefix + key + self.shape.suffix
+
+class KeywordPlan:
+    """Exact (or bounded) counts for a list of (category, expansions) stages.
+
+    Collisions are found pairwise between template units; a keyword that
+    collides is attributed to the stage of its first occurrence in generation
+    order, exactly as the generator's dedup does. Units whose keywords cannot
+    be solved for analytically (several placeholders, format specs) are
+    rendered when they have at most `render_limit` entities; larger ones only
+    contribute an upper bound on their overlaps, so `unique_min` and
+    `unique_max` differ.
+    """
+
+    def __init__(self, stage_list: Sequence[Tuple[str, Sequence]], render_limit=1_000_000):
+        self.categories = [category for category, _ in stage_list]
+        self.stages: List[Dict] = []
+        units: List[_Unit] = []
+        for s, (category, expansions) in enumerate(stage_list):
+            generated = chars = 0
+            shapes = []
+            for e, expansion in enumerate(expansions):
+                entity_index = None
+                if not expansion.unpack:
+                    entity_index = {}
+                    for i, entity in enumerate(expansion.entities):
+                        entity_index.setdefault(format(entity), []).append(i)
+                    entity_chars = sum(len(key) * len(ids) for key, ids in entity_index.items())
+                else:
+                    entity_chars = sum(len(format(field)) for entity in expansion.entities
+                                       for field in entity)
+                for t, template in enumerate(expansion.templates):
+                    unit = _Unit(s, e, t, template, expansion, entity_index, render_limit)
+                    units.append(unit)
+                    chars += unit.chars(entity_chars)
+                shapes.append((len(expansion.templates), len(expansion.entities)))
+                generated += expansion.size()
+            # (templates, entities) per expansion; generated is the sum of their products
+            self.stages.append({"category": category, "expansions": len(expansions), "shapes": shapes,
+                                "generated": generated, "keyword_chars": chars})
+
+        collisions: Dict[str, set] = {}
+        uncertain = [0] * len(self.stages)
+        for unit in units:
+            if unit.index is None:
+                uncertain[unit.stage] += unit.size - 1
+            self._self_collisions(unit, collisions)
+        for a, b in combinations(units, 2):
+            if not _compatible(a.shape, b.shape):
+                continue
+            if a.index is None or b.index is None:
+                later = max(a.stage, b.stage)
+                uncertain[later] += min(a.size, b.size)
+                continue
+            self._pair_collisions(a, b, collisions)
+
+        duplicates = [0] * len(self.stages)
+        duplicate_chars = [0] * len(self.stages)
+        for kw, occurrences in collisions.items():
+            for stage, _, _, _ in sorted(occurrences)[1:]:
+                duplicates[stage] += 1
+                duplicate_chars[stage] += len(kw)
+        for stage, dup, dup_chars, unsure in zip(self.stages, duplicates, duplicate_chars, uncertain):
+            stage["unique_max"] = stage["generated"] - dup
+            stage["unique_min"] = max(0, stage["unique_max"] - unsure)
+            stage["keyword_chars"] -= dup_chars
+        self.collisions = len(collisions)
+
+    @staticmethod
+    def _self_collisions(unit: _Unit, collisions: Dict[str, set]) -> None:
+        """Keywords a template repeats for equal entities"""
+        if unit.index is None:
+            return
+        for key, ids in unit.index.items():
+            if len(ids) > 1:
+                collisions.setdefault(unit.keyword(key), set()).update(map(unit.occurrence, ids))
+
+    @staticmethod
+    def _record(collisions: Dict[str, set], kw: str, a: _Unit, a_ids: Iterable[int],
+                b: _Unit, b_ids: Iterable[int]) -> None:
+        occurrences = collisions.setdefault(kw, set())
+        occurrences.update(map(a.occurrence, a_ids))
+        occurrences.update(map(b.occurrence, b_ids))
+
+    def _pair_collisions(self, a: _Unit, b: _Unit, collisions: Dict[str, set]) -> None:
+        if a.rendered and b.rendered:
+            small, large = sorted((a, b), key=lambda u: len(u.index))
+            for kw in small.index.keys() & large.index.keys():
+                self._record(collisions, kw, small, small.index[kw], large, large.index[kw])
+            return
+        if a.rendered or b.rendered:
+            rendered, simple = (a, b) if a.rendered else (b, a)
+            prefix, suffix = simple.shape.prefix, simple.shape.suffix
+            for kw, ids in rendered.index.items():
+                if (len(kw) >= len(prefix) + len(suffix) and kw.startswith(prefix)
+                        and kw.endswith(suffix)):
+                    other = simple.index.get(kw[len(prefix):len(kw) - len(suffix)])
+                    if other:
+                        self._record(collisions, kw, rendered, ids, simple, other)
+            return
+
+        # Both simple: render the side with fewer distinct entities and solve
+        # p1 + e1 + s1 == p2 + e2 + s2 for the other side's entity
+        if a.shape.prefix == b.shape.prefix and a.shape.suffix == b.shape.suffix:
+            for key in a.index.keys() & b.index.keys():
+                self._record(collisions, a.keyword(key), a, a.index[key], b, b.index[key])
+            return
+        if len(a.index) > len(b.index):
+            a, b = b, a
+        p1, s1, p2, s2 = a.shape.prefix, a.shape.suffix, b.shape.prefix, b.shape.suffix
+        for key, ids in a.index.items():
+            kw = p1 + key + s1
+            if len(kw) >= len(p2) + len(s2) and kw.startswith(p2) and kw.endswith(s2):
+                other = b.index.get(kw[len(p2):len(kw) - len(s2)])
+                if other:
+                    self._record(collisions, kw, a, ids, b, other)
+
+    @property
+    def exact(self) -> bool:
+        return all(stage["unique_min"] == stage["unique_max"] for stage in self.stages)
+
+    def totals(self) -> Dict[str, int]:
+        return {key: sum(stage[key] for stage in self.stages)
+                for key in ("generated", "unique_min", "unique_max", "keyword_chars")}
+
+    def estimate_bytes(self) -> Dict[str, int]:
+        """Approximate output size per --format (ASCII keywords assumed;
+        difficulty labels averaged as "medium")"""
+        totals = self.totals()
+        unique = totals["unique_max"]
+        chars = totals["keyword_chars"]
+        avg = chars / unique if unique else 0
+        jsonl = sum(stage["keyword_chars"] + stage["unique_max"]
+                    * (_JSONL_FRAME + len(stage["category"]) + len("medium"))
+                    for stage in self.stages)
+        # keywords-MASSIVE.json lists every unique keyword under by_difficulty
+        # (8-space indent) and every generated one under by_category (6-space)
+        generated_chars = sum(stage["keyword_chars"] + (stage["generated"] - stage["unique_max"]) * avg
+                              for stage in self.stages)
+        json_bytes = (chars + unique * (_JSON_ENTRY + 4)
+                      + generated_chars + totals["generated"] * (_JSON_ENTRY + 2))
+        artifact = chars + 8 * (unique + 1) + 2 * 4 * unique + 4096
+        return {"json": int(json_bytes), "jsonl": int(jsonl), "artifact": int(artifact)}
+
+    def estimate_memory(self, workers=1, chunk_keywords=50_000) -> Dict[str, int]:
+        """Approximate peak heap per mode, on top of the interpreter itself"""
+        totals = self.totals()
+        unique, generated = totals["unique_max"], totals["generated"]
+        avg = totals["keyword_chars"] / unique if unique else 0
+        string = _STR_OVERHEAD + avg
+        record = _STR_OVERHEAD + avg + _JSONL_FRAME + 20
+        window = 1 if workers <= 1 else workers * 2  # chunks held by iter_stage_chunks
+        in_flight = window * min(chunk_keywords, generated) * (string + record + 2 * _SLOT)
+        table_slots = 2 ** math.ceil(math.log2(max(1024, 2 * unique + 1)))
+        table = unique * _TABLE_ROW + table_slots * _TABLE_SLOT
+        estimates = {
+            # per-category lists + dedup set + difficulty buckets + sorted copies,
+            # peaking while the whole corpus is classified in one batch
+            "json": (generated * (string + 2 * _SLOT) + unique * (_SET_ENTRY + 3 * _SLOT)
+                     + unique * (avg + 1) * _CLASSIFY_FACTOR),
+            "jsonl": unique * (string + _SET_ENTRY) + in_flight,
+            "jsonl_compact": table + min(chunk_keywords, unique) * (string + record + _TUPLE3),
+            "artifact": table + unique * (_BYTES_OVERHEAD + avg + _TUPLE3 + _SLOT + 8 + 8),
+        }
+        return {mode: int(_BASELINE + size) for mode, size in estimates.items()}
+
+    def report(self, workers=1, chunk_keywords=50_000) -> Dict:
+        return {
+            "stages": self.stages,
+            "totals": self.totals(),
+            "exact": self.exact,
+            "colliding_keywords": self.collisions,
+            "bytes": self.estimate_bytes(),
+            "memory": self.estimate_memory(workers, chunk_keywords),
+        }
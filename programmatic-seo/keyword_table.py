@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Template-compressed Keyword Table
+Stores every keyword as a (template_id, entity_id) pair in typed arrays and
+renders the string only on output or lookup.
+"""
+
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+class _Template(tuple):
+    """(format, entities, unpack, category) -- one template of one expansion"""
+    __slots__ = ()
+
+    def render(self, entity_id: int) -> str:
+        fmt, entities, unpack, _ = self
+        entity = entities[entity_id]
+        return fmt(*entity) if unpack else fmt(entity)
+
+class KeywordTable:
+    """Deduplicated keyword corpus in ~30 bytes per keyword.
+
+    Rows hold a uint16 template id and a uint32 entity id (6 bytes). Dedup and
+    lookup go through an open-addressing index of 64-bit string hashes plus
+    row numbers (12 bytes per slot, at most half full); a hash hit is
+    confirmed by rendering the stored row, so the index is exact. Rows keep
+    first-seen order, so iterating the table yields exactly what a seen-set
+    dedup of the same stages would.
+    """
+
+    _EMPTY = 0xFFFFFFFF
+
+    def __init__(self):
+        self._templates: List[_Template] = []
+        self.categories: List[str] = []
+        self.template_ids = array("H")
+        self.entity_ids = array("I")
+        self._hashes = array("q", bytes(8 * 1024))
+        self._slots = array("I", [self._EMPTY]) * 1024
+        self._mask = 1023
+        self.generated: Dict[str, int] = {}
+        self.duplicates: Dict[str, int] = {}
+
+    @classmethod
+    def from_stages(cls, stage_list: Sequence[Tuple[str, Sequence]]) -> "KeywordTable":
+        """Build a table from (category, expansions) stages in output order"""
+        table = cls()
+        for category, expansions in stage_list:
+            for expansion in expansions:
+                table.add_expansion(category, expansion)
+        return table
+
+    def add_expansion(self, category: str, expansion) -> None:
+        """Append the unique keywords of one Expansion (entity-major order)"""
+        if category not in self.categories:
+            self.categories.append(category)
+            self.generated[category] = self.duplicates[category] = 0
+        first = len(self._templates)
+        for template in expansion.templates:
+            self._templates.append(_Template((template.format, expansion.entities,
+                                              expansion.unpack, category)))
+        if len(self._templates) > 0xFFFF:
+            raise ValueError("KeywordTable supports at most 65,535 templates")
+
+        template_ids = range(first, len(self._templates))
+        formats = [self._templates[t][0] for t in template_ids]
+        added = 0
+        for entity_id, entity in enumerate(expansion.entities):
+            for template_id, fmt in zip(template_ids, formats):
+                keyword = fmt(*entity) if expansion.unpack else fmt(entity)
+                if self._insert(keyword, template_id, entity_id):
+                    added += 1
+        total = expansion.size()
+        self.generated[category] += total
+        self.duplicates[category] += total - added
+
+    def _insert(self, keyword: str, template_id: int, entity_id: int) -> bool:
+        h = hash(keyword)
+        slot = self._find_slot(keyword, h)
+        if self._slots[slot] != self._EMPTY:
+            return False
+        row = len(self.template_ids)
+        self.template_ids.append(template_id)
+        self.entity_ids.append(entity_id)
+        self._hashes[slot] = h
+        self._slots[slot] = row
+        if 2 * (row + 1) > self._mask:
+            self._grow()
+        return True
+
+    def _find_slot(self, keyword: str, h: int) -> int:
+        """Slot holding keyword, or the empty slot where it would go"""
+        hashes, slots, mask, empty = self._hashes, self._slots, self._mask, self._EMPTY
+        slot = h & mask
+        while slots[slot] != empty:
+            if hashes[slot] == h and self.render(slots[slot]) == keyword:
+                return slot
+            slot = (slot + 1) & mask
+        return slot
+
+    def _grow(self) -> None:
+        size = (self._mask + 1) * 2
+        hashes = array("q", bytes(8 * size))
+        slots = array("I", [self._EMPTY]) * size
+        mask = size - 1
+        for old_slot, row in enumerate(self._slots):
+            if row == self._EMPTY:
+                continue
+            h = self._hashes[old_slot]
+            slot = h & mask
+            while slots[slot] != self._EMPTY:
+                slot = (slot + 1) & mask
+            hashes[slot] = h
+            slots[slot] = row
+        self._hashes, self._slots, self._mask = hashes, slots, mask
+
+    def __len__(self) -> int:
+        return len(self.template_ids)
+
+    def render(self, row: int) -> str:
+        """Keyword string of a row"""
+        return self._templates[self.template_ids[row]].render(self.entity_ids[row])
+
+    __getitem__ = render
+
+    def __iter__(self) -> Iterator[str]:
+        for row in range(len(self)):
+            yield self.render(row)
+
+    def category(self, row: int) -> str:
+        return self._templates[self.template_ids[row]][3]
+
+    def iter_rows(self) -> Iterator[Tuple[str, str]]:
+        """Yield (keyword, category) in table order"""
+        templates = self._templates
+        for template_id, entity_id in zip(self.template_ids, self.entity_ids):
+            template = templates[template_id]
+            yield template.render(entity_id), template[3]
+
+    def find(self, keyword: str) -> Optional[int]:
+        """Row number of keyword, or None"""
+        row = self._slots[self._find_slot(keyword, hash(keyword))]
+        return None if row == self._EMPTY else row
+
+    def __contains__(self, keyword: str) -> bool:
+        return self.find(keyword) is not None
+
+    def nbytes(self) -> int:
+        """Bytes held by the row arrays and the hash index"""
+        return sum(a.buffer_info()[1] * a.itemsize
+                   for a in (self.template_ids, self.entity_ids, self._hashes, self._slots))
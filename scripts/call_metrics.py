@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Keyword API Call Metrics
+Records latency, API-reported time, cost and payload size of every keyword
+API call, aggregates them into histograms and totals per endpoint, and
+writes a JSON summary and a Prometheus textfile (node_exporter textfile
+collector format).
+"""
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PAYLOAD_BUCKETS = (1 << 10, 1 << 12, 1 << 14, 1 << 16, 1 << 18, 1 << 20, 1 << 22)
+
+# Where a wrapped function sits: "request" is what the gatherer asked for
+# (served by the journal or cache when possible), "api" a network attempt
+REQUEST = "request"
+API = "api"
+
+PREFIX = "topics"
+
+_API_TIME = re.compile(r"[\d.]+")
+
+class Histogram:
+    """Cumulative-bucket histogram that also keeps its samples for quantiles"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last: +Inf
+        self.samples: List[float] = []
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.samples.append(value)
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return len(self.samples)
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le label, count) pairs as Prometheus exposes them"""
+        total, out = 0, []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            out.append(("+Inf" if bound == float("inf") else f"{bound:g}", total))
+        return out
+
+    def summary(self) -> Dict[str, float]:
+        return {"count": self.count, "sum": round(self.sum, 6),
+                "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+                "p50": self.quantile(0.5), "p90": self.quantile(0.9), "p99": self.quantile(0.99),
+                "max": max(self.samples) if self.samples else 0.0}
+
+def api_time(response: Any) -> Optional[float]:
+    """Seconds from a response's "time" field ("0.1234 sec.")"""
+    if isinstance(response, dict) and isinstance(response.get("time"), str):
+        match = _API_TIME.search(response["time"])
+        if match:
+            return float(match.group())
+    return None
+
+class CallMetrics:
+    """Per-call measurements for wrapped API functions
+
+    `wrap(fn, endpoint, layer)` times every call of fn. At the API layer it
+    also records the response's reported time, cost and serialized size,
+    and counts ok/error outcomes. Series are keyed by (layer, endpoint).
+    Cache hit/miss counts are taken from a MetricsCache passed to
+    `summary`/`prometheus`.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.api_time: Dict[Tuple[str, str], Histogram] = {}
+        self.payload: Dict[Tuple[str, str], Histogram] = {}
+        self.outcomes: Counter = Counter()   # (layer, endpoint, "ok" | "error")
+        self.cost: Counter = Counter()       # (layer, endpoint) -> USD
+        self.started = time.time()
+
+    def _histogram(self, series: Dict, key: Tuple[str, str], buckets: Sequence[float]) -> Histogram:
+        if key not in series:
+            series[key] = Histogram(buckets)
+        return series[key]
+
+    def record(self, layer: str, endpoint: str, seconds: float, response: Any = None,
+               error: bool = False) -> None:
+        key = (layer, endpoint)
+        if isinstance(response, dict) and response.get("status_code") not in (None, 20000):
+            error = True  # error status in the body (retried by the resilience layer)
+        reported = api_time(response) if layer == API and not error else None
+        size = len(json.dumps(response)) if layer == API and not error else None
+        with self._lock:
+            self._histogram(self.latency, key, LATENCY_BUCKETS).observe(seconds)
+            self.outcomes[layer, endpoint, "error" if error else "ok"] += 1
+            if reported is not None:
+                self._histogram(self.api_time, key, LATENCY_BUCKETS).observe(reported)
+            if size is not None:
+                self._histogram(self.payload, key, PAYLOAD_BUCKETS).observe(size)
+            if isinstance(response, dict) and layer == API and not error:
+                self.cost[key] += response.get("cost") or 0.0
+
+    def wrap(self, fn: Callable, endpoint: str, layer: str = API) -> Callable:
+        def call(**kwargs) -> Any:
+            start = self._clock()
+            try:
+                response = fn(**kwargs)
+            except BaseException:
+                self.record(layer, endpoint, self._clock() - start, error=True)
+                raise
+            self.record(layer, endpoint, self._clock() - start, response)
+            return response
+        return call
+
+    def summary(self, cache=None) -> Dict[str, Any]:
+        """Totals and histogram summaries, JSON-ready"""
+        with self._lock:
+            series = {}
+            for layer, endpoint in sorted(set(self.latency) | set(self.cost)):
+                key = (layer, endpoint)
+                entry = {
+                    "calls": self.outcomes[layer, endpoint, "ok"] + self.outcomes[layer, endpoint, "error"],
+                    "errors": self.outcomes[layer, endpoint, "error"],
+                    "latency_seconds": self.latency[key].summary() if key in self.latency else None,
+                }
+                if layer == API:
+                    entry["cost_usd"] = round(self.cost[key], 6)
+                    entry["api_time_seconds"] = self.api_time[key].summary() if key in self.api_time else None
+                    entry["payload_bytes"] = self.payload[key].summary() if key in self.payload else None
+                series.setdefault(layer, {})[endpoint] = entry
+            out = {
+                "started_at": self.started,
+                "wall_seconds": round(time.time() - self.started, 3),
+                "cost_usd": round(sum(v for (layer, _), v in self.cost.items() if layer == API), 6),
+                "layers": series,
+            }
+        if cache is not None:
+            out["cache"] = {
+                "hits": cache.hits, "misses": cache.misses, "expired": cache.expired,
+                "hit_rate": round(cache.hit_rate, 4),
+                "by_endpoint": {f"{endpoint}.{result}": n for (endpoint, result), n
+                                in sorted(cache.lookups.items())},
+            }
+        return out
+
+    def prometheus(self, cache=None) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+
+        def histogram(name: str, help_text: str, series: Dict[Tuple[str, str], Histogram]) -> None:
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} histogram")
+            for (layer, endpoint), hist in sorted(series.items()):
+                labels = f'layer="{layer}",endpoint="{endpoint}"'
+                for le, count in hist.cumulative():
+                    lines.append(f'{PREFIX}_{name}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{PREFIX}_{name}_sum{{{labels}}} {hist.sum:.6f}")
+                lines.append(f"{PREFIX}_{name}_count{{{labels}}} {hist.count}")
+
+        with self._lock:
+            histogram("call_duration_seconds", "Wall time of keyword API calls", self.latency)
+            histogram("api_reported_seconds", "Processing time reported by the API", self.api_time)
+            histogram("response_bytes", "Serialized size of API responses", self.payload)
+            lines.append(f"# HELP {PREFIX}_calls_total Keyword API calls by outcome")
+            lines.append(f"# TYPE {PREFIX}_calls_total counter")
+            for (layer, endpoint, outcome), n in sorted(self.outcomes.items()):
+                lines.append(f'{PREFIX}_calls_total{{layer="{layer}",endpoint="{endpoint}",'
+                             f'outcome="{outcome}"}} {n}')
+            lines.append(f"# HELP {PREFIX}_cost_dollars_total API cost reported by responses")
+            lines.append(f"# TYPE {PREFIX}_cost_dollars_total counter")
+            for (layer, endpoint), cost in sorted(self.cost.items()):
+                lines.append(f'{PREFIX}_cost_dollars_total{{endpoint="{endpoint}"}} {cost:.6f}')
+        if cache is not None:
+            lines.append(f"# HELP {PREFIX}_cache_lookups_total Metrics cache keyword lookups")
+            lines.append(f"# TYPE {PREFIX}_cache_lookups_total counter")
+            for (endpoint, result), n in sorted(cache.lookups.items()):
+                lines.append(f'{PREFIX}_cache_lookups_total{{endpoint="{endpoint}",result="{result}"}} {n}')
+        lines.append(f"# HELP {PREFIX}_run_timestamp_seconds When the run finished")
+        lines.append(f"# TYPE {PREFIX}_run_timestamp_seconds gauge")
+        lines.append(f"{PREFIX}_run_timestamp_seconds {time.time():.3f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: Path, prom_path: Path, cache=None) -> None:
+        """Write the JSON summary and the Prometheus textfile
+
+        Both are written to a temporary file and renamed into place, so the
+        textfile collector never reads a partial file.
+        """
+        for path, text in ((json_path, json.dumps(self.summary(cache), indent=2) + "\n"),
+                           (prom_path, self.prometheus(cache))):
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(text)
+            os.replace(tmp, path)
+
+    def report(self) -> str:
+        api = [(endpoint, hist) for (layer, endpoint), hist in sorted(self.latency.items())
+               if layer == API]
+        parts = [f"{endpoint} {hist.count} calls p50 {hist.quantile(0.5) * 1000:.0f}ms "
+                 f"p99 {hist.quantile(0.99) * 1000:.0f}ms" for endpoint, hist in api]
+        cost = sum(v for (layer, _), v in self.cost.items() if layer == API)
+        return "metrics: " + ("; ".join(parts) or "no API calls") + f"; ${cost:.4f}"
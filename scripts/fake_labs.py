@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Fake DataForSEO Labs Endpoint
+Deterministic, credential-free stand-ins for api.labs.get_keyword_overview
+and get_keyword_suggestions, with simulated latency, for exercising the topic
+gatherers locally. Responses have the live API's shape (tasks at the top
+level). FaultyLabs injects API errors for testing retry handling.
+"""
+import random
+import threading
+import time
+import zlib
+from typing import Dict, List
+
+from request_plan import task_cost
+
+def _keyword_info(keyword: str) -> Dict:
+    # Stable pseudo-metrics from the keyword text
+    h = zlib.crc32(keyword.encode("utf-8"))
+    return {
+        "search_volume": (h % 50) * 100,
+        "competition": round((h >> 8) % 100 / 100, 2),
+        "cpc": round((h >> 16) % 300 / 100, 2),
+    }
+
+def _response(items: List[Dict], cost: float, latency: float) -> Dict:
+    return {
+        "status_code": 20000,
+        "cost": cost,
+        "time": f"{latency:.4f} sec.",
+        "tasks": [{"status_code": 20000, "cost": cost, "time": f"{latency:.4f} sec.",
+                   "result": [{"items_count": len(items), "items": items}]}],
+    }
+
+class FakeLabs:
+    """Fake endpoint; also records call count and peak concurrency
+
+    Call `overview`/`suggestions` like the api.labs functions. They are
+    synchronous and thread-safe, so they can be used directly or through
+    asyncio.to_thread.
+    """
+
+    def __init__(self, latency: float = 0.05, suggestions_per_call: int = 200):
+        self.latency = latency
+        self.suggestions_per_call = suggestions_per_call
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.started: List[float] = []
+        self._lock = threading.Lock()
+
+    def _enter(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.started.append(time.monotonic())
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def overview(self, keywords: List[str], location_name: str = "United States", **kwargs) -> Dict:
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            items = [{"keyword": kw.lower(), "keyword_info": _keyword_info(kw.lower())}
+                     for kw in keywords]
+            return _response(items, task_cost(len(items)), self.latency)
+        finally:
+            self._exit()
+
+    def suggestions(self, keyword: str, location_name: str = "United States",
+                    limit: int = 100, **kwargs) -> Dict:
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            count = min(limit, self.suggestions_per_call)
+            items = [{"keyword": f"{keyword} topic {i}",
+                      "keyword_info": _keyword_info(f"{keyword} topic {i}")}
+                     for i in range(count)]
+            return _response(items, task_cost(len(items)), self.latency)
+        finally:
+            self._exit()
+
+class FaultyLabs:
+    """Fault-injecting wrapper around an endpoint's overview/suggestions
+
+    Each call fails with probability `error_rate`, and every call numbered
+    in `outage` (a range of 1-based call numbers) fails, as one of the
+    error kinds seen from DataForSEO: a rate-limit or internal-error
+    status in the response body, or a dropped connection / timeout.
+    Failures are drawn from a seeded generator, so runs are repeatable.
+    """
+
+    FAULTS = ("rate_limit", "server_error", "connection", "timeout")
+
+    def __init__(self, overview_fn, suggestions_fn, error_rate: float = 0.2,
+                 outage: range = range(0), seed: int = 0):
+        self.overview_fn = overview_fn
+        self.suggestions_fn = suggestions_fn
+        self.error_rate = error_rate
+        self.outage = outage
+        self.calls = 0
+        self.faults: List[str] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _fault(self):
+        with self._lock:
+            self.calls += 1
+            if self.calls not in self.outage and self._rng.random() >= self.error_rate:
+                return None
+            fault = self._rng.choice(self.FAULTS)
+            self.faults.append(fault)
+        if fault == "rate_limit":
+            return {"status_code": 40202, "status_message": "Rate limit per minute exceeded.",
+                    "cost": 0, "tasks": []}
+        if fault == "server_error":
+            return {"status_code": 50000, "status_message": "Internal error.", "cost": 0, "tasks": []}
+        if fault == "connection":
+            raise ConnectionError("connection reset by peer (injected)")
+        raise TimeoutError("read timed out (injected)")
+
+    def overview(self, **kwargs) -> Dict:
+        return self._fault() or self.overview_fn(**kwargs)
+
+    def suggestions(self, **kwargs) -> Dict:
+        return self._fault() or self.suggestions_fn(**kwargs)
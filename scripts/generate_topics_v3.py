@@ -5,13 +5,30 @@ Uses DataForSEO API to gather 500+ topics with search metrics
 """
 import sys
 import json
+import argparse
+import asyncio
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Optional, Sequence, Tuple
 import time
 
+from call_metrics import API, REQUEST, CallMetrics
+from fake_labs import FakeLabs, FaultyLabs
+from labs_replay import DEFAULT_LABS_DIR, LabsReplay
+from labs_stream import KeywordMetrics, iter_keyword_metrics
+from metrics_cache import (DEFAULT_TTL_DAYS, OVERVIEW, SUGGESTIONS, CachedLabs, MetricsCache,
+                           api_response, normalize, response_items)
+from request_plan import RequestPlan
+from resilience import NO_RETRY, CircuitBreaker, CircuitOpenError, ResilientCalls
+from rate_limit import TokenBucket
+from suggestion_crawler import SuggestionCrawler
+from topic_journal import TopicJournal, read_journal
+
 # Add DataForSEO skill to path
 sys.path.insert(0, str(Path.home() / 'clawd/skills/seo-dataforseo/scripts'))
-from api.labs import get_keyword_overview, get_keyword_suggestions
+try:
+    from api.labs import get_keyword_overview, get_keyword_suggestions
+except ImportError:  # skill not installed: only injected/fake endpoints work
+    get_keyword_overview = get_keyword_suggestions = None
 
 # Seed topics across all required categories
 SEED_TOPICS = {
@@ -78,152 +95,472 @@ SEED_TOPICS = {
     ]
 }
 
+# Keywords per keyword_overview request (the endpoint accepts up to 700)
+OVERVIEW_BATCH_SIZE = 100
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_PATH = REPO_ROOT / 'data' / 'keyword-metrics.sqlite'
+
 def slugify(text: str) -> str:
     """Convert text to URL-friendly slug"""
     return text.lower().replace(" ", "-").replace("'", "")
 
-def extract_search_data(api_response: Dict) -> tuple:
-    """Extract search volume and competition from API response
+def extract_search_data(api_response: Any) -> tuple:
+    """Extract search volume and competition of the first keyword in an API response
     
-    Note: API returns dict with 'tasks' at top level, not nested under 'data'
+    Accepts a parsed response (the API returns dict with 'tasks' at top
+    level, not nested under 'data'), raw JSON bytes or a saved response file.
     """
     try:
-        if not isinstance(api_response, dict):
-            return 0, 0
-        
-        # Navigate the structure: tasks[0].result[0].items[0].keyword_info
-        tasks = api_response.get("tasks", [])
-        
-        if not tasks:
-            return 0, 0
-        
-        result = tasks[0].get("result", [])
-        if not result:
-            return 0, 0
-        
-        items = result[0].get("items", [])
-        if not items:
-            return 0, 0
-        
-        keyword_info = items[0].get("keyword_info", {})
-        search_volume = keyword_info.get("search_volume", 0) or 0
-        competition = keyword_info.get("competition", 0) or 0
-        
-        return search_volume, competition
+        for metrics in iter_keyword_metrics(api_response):
+            return metrics.search_volume, metrics.competition
+        return 0, 0
     
     except Exception as e:
         print(f"      ⚠ Error extracting data: {e}")
         return 0, 0
 
-def gather_topics() -> List[Dict[str, Any]]:
-    """Gather Bible verse topics with search volume data"""
+def extract_keyword_metrics(api_response: Any) -> Dict[str, KeywordMetrics]:
+    """Map every keyword in an API response to its KeywordMetrics
+    
+    Keywords are lowercased: the API normalizes case, so "PTSD" comes back
+    as "ptsd".
+    """
+    return {metrics.keyword.lower(): metrics for metrics in iter_keyword_metrics(api_response)}
+
+def collect_seeds() -> List[Tuple[str, str, str]]:
+    """All seed topics as (slug, topic, keyword), in SEED_TOPICS order
+    
+    Topics listed under several categories appear once per listing; the
+    RequestPlan removes the duplicates.
+    """
+    seeds = []
+    for category, topics in SEED_TOPICS.items():
+        print(f"📚 {category.upper()}: {len(topics)} topics")
+        for topic in topics:
+            seeds.append((slugify(topic), topic, f"bible verses about {topic}"))
+    return seeds
+
+def apply_overview(all_topics: Dict[str, Dict], batch: Sequence[Tuple[str, str, str]],
+                   api_response: Any) -> None:
+    """Add the topics of one overview batch that clear the volume threshold"""
+    found = extract_keyword_metrics(api_response)
+    for slug, topic, keyword in batch:
+        metrics = found.get(keyword.lower())
+        search_volume = metrics.search_volume if metrics else 0
+        competition = metrics.competition if metrics else 0
+        
+        # Only include if search volume > 100
+        if search_volume >= 100:
+            all_topics[slug] = {
+                "slug": slug,
+                "title": topic.title(),
+                "searchVolume": search_volume,
+                "competition": int(competition * 100) if competition else 0
+            }
+            print(f"      ✓ {keyword}: {search_volume:,} searches/mo, competition: {int(competition * 100)}")
+        else:
+            print(f"      ✗ {keyword}: skipped (volume: {search_volume})")
+
+def apply_suggestions(all_topics: Dict[str, Dict], api_response: Any) -> None:
+    """Add new "bible verses about X" topics from a keyword_suggestions response
+    
+    The response may also be raw JSON bytes or a saved response file; items
+    are then read one at a time rather than parsed as a whole.
+    """
+    for keyword_text, search_volume, competition, _ in iter_keyword_metrics(api_response):
+        # Extract topic from keyword
+        if keyword_text.startswith("bible verses about "):
+            topic = keyword_text.replace("bible verses about ", "")
+            slug = slugify(topic)
+            
+            if slug not in all_topics and search_volume >= 100:
+                all_topics[slug] = {
+                    "slug": slug,
+                    "title": topic.title(),
+                    "searchVolume": search_volume,
+                    "competition": int(competition * 100) if competition else 0
+                }
+                print(f"   ✓ Added: {topic} ({search_volume:,} searches/mo)")
+
+def sort_topics(all_topics: Dict[str, Dict]) -> List[Dict[str, Any]]:
+    """Topics by search volume, highest first (ties keep discovery order)"""
+    return sorted(all_topics.values(), key=lambda x: x["searchVolume"], reverse=True)
+
+def _api(overview_fn: Optional[Callable], suggestions_fn: Optional[Callable]) -> Tuple[Callable, Callable]:
+    overview_fn = overview_fn or get_keyword_overview
+    suggestions_fn = suggestions_fn or get_keyword_suggestions
+    if overview_fn is None or suggestions_fn is None:
+        raise RuntimeError("DataForSEO skill not found at ~/clawd/skills/seo-dataforseo "
+                           "(use --fake or --replay for a local endpoint)")
+    return overview_fn, suggestions_fn
+
+SUGGESTION_SEED = "bible verses about"
+SUGGESTION_LIMIT = 500
+LOCATION = "United States"
+
+def plan_topic_requests(batch_size: int = OVERVIEW_BATCH_SIZE, cache: Optional[MetricsCache] = None,
+                        journaled: Iterable[Dict] = ()) -> RequestPlan:
+    """Plan the API calls for the seed topics and the suggestions seed
+    
+    Keywords with a fresh `cache` entry or a `journaled` lookup (entries of
+    a TopicJournal being resumed) are answered locally and not requested.
+    """
+    seeds = collect_seeds()
+    known_overviews = set()
+    known_suggestions = {}
+    if cache is not None:
+        known_overviews.update(cache.fresh([keyword for _, _, keyword in seeds], LOCATION, OVERVIEW))
+        for keyword, data in cache.fresh([SUGGESTION_SEED], LOCATION, SUGGESTIONS).items():
+            if data is not None:
+                known_suggestions[keyword] = data["limit"]
+    for entry in journaled:
+        keyword = normalize(entry["keyword"])
+        if entry["endpoint"] == OVERVIEW:
+            known_overviews.add(keyword)
+        elif entry["endpoint"] == SUGGESTIONS:
+            known_suggestions[keyword] = max(entry["limit"], known_suggestions.get(keyword, -1))
+    return RequestPlan(seeds, batch_size, [(SUGGESTION_SEED, SUGGESTION_LIMIT)],
+                       known_overviews, known_suggestions)
+
+def print_plan(plan: RequestPlan) -> None:
+    print("\n🗺  Request plan:")
+    for line in plan.report():
+        print(f"   {line}")
+
+def merge_overviews(plan: RequestPlan, responses: Sequence[Any]) -> Tuple[List[Tuple[str, str, str]], Dict]:
+    """Seeds of the batches that succeeded (in seed order) and one response holding their items"""
+    answered = {id(seed) for batch, response in zip(plan.batches, responses)
+                if response is not None for seed in batch.seeds}
+    items = [item for response in responses if response is not None
+             for item in response_items(response)]
+    return [seed for seed in plan.seeds if id(seed) in answered], api_response(items)
+
+def gather_topics(batch_size: int = OVERVIEW_BATCH_SIZE, overview_fn: Optional[Callable] = None,
+                  suggestions_fn: Optional[Callable] = None,
+                  plan: Optional[RequestPlan] = None) -> List[Dict[str, Any]]:
+    """Gather Bible verse topics with search volume data
+    
+    Makes exactly the calls of `plan` (by default plan_topic_requests with
+    nothing cached): one keyword_overview request per batch, and each
+    keyword's data is fanned back out to its topic slug in seed order.
+    `overview_fn`/`suggestions_fn` default to the api.labs functions.
+    """
+    overview_fn, suggestions_fn = _api(overview_fn, suggestions_fn)
     all_topics = {}
     
     print("\n" + "="*80)
     print("GATHERING BIBLE VERSE TOPICS WITH SEARCH VOLUME DATA")
     print("="*80 + "\n")
     
-    # Process each category
-    for category, topics in SEED_TOPICS.items():
-        print(f"\n📚 Processing category: {category.upper()}")
-        print(f"   Topics: {len(topics)}")
-        
-        for topic in topics:
-            keyword = f"bible verses about {topic}"
-            slug = slugify(topic)
+    if plan is None:
+        plan = plan_topic_requests(batch_size)
+    print_plan(plan)
+    
+    responses = []
+    api_batches = len(plan.api_batches)
+    for i, batch in enumerate(plan.batches, 1):
+        try:
+            print(f"\n   Batch {i}/{len(plan.batches)}: {len(batch.seeds)} keywords"
+                  + (" (cached)" if batch.cached else ""))
             
-            # Skip if already processed
-            if slug in all_topics:
-                print(f"   ⏩ Skipping duplicate: {topic}")
-                continue
+            # Get keyword data for the whole batch
+            responses.append(overview_fn(keywords=batch.keywords, location_name=LOCATION))
             
-            try:
-                print(f"   🔍 {keyword}")
-                
-                # Get keyword data
-                result = get_keyword_overview(
-                    keywords=[keyword],
-                    location_name="United States"
-                )
-                
-                # Extract search volume and competition
-                search_volume, competition = extract_search_data(result)
-                
-                # Only include if search volume > 100
-                if search_volume >= 100:
-                    all_topics[slug] = {
-                        "slug": slug,
-                        "title": topic.title(),
-                        "searchVolume": search_volume,
-                        "competition": int(competition * 100) if competition else 0
-                    }
-                    print(f"      ✓ Added: {search_volume:,} searches/mo, competition: {int(competition * 100)}")
-                else:
-                    print(f"      ✗ Skipped (volume: {search_volume})")
-                
-                # Small delay to avoid rate limiting
-                time.sleep(0.2)
-                
-            except Exception as e:
-                print(f"      ⚠ Error: {e}")
-                continue
+            # Small delay to avoid rate limiting
+            if not batch.cached:
+                api_batches -= 1
+                if api_batches:
+                    time.sleep(0.2)
+            
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"      ⚠ Error: {e}")
+            responses.append(None)
+            continue
+    apply_overview(all_topics, *merge_overviews(plan, responses))
     
     # Also gather keyword suggestions to expand the list
     print("\n\n📊 EXPANDING WITH KEYWORD SUGGESTIONS...")
     
-    try:
-        print(f"\n🔍 Getting suggestions for: bible verses about")
-        suggestions = get_keyword_suggestions(
-            keyword="bible verses about",
-            location_name="United States",
-            limit=500
-        )
+    for suggestion in plan.suggestions:
+        try:
+            print(f"\n🔍 Getting suggestions for: {suggestion.keyword}")
+            suggestions = suggestions_fn(
+                keyword=suggestion.keyword,
+                location_name=LOCATION,
+                limit=suggestion.limit
+            )
+            apply_suggestions(all_topics, suggestions)
         
-        # Extract suggestions from response
-        if isinstance(suggestions, dict):
-            tasks = suggestions.get("tasks", [])
-            
-            if tasks:
-                result = tasks[0].get("result", [])
-                if result:
-                    items = result[0].get("items", [])
-                    
-                    for item in items:
-                        keyword_text = item.get("keyword", "")
-                        keyword_info = item.get("keyword_info", {})
-                        search_volume = keyword_info.get("search_volume", 0) or 0
-                        competition = keyword_info.get("competition", 0) or 0
-                        
-                        # Extract topic from keyword
-                        if keyword_text.startswith("bible verses about "):
-                            topic = keyword_text.replace("bible verses about ", "")
-                            slug = slugify(topic)
-                            
-                            if slug not in all_topics and search_volume >= 100:
-                                all_topics[slug] = {
-                                    "slug": slug,
-                                    "title": topic.title(),
-                                    "searchVolume": search_volume,
-                                    "competition": int(competition * 100) if competition else 0
-                                }
-                                print(f"   ✓ Added: {topic} ({search_volume:,} searches/mo)")
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"   ⚠ Error getting suggestions: {e}")
     
-    except Exception as e:
-        print(f"   ⚠ Error getting suggestions: {e}")
+    return sort_topics(all_topics)
+
+async def _call(fn: Callable, **kwargs) -> Any:
+    """Await an async API function, or run a blocking one in a worker thread"""
+    if asyncio.iscoroutinefunction(fn):
+        return await fn(**kwargs)
+    return await asyncio.to_thread(fn, **kwargs)
+
+async def gather_topics_async(batch_size: int = OVERVIEW_BATCH_SIZE, rate: float = 5.0,
+                              burst: int = 1, concurrency: int = 4,
+                              overview_fn: Optional[Callable] = None,
+                              suggestions_fn: Optional[Callable] = None,
+                              plan: Optional[RequestPlan] = None) -> List[Dict[str, Any]]:
+    """asyncio version of gather_topics with the same result
+    
+    All API requests of `plan` are issued concurrently, at most
+    `concurrency` in flight, and each request start takes a token from a
+    TokenBucket refilling at `rate` per second with capacity `burst`; cached
+    batches skip both. Responses are applied in the serial order afterwards,
+    so the topic list (including tie order) matches gather_topics. API
+    functions may be plain or async callables.
+    """
+    overview_fn, suggestions_fn = _api(overview_fn, suggestions_fn)
+    bucket = TokenBucket(rate, burst)
+    in_flight = asyncio.Semaphore(max(1, concurrency))
+    
+    print("\n" + "="*80)
+    print("GATHERING BIBLE VERSE TOPICS WITH SEARCH VOLUME DATA (async)")
+    print("="*80 + "\n")
+    
+    if plan is None:
+        plan = plan_topic_requests(batch_size)
+    print_plan(plan)
+    print(f"   ({rate:g} req/s, burst {burst}, {concurrency} in flight)\n")
+    
+    async def request(label: str, cached: bool, fn: Callable, **kwargs) -> Any:
+        try:
+            if cached:
+                response = await _call(fn, **kwargs)
+            else:
+                async with in_flight:
+                    await bucket.acquire()
+                    response = await _call(fn, **kwargs)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"   ⚠ {label}: {e}")
+            return None
+        print(f"   ✓ {label}")
+        return response
+    
+    requests = [request(f"Batch {i}/{len(plan.batches)} ({len(batch.seeds)} keywords)",
+                        batch.cached, overview_fn, keywords=batch.keywords, location_name=LOCATION)
+                for i, batch in enumerate(plan.batches, 1)]
+    requests += [request(f"Suggestions for: {s.keyword}", s.cached, suggestions_fn,
+                         keyword=s.keyword, location_name=LOCATION, limit=s.limit)
+                 for s in plan.suggestions]
+    responses = await asyncio.gather(*requests)
+    
+    all_topics = {}
+    apply_overview(all_topics, *merge_overviews(plan, responses[:len(plan.batches)]))
+    print("\n\n📊 EXPANDING WITH KEYWORD SUGGESTIONS...")
+    for response in responses[len(plan.batches):]:
+        if response is not None:
+            apply_suggestions(all_topics, response)
     
-    # Convert to list and sort by search volume
-    topics_list = sorted(
-        all_topics.values(),
-        key=lambda x: x["searchVolume"],
-        reverse=True
-    )
+    return sort_topics(all_topics)
+
+def crawl_topics(topics: List[Dict[str, Any]], suggestions_fn: Callable, max_requests: int = 100,
+                 max_cost: Optional[float] = None, max_depth: Optional[int] = None,
+                 limit: int = 100, rate: float = 5.0, burst: int = 1,
+                 concurrency: int = 4) -> List[Dict[str, Any]]:
+    """Add topics found by crawling suggestions outward from every seed topic
+    
+    Expands "bible verses about <topic>" for all SEED_TOPICS, then the
+    highest-volume "bible verses about ..." suggestions, until the frontier
+    or the request/cost budget runs out (see SuggestionCrawler).
+    """
+    all_topics = {topic["slug"]: topic for topic in topics}
+    crawler = SuggestionCrawler(suggestions_fn, prefix=SUGGESTION_SEED + " ", limit=limit,
+                                max_requests=max_requests, max_cost=max_cost,
+                                max_depth=max_depth, concurrency=concurrency,
+                                rate=rate, burst=burst)
     
-    return topics_list
+    print("\n\n🕸  CRAWLING KEYWORD SUGGESTIONS...")
+    seeds = [keyword for _, _, keyword in collect_seeds()]  # the crawler dedups
+    found = asyncio.run(crawler.crawl(seeds, progress=lambda line: print(f"   {line}")))
+    
+    added = 0
+    for keyword_text, discovery in found.items():
+        topic = keyword_text[len(SUGGESTION_SEED) + 1:]
+        slug = slugify(topic)
+        search_volume = discovery.metrics.search_volume
+        competition = discovery.metrics.competition
+        if slug not in all_topics and search_volume >= 100:
+            all_topics[slug] = {
+                "slug": slug,
+                "title": topic.title(),
+                "searchVolume": search_volume,
+                "competition": int(competition * 100) if competition else 0
+            }
+            added += 1
+    print(f"\n   {crawler.report()}; {added:,} new topics")
+    return sort_topics(all_topics)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gather Bible verse topics with search volume data")
+    parser.add_argument("--batch-size", type=int, default=OVERVIEW_BATCH_SIZE,
+                        help=f"Keywords per keyword_overview request (default: {OVERVIEW_BATCH_SIZE}, max 700)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Issue requests concurrently under a token-bucket rate limit")
+    parser.add_argument("--rate", type=float, default=5.0,
+                        help="--async/--crawl: requests per second (default: 5)")
+    parser.add_argument("--burst", type=int, default=1,
+                        help="--async/--crawl: requests that may start back to back (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="--async/--crawl: maximum requests in flight (default: 4)")
+    parser.add_argument("--crawl", action="store_true",
+                        help="Also crawl suggestions outward from every seed topic, best volume first")
+    parser.add_argument("--max-requests", type=int, default=100,
+                        help="--crawl: suggestion request budget (default: 100)")
+    parser.add_argument("--max-cost", type=float,
+                        help="--crawl: API cost budget in USD (default: none)")
+    parser.add_argument("--max-depth", type=int,
+                        help="--crawl: expansion levels below the seeds (default: unlimited)")
+    parser.add_argument("--crawl-limit", type=int, default=100,
+                        help="--crawl: suggestions per request (default: 100)")
+    parser.add_argument("--no-retry", action="store_true",
+                        help="Fail requests on the first error instead of retrying with backoff")
+    parser.add_argument("--breaker-threshold", type=int, default=5,
+                        help="Consecutive failed attempts that pause all requests (default: 5)")
+    parser.add_argument("--breaker-cooldown", type=float, default=30.0,
+                        help="Seconds to pause before probing the API again (default: 30)")
+    parser.add_argument("--breaker-trips", type=int, default=5,
+                        help="Pauses without a success in between before the run stops (default: 5)")
+    parser.add_argument("--fault-rate", type=float, default=0.0,
+                        help="--fake/--replay: fraction of requests failing with injected errors")
+    parser.add_argument("--fault-seed", type=int, default=0,
+                        help="--fault-rate: random seed (default: 0)")
+    parser.add_argument("--metrics-json", help="Per-call metrics summary (default: <output>.metrics.json)")
+    parser.add_argument("--metrics-prom", help="Prometheus textfile (default: <output>.prom)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the planned API requests and estimated cost, then exit")
+    parser.add_argument("--fake", action="store_true",
+                        help="Use the local fake endpoint (fake_labs.py) instead of DataForSEO")
+    parser.add_argument("--replay", nargs="?", const=str(DEFAULT_LABS_DIR), metavar="DIR",
+                        help="Serve saved API responses (default: results/labs/) instead of DataForSEO")
+    parser.add_argument("--fake-latency", type=float, default=0.05,
+                        help="--fake/--replay: simulated seconds per request (default: 0.05)")
+    parser.add_argument("--cache", help=f"SQLite metrics cache (default: {DEFAULT_CACHE_PATH}; "
+                                        "keyword-metrics.fake.sqlite with --fake, "
+                                        ".replay.sqlite with --replay)")
+    parser.add_argument("--cache-ttl-days", type=float, default=DEFAULT_TTL_DAYS,
+                        help=f"Refetch cached keywords older than this (default: {DEFAULT_TTL_DAYS})")
+    parser.add_argument("--no-cache", action="store_true", help="Always query the API")
+    parser.add_argument("--import-cache", action="store_true",
+                        help="Seed the cache from data/search-volume-cache.json and results/labs/ first")
+    parser.add_argument("--journal", help="Progress journal (default: <output>.journal.jsonl)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip keywords already recorded in the journal by an interrupted run")
+    parser.add_argument("--output", help="Output path (default: ~/clawd/projects/bible-verse-randomizer/"
+                                         "data/topics-master.json; topics-master.fake.json with --fake, "
+                                         "topics-master.replay.json with --replay)")
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
     """Main execution"""
+    args = parse_args(argv)
+    offline = 'fake' if args.fake else 'replay' if args.replay else None
+    
+    if args.output:
+        output_path = Path(args.output)
+    elif offline:
+        output_path = Path(f'topics-master.{offline}.json')
+    else:
+        output_path = Path.home() / 'clawd/projects/bible-verse-randomizer/data/topics-master.json'
+    
+    overview_fn = suggestions_fn = None
+    if args.fake:
+        fake = FakeLabs(latency=args.fake_latency)
+        overview_fn, suggestions_fn = fake.overview, fake.suggestions
+    elif args.replay:
+        replay = LabsReplay(args.replay, latency=args.fake_latency)
+        print(f"📼 Replaying {len(replay.overviews):,} overview keywords and "
+              f"{len(replay.suggestion_files):,} suggestion seeds from {replay.directory}")
+        overview_fn, suggestions_fn = replay.overview, replay.suggestions
+    
+    cache = None
+    if not args.no_cache:
+        if args.cache:
+            cache_path = Path(args.cache)
+        elif offline:
+            cache_path = Path(f'keyword-metrics.{offline}.sqlite')
+        else:
+            cache_path = DEFAULT_CACHE_PATH
+        cache = MetricsCache(cache_path, ttl_days=args.cache_ttl_days)
+        if args.import_cache:
+            imported = cache.import_search_volume_cache(REPO_ROOT / 'data' / 'search-volume-cache.json')
+            imported += cache.import_labs_results(REPO_ROOT / 'results' / 'labs')
+            print(f"📥 Imported {imported:,} cached keyword entries into {cache_path}")
+    
+    journal_path = Path(args.journal) if args.journal else output_path.with_suffix('.journal.jsonl')
+    journaled = (entry for entry, _ in read_journal(journal_path)) \
+        if args.resume and journal_path.exists() else ()
+    plan = plan_topic_requests(args.batch_size, cache, journaled)
+    if args.dry_run:
+        print_plan(plan)
+        if args.crawl:
+            budget = f", ≤ ${args.max_cost:g}" if args.max_cost is not None else ""
+            print(f"   --crawl: up to {args.max_requests} more request(s){budget}")
+        return plan
+    
+    overview_fn, suggestions_fn = _api(overview_fn, suggestions_fn)
+    if offline and args.fault_rate:
+        faulty = FaultyLabs(overview_fn, suggestions_fn, args.fault_rate, seed=args.fault_seed)
+        overview_fn, suggestions_fn = faulty.overview, faulty.suggestions
+    metrics = CallMetrics()
+    overview_fn = metrics.wrap(overview_fn, OVERVIEW, API)
+    suggestions_fn = metrics.wrap(suggestions_fn, SUGGESTIONS, API)
+    if args.no_retry:
+        resilience = ResilientCalls(policies=NO_RETRY)
+    else:
+        resilience = ResilientCalls(CircuitBreaker(args.breaker_threshold, args.breaker_cooldown,
+                                                   args.breaker_trips))
+    overview_fn, suggestions_fn = resilience.wrap(overview_fn), resilience.wrap(suggestions_fn)
+    if cache is not None:
+        cached = CachedLabs(cache, overview_fn, suggestions_fn)
+        overview_fn, suggestions_fn = cached.overview, cached.suggestions
+    
+    # Record each lookup as it completes so an interrupted run can --resume
+    journal = TopicJournal(journal_path, overview_fn, suggestions_fn, resume=args.resume)
+    if journal.resumed:
+        print(f"⏯  Resuming: {journal.resumed:,} lookups already in {journal_path}")
+    overview_fn = metrics.wrap(journal.overview, OVERVIEW, REQUEST)
+    suggestions_fn = metrics.wrap(journal.suggestions, SUGGESTIONS, REQUEST)
+    
     # Gather topics
-    topics = gather_topics()
+    try:
+        if args.use_async:
+            topics = asyncio.run(gather_topics_async(args.batch_size, args.rate, args.burst,
+                                                     args.concurrency, overview_fn, suggestions_fn,
+                                                     plan))
+        else:
+            topics = gather_topics(args.batch_size, overview_fn, suggestions_fn, plan)
+        if args.crawl:
+            topics = crawl_topics(topics, suggestions_fn, args.max_requests, args.max_cost,
+                                  args.max_depth, args.crawl_limit, args.rate, args.burst,
+                                  args.concurrency)
+    except KeyboardInterrupt:
+        print(f"\n\n⏸  Interrupted: {journal.report()}")
+        print("   Rerun with --resume to continue")
+        raise SystemExit(130)
+    except CircuitOpenError as e:
+        print(f"\n\n⛔ API unavailable ({e}): {journal.report()}")
+        print(f"   {resilience.report()}")
+        print("   Rerun with --resume once it recovers")
+        raise SystemExit(1)
+    finally:
+        journal.close()
+        metrics_json = Path(args.metrics_json) if args.metrics_json else output_path.with_suffix('.metrics.json')
+        metrics_prom = Path(args.metrics_prom) if args.metrics_prom else output_path.with_suffix('.prom')
+        metrics.write(metrics_json, metrics_prom, cache)
     
     # Print summary
     print("\n\n" + "="*80)
@@ -238,7 +575,6 @@ def main():
             print(f"  {i}. {topic['title']}: {topic['searchVolume']:,} searches/mo")
     
     # Save to output file
-    output_path = Path.home() / 'clawd/projects/bible-verse-randomizer/data/topics-master.json'
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
     with open(output_path, 'w') as f:
@@ -253,6 +589,13 @@ def main():
     else:
         print(f"\n🎉 SUCCESS: {len(topics)} topics gathered (exceeded target of 500+)")
     
+    print(f"\n📝 {journal.report()}")
+    print(f"🔁 {resilience.report()}")
+    print(f"📈 {metrics.report()} ({metrics_json}, {metrics_prom})")
+    if cache is not None:
+        print(f"💾 {cache.report()}")
+        cache.close()
+    
     return topics
 
 if __name__ == "__main__":
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+DataForSEO Labs Replay Endpoint
+Serves get_keyword_overview / get_keyword_suggestions from the responses
+saved under results/labs/, with simulated latency, so the topic gatherers
+can run offline and deterministically.
+"""
+import json
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fake_labs import FakeLabs, _response
+from metrics_cache import OVERVIEW, SUGGESTIONS, normalize, response_items
+from request_plan import task_cost
+
+DEFAULT_LABS_DIR = Path(__file__).resolve().parent.parent / 'results' / 'labs'
+
+class LabsReplay(FakeLabs):
+    """Replay endpoint over a directory of saved Labs responses
+
+    The directory is indexed once on construction: every keyword_overview
+    item by (location, keyword), and the newest capture of each
+    keyword_suggestions seed by (location, keyword). Overview requests are
+    answered item by item, so a batch of any size is served from
+    single-keyword captures; keywords never captured are simply absent from
+    the response, as the API leaves out keywords it has no data for.
+    Suggestion captures are read from disk on first use.
+
+    Call counts and peak concurrency are tracked as in FakeLabs; `misses`
+    lists requested keywords that had no capture.
+    """
+
+    def __init__(self, directory: str = DEFAULT_LABS_DIR, latency: float = 0.0):
+        super().__init__(latency=latency)
+        self.directory = Path(directory)
+        self.overviews: Dict[Tuple[str, str], Dict] = {}
+        self.suggestion_files: Dict[Tuple[str, str], Tuple[str, int, Path]] = {}
+        self.misses: List[Tuple[str, str]] = []
+        self._index()
+
+    def _index(self) -> None:
+        for path in sorted(self.directory.glob("*.json")):
+            with open(path) as f:
+                saved = json.load(f)
+            metadata = saved.get("metadata") or {}
+            saved_at = metadata.get("saved_at") or ""
+            for task in (saved.get("data") or {}).get("tasks") or []:
+                request = task.get("data") or {}
+                location = request.get("location_name") or "United States"
+                if metadata.get("operation") == OVERVIEW:
+                    for item in response_items({"tasks": [task]}):
+                        if item.get("keyword"):
+                            self.overviews[(location, normalize(item["keyword"]))] = item
+                elif metadata.get("operation") == SUGGESTIONS and request.get("keyword"):
+                    key = (location, normalize(request["keyword"]))
+                    capture = (saved_at, request.get("limit") or 0, path)
+                    # Keep the newest capture (files sort by save time anyway)
+                    if capture[:2] >= self.suggestion_files.get(key, ("", 0, None))[:2]:
+                        self.suggestion_files[key] = capture
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _load_task(path: Path) -> Dict:
+        with open(path) as f:
+            return json.load(f)["data"]["tasks"][0]
+
+    def overview(self, keywords: List[str], location_name: str = "United States", **kwargs) -> Dict:
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            items = []
+            for keyword in keywords:
+                item = self.overviews.get((location_name, normalize(keyword)))
+                if item is None:
+                    self.misses.append((OVERVIEW, keyword))
+                else:
+                    items.append(item)
+            return _response(items, task_cost(len(items)), self.latency)
+        finally:
+            self._exit()
+
+    def suggestions(self, keyword: str, location_name: str = "United States",
+                    limit: int = 100, **kwargs) -> Dict:
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            capture = self.suggestion_files.get((location_name, normalize(keyword)))
+            if capture is None:
+                self.misses.append((SUGGESTIONS, keyword))
+                return _response([], task_cost(0), self.latency)
+            task = self._load_task(capture[2])
+            items = response_items({"tasks": [task]})[:limit]
+            return _response(items, task_cost(len(items)), self.latency)
+        finally:
+            self._exit()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print what a results/labs directory can replay"""
+    argv = sys.argv[1:] if argv is None else argv
+    start = time.perf_counter()
+    replay = LabsReplay(argv[0] if argv else DEFAULT_LABS_DIR)
+    print(f"{replay.directory}: {len(replay.overviews):,} overview keywords, "
+          f"{len(replay.suggestion_files):,} suggestion seeds "
+          f"(indexed in {time.perf_counter() - start:.2f}s)")
+
+if __name__ == "__main__":
+    main()
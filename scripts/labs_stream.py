@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Streaming Labs Response Extractor
+Pulls (keyword, search_volume, competition, cpc) out of DataForSEO Labs
+responses item by item, from parsed responses, raw JSON bytes, byte streams
+or saved results/labs files, without building the whole response tree.
+"""
+import codecs
+import io
+import json
+import re
+import sys
+from pathlib import Path
+from typing import IO, Any, Iterator, List, NamedTuple, Optional, Union
+
+class KeywordMetrics(NamedTuple):
+    keyword: str
+    search_volume: int
+    competition: float
+    cpc: Optional[float]
+
+# tasks[].result[].items[] relative to the response root (saved results/labs
+# files wrap the response in {"metadata": ..., "data": ...})
+ITEMS_PATH = ["tasks", "[]", "result", "[]", "items"]
+
+CHUNK_SIZE = 1 << 16
+
+_TOKEN = re.compile(r'["{}\[\],:]')
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SPACE = re.compile(r'[ \t\n\r,]*')
+
+def _metrics(item: Any) -> Optional[KeywordMetrics]:
+    if not isinstance(item, dict) or not item.get("keyword"):
+        return None
+    info = item.get("keyword_info") or {}
+    return KeywordMetrics(item["keyword"], info.get("search_volume", 0) or 0,
+                          info.get("competition", 0) or 0, info.get("cpc"))
+
+def _iter_parsed(api_response: Any) -> Iterator[KeywordMetrics]:
+    if not isinstance(api_response, dict):
+        return
+    if "tasks" not in api_response and isinstance(api_response.get("data"), dict):
+        api_response = api_response["data"]
+    for task in api_response.get("tasks") or []:
+        for result in (task or {}).get("result") or []:
+            for item in (result or {}).get("items") or []:
+                metrics = _metrics(item)
+                if metrics:
+                    yield metrics
+
+class _Scanner:
+    """Structural JSON scanner over a text stream
+
+    Tracks the container path with a stack of keys ("[]" for arrays) and
+    only skips over everything else; the elements of each items array are
+    decoded one at a time with JSONDecoder.raw_decode. The buffer holds
+    the unconsumed tail of the stream, so memory stays around one item plus
+    one chunk.
+    """
+
+    def __init__(self, stream: IO[bytes]):
+        self.stream = stream
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append a chunk to the buffer; False at end of stream"""
+        if self.eof:
+            return False
+        chunk = self.stream.read(CHUNK_SIZE)
+        if self.pos > CHUNK_SIZE:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        self.buf += self.decoder.decode(chunk, final=not chunk)
+        self.eof = not chunk
+        return True
+
+    def next_token(self) -> Optional["re.Match"]:
+        """Next structural character, or None at end of input"""
+        while True:
+            match = _TOKEN.search(self.buf, self.pos)
+            if match:
+                return match
+            self.pos = len(self.buf)
+            if not self.fill():
+                return None
+
+    def read_string(self) -> str:
+        """Consume the string starting at self.pos"""
+        while True:
+            match = _STRING.match(self.buf, self.pos)
+            if match:
+                self.pos = match.end()
+                text = match.group()
+                return json.loads(text) if "\\" in text else text[1:-1]
+            if not self.fill():
+                raise ValueError("unterminated string in JSON input")
+
+    def decode_value(self) -> Any:
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            if end == len(self.buf) and self.fill():
+                continue  # a number may run into the next chunk
+            self.pos = end
+            return value
+
+    def skip_space(self) -> str:
+        """Next character that is not whitespace or a separating comma"""
+        while True:
+            self.pos = _SPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def items(self) -> Iterator[Any]:
+        # Frames are [kind, key, expecting_key]; an object frame's key is the
+        # key whose value is being read
+        stack: List[list] = []
+        while True:
+            match = self.next_token()
+            if match is None:
+                if stack:
+                    raise ValueError("unexpected end of JSON input")
+                return
+            char = match.group()
+            self.pos = match.start()
+            if char == '"':
+                text = self.read_string()
+                if stack and stack[-1][0] == "{" and stack[-1][2]:
+                    stack[-1][1:] = [text, False]
+                continue
+            self.pos += 1
+            if char == "{":
+                stack.append(["{", None, True])
+            elif char == "[":
+                path = [frame[1] if frame[0] == "{" else "[]" for frame in stack]
+                if path[-len(ITEMS_PATH):] == ITEMS_PATH:
+                    yield from self._elements()
+                else:
+                    stack.append(["[", None, False])
+            elif char in "}]":
+                stack.pop()
+            elif char == "," and stack and stack[-1][0] == "{":
+                stack[-1][2] = True
+
+    def _elements(self) -> Iterator[Any]:
+        while True:
+            char = self.skip_space()
+            if char == "]":
+                self.pos += 1
+                return
+            if not char:
+                raise ValueError("unexpected end of JSON input")
+            yield self.decode_value()
+
+def iter_keyword_metrics(source: Union[dict, bytes, str, Path, IO[bytes]]) -> Iterator[KeywordMetrics]:
+    """(keyword, search_volume, competition, cpc) for each response item
+
+    `source` is a parsed response (the live API path), raw JSON bytes, a
+    path to a saved response, or a binary stream. Missing search volume and
+    competition read as 0; cpc may be None.
+    """
+    if isinstance(source, dict):
+        yield from _iter_parsed(source)
+        return
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            yield from iter_keyword_metrics(f)
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    for item in _Scanner(source).items():
+        metrics = _metrics(item)
+        if metrics:
+            yield metrics
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Print keyword metrics from saved responses as TSV"""
+    for path in (sys.argv[1:] if argv is None else argv):
+        for keyword, search_volume, competition, cpc in iter_keyword_metrics(path):
+            print(f"{keyword}\t{search_volume}\t{competition}\t{'' if cpc is None else cpc}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Mapped Files
+Shared container of the memory-mappable data files in scripts/ (verse
+pack, verse sampler, index segments, cross-reference graph): a header, a
+JSON metadata block and 8-byte aligned sections that readers map and
+view in place.
+
+Layout (little-endian):
+    magic    8s
+    version  u32
+    metalen  u32
+    meta     JSON, padded to metalen; [off, n] for each section, where n
+             is an element count for typed sections and a byte length
+             for raw ones
+    sections 8-byte aligned
+"""
+import json
+import mmap
+import shutil
+import struct
+from array import array
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+_HEADER = struct.Struct("<8sII")
+
+# Meta key of a section: a top-level name, or a path into nested objects
+SectionKey = Union[str, Tuple[str, ...]]
+
+def _align(f) -> int:
+    pad = -f.tell() % 8
+    f.write(b"\0" * pad)
+    return f.tell()
+
+def _set(meta: Dict, key: SectionKey, value: Any) -> None:
+    path = (key,) if isinstance(key, str) else key
+    for name in path[:-1]:
+        meta = meta.setdefault(name, {})
+    meta[path[-1]] = value
+
+def write_sections(f, magic: bytes, version: int, meta: Dict,
+                   sections: Sequence[Tuple[SectionKey, Any]]) -> Dict:
+    """Write a mapped file to `f`, a binary file opened for writing at its
+    start; returns the meta
+
+    Each section's content is an array (written with tofile; n is its
+    length), bytes, a file object read from its current position, or an
+    iterable of bytes chunks (n is the byte length for the last three).
+    Section offsets depend on the metadata length: it is reserved with
+    room to spare, then patched in once every section is written.
+    """
+    for key, _ in sections:
+        _set(meta, key, [0, 0])
+    meta_len = len(json.dumps(meta)) + 64 * len(sections)
+    f.write(b"\0" * (_HEADER.size + meta_len))
+    for key, content in sections:
+        start = _align(f)
+        if isinstance(content, array):
+            content.tofile(f)
+            _set(meta, key, [start, len(content)])
+            continue
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            f.write(content)
+        elif hasattr(content, "read"):
+            shutil.copyfileobj(content, f)
+        else:
+            for chunk in content:
+                f.write(chunk)
+        _set(meta, key, [start, f.tell() - start])
+    end = f.tell()
+    f.seek(0)
+    f.write(_HEADER.pack(magic, version, meta_len))
+    f.write(json.dumps(meta).encode("utf-8").ljust(meta_len))
+    f.seek(end)
+    return meta
+
+class MappedFile:
+    """Read-only mmap of a file written by write_sections
+
+    `kind` names the format in errors. `section(meta[...], typecode)`
+    returns a zero-copy view of a section, cast to `typecode` for typed
+    sections.
+    """
+
+    def __init__(self, path: str, magic: bytes, version: int, kind: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        found, found_version, meta_len = _HEADER.unpack_from(self._mmap)
+        if found != magic:
+            self._mmap.close()
+            raise ValueError(f"{path}: not a {kind}")
+        if found_version != version:
+            self._mmap.close()
+            raise ValueError(f"{path}: unsupported {kind} version {found_version}")
+        self.meta: Dict = json.loads(self._mmap[_HEADER.size:_HEADER.size + meta_len])
+        self._view = memoryview(self._mmap)
+
+    def section(self, entry: Sequence[int], typecode: Optional[str] = None) -> memoryview:
+        off, n = entry
+        if typecode is None:
+            return self._view[off:off + n]
+        return self._view[off:off + array(typecode).itemsize * n].cast(typecode)
+
+    def close(self) -> None:
+        """Unmap the file, unless a section view is still held elsewhere:
+        then the mapping stays valid and is freed once the last view is
+        released"""
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Keyword Metrics Cache
+SQLite store of DataForSEO Labs results keyed by (keyword, location, endpoint)
+with a TTL, plus a caching wrapper around the keyword_overview /
+keyword_suggestions functions so reruns only query missing or expired
+keywords.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from resilience import check_response
+
+OVERVIEW = "keyword_overview"
+SUGGESTIONS = "keyword_suggestions"
+
+DEFAULT_TTL_DAYS = 30
+
+# search-volume-cache.json stores competition levels; the API uses 0-1 scores
+COMPETITION_LEVELS = {"LOW": 0.25, "MEDIUM": 0.5, "HIGH": 0.75}
+
+# SQLite's default limit on host parameters is 999
+_PARAMS_PER_QUERY = 900
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    keyword TEXT NOT NULL,
+    location TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    data TEXT,                 -- JSON; NULL = the API had no data for it
+    fetched_at REAL NOT NULL,  -- unix time
+    PRIMARY KEY (keyword, location, endpoint)
+) WITHOUT ROWID;
+"""
+
+def normalize(keyword: str) -> str:
+    """Cache key form of a keyword (the API lowercases keywords)"""
+    return " ".join(keyword.lower().split())
+
+def api_response(items: List[Dict], cost: float = 0.0) -> Dict:
+    """Minimal API-shaped response (tasks at the top level) holding items"""
+    return {"cost": cost, "tasks": [{"cost": cost, "result": [{"items_count": len(items),
+                                                               "items": items}]}]}
+
+def response_items(api_response: Any) -> List[Dict]:
+    """All result items of an API response"""
+    if not isinstance(api_response, dict):
+        return []
+    return [item for task in api_response.get("tasks") or []
+            for result in task.get("result") or []
+            for item in result.get("items") or []]
+
+class MetricsCache:
+    """On-disk keyword metrics, valid for `ttl_days`
+
+    Thread-safe, so it can sit behind asyncio.to_thread workers. Hit, miss and
+    expired counts accumulate across lookups, also per endpoint in
+    `lookups`; see `report()`.
+    """
+
+    def __init__(self, path: str, ttl_days: float = DEFAULT_TTL_DAYS,
+                 clock: Callable[[], float] = time.time):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl_days * 86400
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self.hits = self.misses = self.expired = 0
+        self.lookups: Counter = Counter()  # (endpoint, "hit" | "miss" | "expired") -> keywords
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM metrics").fetchone()[0]
+
+    def _fresh_rows(self, keys: List[str], location: str, endpoint: str
+                    ) -> Tuple[Dict[str, Optional[str]], int]:
+        """({keyword: data JSON} for fresh entries, number of expired entries)"""
+        found: Dict[str, Optional[str]] = {}
+        stale = 0
+        cutoff = self._clock() - self.ttl
+        with self._lock:
+            for start in range(0, len(keys), _PARAMS_PER_QUERY):
+                chunk = keys[start:start + _PARAMS_PER_QUERY]
+                rows = self._db.execute(
+                    f"SELECT keyword, data, fetched_at FROM metrics "
+                    f"WHERE location = ? AND endpoint = ? AND keyword IN ({','.join('?' * len(chunk))})",
+                    [location, endpoint, *chunk])
+                for keyword, data, fetched_at in rows:
+                    if fetched_at < cutoff:
+                        stale += 1
+                    else:
+                        found[keyword] = data
+        return found, stale
+
+    def get_many(self, keywords: Iterable[str], location: str, endpoint: str) -> Dict[str, Optional[Dict]]:
+        """Fresh cached data for the keywords that have it, by normalized keyword
+
+        A keyword mapped to None is a cached "no data" answer.
+        """
+        wanted = list(dict.fromkeys(normalize(kw) for kw in keywords))
+        rows, stale = self._fresh_rows(wanted, location, endpoint)
+        with self._lock:
+            self.hits += len(rows)
+            self.misses += len(wanted) - len(rows)
+            self.expired += stale
+            self.lookups[endpoint, "hit"] += len(rows)
+            self.lookups[endpoint, "miss"] += len(wanted) - len(rows)
+            self.lookups[endpoint, "expired"] += stale
+        return {keyword: json.loads(data) if data is not None else None
+                for keyword, data in rows.items()}
+
+    def fresh(self, keywords: Iterable[str], location: str, endpoint: str) -> Dict[str, Optional[Dict]]:
+        """Like get_many, for planning: does not count towards the hit rate"""
+        rows, _ = self._fresh_rows(list(dict.fromkeys(normalize(kw) for kw in keywords)),
+                                   location, endpoint)
+        return {keyword: json.loads(data) if data is not None else None
+                for keyword, data in rows.items()}
+
+    def get(self, keyword: str, location: str, endpoint: str) -> Tuple[bool, Optional[Dict]]:
+        """(hit, data) for one keyword"""
+        found = self.get_many([keyword], location, endpoint)
+        key = normalize(keyword)
+        return key in found, found.get(key)
+
+    def put_many(self, rows: Iterable[Tuple[str, Optional[Dict]]], location: str, endpoint: str,
+                 fetched_at: Optional[float] = None) -> int:
+        """Store (keyword, data) pairs; data None records "no data"""
+        fetched_at = self._clock() if fetched_at is None else fetched_at
+        records = [(normalize(kw), location, endpoint,
+                    json.dumps(data) if data is not None else None, fetched_at)
+                   for kw, data in rows]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO metrics (keyword, location, endpoint, data, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?)", records)
+        return len(records)
+
+    def purge_expired(self) -> int:
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM metrics WHERE fetched_at < ?",
+                                    (self._clock() - self.ttl,)).rowcount
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        return (f"cache: {self.hits:,}/{lookups:,} keyword lookups hit ({self.hit_rate:.0%}), "
+                f"{self.misses:,} fetched ({self.expired:,} expired)")
+
+    # Importers
+
+    def import_search_volume_cache(self, path: str, location: str = "United States") -> int:
+        """Import data/search-volume-cache.json ({keyword: {searchVolume,
+        competition: LOW|MEDIUM|HIGH, cpc}}) as keyword_overview items,
+        dated by the file's modification time"""
+        with open(path) as f:
+            entries = json.load(f)
+        rows = []
+        for keyword, entry in entries.items():
+            level = str(entry.get("competition") or "").upper()
+            rows.append((keyword, {
+                "keyword": normalize(keyword),
+                "keyword_info": {
+                    "search_volume": entry.get("searchVolume") or 0,
+                    "competition": COMPETITION_LEVELS.get(level, 0),
+                    "competition_level": level or None,
+                    "cpc": entry.get("cpc"),
+                },
+            }))
+        return self.put_many(rows, location, OVERVIEW, fetched_at=Path(path).stat().st_mtime)
+
+    def import_labs_results(self, directory: str, location: str = "United States") -> int:
+        """Import saved Labs responses (results/labs/*.json: {metadata, data})
+
+        Every overview and suggestion item is cached as a keyword_overview
+        entry, dated by the file's metadata.saved_at.
+        """
+        imported = 0
+        for path in sorted(Path(directory).glob("*.json")):
+            with open(path) as f:
+                saved = json.load(f)
+            metadata = saved.get("metadata") or {}
+            if metadata.get("operation") not in (OVERVIEW, SUGGESTIONS):
+                continue
+            saved_at = metadata.get("saved_at")
+            fetched_at = (datetime.fromisoformat(saved_at).timestamp() if saved_at
+                          else path.stat().st_mtime)
+            items = [item for item in response_items(saved.get("data"))
+                     if item.get("keyword") and item.get("keyword_info")]
+            imported += self.put_many(((item["keyword"], item) for item in items),
+                                      location, OVERVIEW, fetched_at=fetched_at)
+        return imported
+
+class CachedLabs:
+    """get_keyword_overview / get_keyword_suggestions behind a MetricsCache
+
+    `overview` answers cached keywords from the cache and asks the API only
+    for the rest, then returns one API-shaped response covering the whole
+    request. `suggestions` caches the whole item list per seed keyword (a
+    cached list serves any smaller limit), and also caches each suggested
+    keyword's metrics as an overview entry. Only successful responses are
+    cached: an error status raises ApiError (see resilience.check_response)
+    and a response that is not a dict is passed through uncached.
+    """
+
+    def __init__(self, cache: MetricsCache, overview_fn: Callable, suggestions_fn: Callable):
+        self.cache = cache
+        self.overview_fn = overview_fn
+        self.suggestions_fn = suggestions_fn
+
+    def overview(self, keywords: List[str], location_name: str = "United States", **kwargs) -> Dict:
+        cached = self.cache.get_many(keywords, location_name, OVERVIEW)
+        missing = [kw for kw in dict.fromkeys(keywords) if normalize(kw) not in cached]
+        cost = 0.0
+        if missing:
+            response = check_response(self.overview_fn(keywords=missing,
+                                                        location_name=location_name, **kwargs))
+            if not isinstance(response, dict):
+                return response
+            cost = response.get("cost") or 0.0
+            fetched = {normalize(item["keyword"]): item for item in response_items(response)
+                       if item.get("keyword")}
+            # Keywords the API had no data for are cached as None
+            self.cache.put_many([(kw, fetched.get(normalize(kw))) for kw in missing],
+                                location_name, OVERVIEW)
+            cached.update({normalize(kw): fetched.get(normalize(kw)) for kw in missing})
+        items = [cached[key] for key in dict.fromkeys(map(normalize, keywords))
+                 if cached.get(key) is not None]
+        return api_response(items, cost)
+
+    def suggestions(self, keyword: str, location_name: str = "United States",
+                    limit: int = 100, **kwargs) -> Dict:
+        hit, data = self.cache.get(keyword, location_name, SUGGESTIONS)
+        if hit and data is not None and data["limit"] >= limit:
+            return api_response(data["items"][:limit])
+        response = check_response(self.suggestions_fn(keyword=keyword, location_name=location_name,
+                                                      limit=limit, **kwargs))
+        if not isinstance(response, dict):
+            return response
+        items = response_items(response)
+        self.cache.put_many([(keyword, {"limit": limit, "items": items})], location_name, SUGGESTIONS)
+        self.cache.put_many(((item["keyword"], item) for item in items
+                             if item.get("keyword") and item.get("keyword_info")),
+                            location_name, OVERVIEW)
+        return response
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Token-bucket Rate Limiter
+Async limiter for API calls: up to `burst` requests may start at once, after
+which requests start at most `rate` per second.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+class TokenBucket:
+    """Async token bucket
+
+    The bucket holds up to `burst` tokens and refills at `rate` tokens per
+    second; `acquire()` waits until a token is available and takes it.
+    Waiters are served in arrival order. `clock` and `sleep` can be replaced
+    for tests.
+    """
+
+    def __init__(self, rate: float, burst: int = 1,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], Awaitable] = asyncio.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1) -> None:
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await self._sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Topic Request Planner
+Works out the API calls a topic-gathering run needs before making any:
+seed keywords are normalized and deduplicated, keywords already answered
+by the metrics cache or the resume journal are set aside, and the rest are
+packed into as few, evenly sized keyword_overview requests as possible.
+"""
+import math
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Set, Tuple
+
+from metrics_cache import normalize
+
+# DataForSEO Labs pricing: per task, plus per item returned (as charged in
+# the results/labs captures). The offline backends charge the same
+TASK_COST = 0.01
+ITEM_COST = 0.0001
+
+Seed = Tuple[str, str, str]  # (slug, topic, keyword)
+
+class Batch(NamedTuple):
+    seeds: List[Seed]
+    cached: bool  # answered locally, no API call
+
+    @property
+    def keywords(self) -> List[str]:
+        return [keyword for _, _, keyword in self.seeds]
+
+class Suggestion(NamedTuple):
+    keyword: str
+    limit: int
+    cached: bool
+
+def task_cost(items: int) -> float:
+    """Cost in USD of one Labs task that returns `items` items"""
+    return round(TASK_COST + ITEM_COST * items, 6)
+
+def balanced_chunks(items: Sequence, size: int) -> List[Sequence]:
+    """Fewest chunks of at most `size`, with lengths differing by at most one"""
+    if not items:
+        return []
+    count = math.ceil(len(items) / max(1, size))
+    base, extra = divmod(len(items), count)
+    chunks, start = [], 0
+    for i in range(count):
+        end = start + base + (i < extra)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+class RequestPlan:
+    """The calls a run will make, in the order it makes them
+
+    `seeds` are the unique seeds in their original order (first occurrence
+    of each slug and normalized keyword wins). Keywords in
+    `known_overviews` go into one cached batch; the rest are split by
+    balanced_chunks into `batch_size`-bounded API batches. A suggestions
+    request is cached when `known_suggestions` holds its seed with at least
+    the requested limit.
+    """
+
+    def __init__(self, seeds: Iterable[Seed], batch_size: int,
+                 suggestions: Iterable[Tuple[str, int]] = (),
+                 known_overviews: Set[str] = frozenset(),
+                 known_suggestions: Dict[str, int] = None):
+        known_suggestions = known_suggestions or {}
+        self.batch_size = max(1, batch_size)
+        self.seeds: List[Seed] = []
+        self.duplicates: List[Seed] = []
+        slugs, keywords = set(), set()
+        for seed in seeds:
+            slug, _, keyword = seed
+            if slug in slugs or normalize(keyword) in keywords:
+                self.duplicates.append(seed)
+                continue
+            slugs.add(slug)
+            keywords.add(normalize(keyword))
+            self.seeds.append(seed)
+
+        cached = [seed for seed in self.seeds if normalize(seed[2]) in known_overviews]
+        pending = [seed for seed in self.seeds if normalize(seed[2]) not in known_overviews]
+        self.batches: List[Batch] = ([Batch(cached, True)] if cached else []) + \
+            [Batch(list(chunk), False) for chunk in balanced_chunks(pending, self.batch_size)]
+        self.suggestions = [Suggestion(keyword, limit,
+                                       known_suggestions.get(normalize(keyword), -1) >= limit)
+                            for keyword, limit in suggestions]
+
+    @property
+    def api_batches(self) -> List[Batch]:
+        return [batch for batch in self.batches if not batch.cached]
+
+    @property
+    def cached_seeds(self) -> int:
+        return sum(len(batch.seeds) for batch in self.batches if batch.cached)
+
+    @property
+    def requests(self) -> int:
+        """API requests the plan makes"""
+        return len(self.api_batches) + sum(not s.cached for s in self.suggestions)
+
+    def estimated_cost(self) -> float:
+        """Upper bound in USD: every keyword and suggestion slot returns an item"""
+        overview = sum(task_cost(len(batch.seeds)) for batch in self.api_batches)
+        return overview + sum(task_cost(s.limit) for s in self.suggestions if not s.cached)
+
+    def report(self) -> List[str]:
+        sizes = sorted({len(batch.seeds) for batch in self.api_batches})
+        pending = sum(len(batch.seeds) for batch in self.api_batches)
+        lines = [
+            f"Seeds: {len(self.seeds) + len(self.duplicates)} topics, "
+            f"{len(self.duplicates)} duplicates removed → {len(self.seeds)} keywords",
+            f"Already cached/journaled: {self.cached_seeds} keywords",
+            f"keyword_overview: {pending} keywords in {len(self.api_batches)} request(s)"
+            + (f" of {'-'.join(map(str, sizes))} keywords" if sizes else ""),
+        ]
+        for s in self.suggestions:
+            lines.append(f"keyword_suggestions: {s.keyword!r} (limit {s.limit})"
+                         + (" cached" if s.cached else ""))
+        lines.append(f"Total: {self.requests} API request(s), estimated cost ≤ ${self.estimated_cost():.4f}")
+        return lines
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Resilient Keyword API Calls
+Retries with jittered exponential backoff, chosen per error class, and a
+circuit breaker that pauses all calls during a sustained outage, around
+the keyword_overview / keyword_suggestions functions.
+"""
+import functools
+import random
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+class ApiError(Exception):
+    """Error status reported in a DataForSEO response body (or an HTTP status)"""
+
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(f"{status} {message}".strip())
+        self.status = status
+        self.message = message
+
+class CircuitOpenError(Exception):
+    """The breaker kept tripping: the API looks down, stop the run"""
+
+class RetryPolicy(NamedTuple):
+    attempts: int       # total tries, including the first
+    base_delay: float   # seconds; doubles after every try
+    max_delay: float
+
+POLICIES: Dict[str, RetryPolicy] = {
+    "rate_limit": RetryPolicy(6, 1.0, 60.0),
+    "server": RetryPolicy(4, 0.5, 30.0),
+    "network": RetryPolicy(4, 0.5, 30.0),
+    "client": RetryPolicy(1, 0.0, 0.0),   # bad request: retrying won't help
+    "unknown": RetryPolicy(2, 0.5, 5.0),
+}
+
+NO_RETRY: Dict[str, RetryPolicy] = {kind: RetryPolicy(1, 0.0, 0.0) for kind in POLICIES}
+
+# HTTP 429; DataForSEO 40202 "Rate limit per minute exceeded" and 40209
+# "Too many simultaneous requests"
+RATE_LIMIT_STATUSES = {429, 40202, 40209}
+
+# Error classes that indicate the API (not the request) is in trouble
+OUTAGE_CLASSES = {"rate_limit", "server", "network"}
+
+def check_response(response: Any) -> Any:
+    """Raise ApiError for an error status in a response, else return it
+
+    DataForSEO reports most errors with HTTP 200 and a status_code other
+    than 20000, at the top level or per task.
+    """
+    if isinstance(response, dict):
+        statuses = [response] + [task for task in response.get("tasks") or [] if isinstance(task, dict)]
+        for part in statuses:
+            status = part.get("status_code")
+            if status is not None and status != 20000:
+                raise ApiError(status, part.get("status_message") or "")
+    return response
+
+def classify(error: BaseException) -> str:
+    """Error class of an exception: a key of POLICIES"""
+    status = getattr(error, "status", None)
+    if status is None:
+        # requests.HTTPError and similar carry the HTTP response
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        if status in RATE_LIMIT_STATUSES:
+            return "rate_limit"
+        if 500 <= status < 600 or 50000 <= status < 60000:
+            return "server"
+        if 400 <= status < 500 or 40000 <= status < 50000:
+            return "client"
+    if isinstance(error, (OSError, TimeoutError)):
+        return "network"
+    return "unknown"
+
+class CircuitBreaker:
+    """Pause every call once `threshold` attempts in a row have failed
+
+    While open, callers sleep until `cooldown` seconds after it opened; the
+    next attempt then probes the API, and a single further failure reopens
+    it. Any success closes it. Once it has opened `max_trips` times without
+    a success in between, `before_call` raises CircuitOpenError instead.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0, max_trips: int = 5,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_trips = max_trips
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.trips = 0
+        self.opened = 0  # total openings, for reporting
+        self.open_until = 0.0
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.trips >= self.max_trips:
+                raise CircuitOpenError(f"circuit open after {self.trips} trips")
+            wait = self.open_until - self._clock()
+        if wait > 0:
+            self._sleep(wait)
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = self.trips = 0
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            now = self._clock()
+            if self.failures >= self.threshold and now >= self.open_until:
+                self.open_until = now + self.cooldown
+                self.trips += 1
+                self.opened += 1
+                self.failures = self.threshold - 1  # half-open: one more failure reopens
+
+class ResilientCalls:
+    """Retries per error class and a circuit breaker for API functions
+
+    `wrap(fn)` returns fn behind these; every try is checked with
+    check_response. Failures are retried per `policies[classify(error)]`
+    after a full-jitter delay (uniform between 0 and base_delay * 2**try,
+    capped at max_delay); the last error is re-raised when the policy gives
+    up, and counted as a drop. Only outage classes count towards the
+    breaker, which is shared by all wrapped functions. `stats` counts
+    calls, retries, drops and errors per class.
+    """
+
+    def __init__(self, breaker: Optional[CircuitBreaker] = None,
+                 policies: Optional[Dict[str, RetryPolicy]] = None,
+                 rng: Optional[random.Random] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.breaker = breaker
+        self.policies = policies or POLICIES
+        self.rng = rng or random.Random()
+        self.stats: Counter = Counter()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def wrap(self, fn: Callable) -> Callable:
+        return functools.partial(self.call, fn)
+
+    def call(self, fn: Callable, **kwargs) -> Any:
+        attempt = 0
+        self._count("calls")
+        while True:
+            if self.breaker:
+                self.breaker.before_call()
+            try:
+                response = check_response(fn(**kwargs))
+            except Exception as e:
+                kind = classify(e)
+                self._count(f"errors.{kind}")
+                if self.breaker and kind in OUTAGE_CLASSES:
+                    self.breaker.failure()
+                policy = self.policies.get(kind, self.policies["unknown"])
+                attempt += 1
+                if attempt >= policy.attempts:
+                    self._count("drops")
+                    raise
+                self._count("retries")
+                with self._lock:
+                    delay = self.rng.uniform(0, min(policy.max_delay,
+                                                    policy.base_delay * 2 ** (attempt - 1)))
+                self._sleep(delay)
+                continue
+            if self.breaker:
+                self.breaker.success()
+            return response
+
+    def report(self) -> str:
+        errors = ", ".join(f"{key.split('.', 1)[1]} {n}" for key, n in sorted(self.stats.items())
+                           if key.startswith("errors."))
+        line = (f"resilience: {self.stats['calls']:,} calls, {self.stats['retries']:,} retries, "
+                f"{self.stats['drops']:,} dropped")
+        if errors:
+            line += f" (errors: {errors})"
+        if self.breaker is not None:
+            line += f", breaker opened {self.breaker.opened}x"
+        return line
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Keyword Suggestion Crawler
+Best-first expansion of keyword_suggestions from many seeds: every
+suggestion matching the topic prefix joins a frontier ordered by search
+volume, and the highest-volume keywords are expanded next, concurrently and
+rate limited, until the frontier runs dry or a request/cost budget is spent.
+"""
+import asyncio
+import heapq
+import itertools
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from labs_stream import KeywordMetrics, iter_keyword_metrics
+from metrics_cache import normalize
+from rate_limit import TokenBucket
+from resilience import CircuitOpenError
+
+class Discovery(NamedTuple):
+    metrics: KeywordMetrics
+    depth: int        # expansions from the nearest seed
+    parent: str       # keyword whose suggestions included it
+
+class SuggestionCrawler:
+    """Crawl keyword_suggestions outward from seed keywords
+
+    `frontier` is a heap of (-search_volume, order, keyword, depth): seeds
+    have no volume yet and go first, then the best-known unexpanded
+    keywords. `seen` holds every keyword ever queued, so each one is
+    expanded at most once however many parents suggest it. Only suggestions
+    starting with `prefix` are followed, and only to `max_depth` levels.
+
+    The crawl stops issuing requests after `max_requests`, or when the cost
+    spent plus the expected cost of the requests in flight and the next one
+    would exceed `max_cost`; expected costs use the average so far, so the
+    cost budget is only overshot when later requests cost more than that.
+    """
+
+    def __init__(self, suggestions_fn: Callable, prefix: str = "", limit: int = 100,
+                 max_requests: int = 100, max_cost: Optional[float] = None,
+                 max_depth: Optional[int] = None, concurrency: int = 4, rate: float = 5.0,
+                 burst: int = 1, location_name: str = "United States"):
+        self.suggestions_fn = suggestions_fn
+        self.prefix = prefix
+        self.limit = limit
+        self.max_requests = max_requests
+        self.max_cost = max_cost
+        self.max_depth = max_depth
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.burst = burst
+        self.location_name = location_name
+        self.frontier: List[Tuple[float, int, str, int]] = []
+        self.seen: set = set()
+        self.visited: List[str] = []
+        self.found: Dict[str, Discovery] = {}
+        self.requests = self.errors = 0
+        self.cost = 0.0
+        self._order = itertools.count()
+
+    def push(self, keyword: str, depth: int, search_volume: Optional[int] = None) -> bool:
+        """Queue a keyword for expansion unless it was queued before"""
+        key = normalize(keyword)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        priority = float("-inf") if search_volume is None else -search_volume
+        heapq.heappush(self.frontier, (priority, next(self._order), keyword, depth))
+        return True
+
+    def budget_left(self, in_flight: int = 0) -> bool:
+        """Whether one more request fits, given `in_flight` unfinished ones"""
+        if self.requests >= self.max_requests:
+            return False
+        if self.max_cost is None:
+            return True
+        completed = self.requests - in_flight
+        if not completed:
+            return not in_flight  # learn the cost of one request first
+        # Price pending requests at the average cost so far
+        return self.cost + self.cost / completed * (in_flight + 1) <= self.max_cost
+
+    def _expand(self, keyword: str, depth: int, response: Any) -> int:
+        added = 0
+        for metrics in iter_keyword_metrics(response):
+            key = normalize(metrics.keyword)
+            if not key.startswith(self.prefix) or key == self.prefix.strip():
+                continue
+            if key not in self.found:
+                self.found[key] = Discovery(metrics, depth + 1, keyword)
+            if self.max_depth is None or depth + 1 < self.max_depth:
+                added += self.push(metrics.keyword, depth + 1, metrics.search_volume)
+        return added
+
+    async def _call(self, keyword: str) -> Any:
+        kwargs = dict(keyword=keyword, location_name=self.location_name, limit=self.limit)
+        if asyncio.iscoroutinefunction(self.suggestions_fn):
+            return await self.suggestions_fn(**kwargs)
+        return await asyncio.to_thread(self.suggestions_fn, **kwargs)
+
+    async def crawl(self, seeds: Iterable[str], progress: Optional[Callable[[str], None]] = None
+                    ) -> Dict[str, Discovery]:
+        """Expand from `seeds` until the frontier or the budget runs out"""
+        for seed in seeds:
+            self.push(seed, 0)
+        bucket = TokenBucket(self.rate, self.burst)
+        changed = asyncio.Condition()
+        in_flight = 0
+
+        async def worker() -> None:
+            nonlocal in_flight
+            while True:
+                async with changed:
+                    await changed.wait_for(lambda: self.frontier or not in_flight
+                                           or not self.budget_left(in_flight))
+                    if not self.frontier or not self.budget_left(in_flight):
+                        changed.notify_all()
+                        return
+                    _, _, keyword, depth = heapq.heappop(self.frontier)
+                    in_flight += 1
+                    self.requests += 1
+                try:
+                    await bucket.acquire()
+                    response = await self._call(keyword)
+                except CircuitOpenError:
+                    raise
+                except Exception as e:
+                    response = None
+                    self.errors += 1
+                    if progress:
+                        progress(f"⚠ {keyword}: {e}")
+                async with changed:
+                    in_flight -= 1
+                    if response is not None:
+                        self.cost += (response.get("cost") or 0.0) if isinstance(response, dict) else 0.0
+                        self.visited.append(keyword)
+                        added = self._expand(keyword, depth, response)
+                        if progress:
+                            progress(f"✓ {keyword} (depth {depth}): +{added} queued, "
+                                     f"{len(self.found):,} found")
+                    changed.notify_all()
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return self.found
+
+    def report(self) -> str:
+        return (f"crawl: {self.requests:,} requests ({self.errors:,} failed), ${self.cost:.4f}, "
+                f"{len(self.found):,} keywords found, {len(self.frontier):,} left in frontier")
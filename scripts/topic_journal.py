@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Topic Gathering Journal
+Append-only JSONL record of every keyword the topic gatherer has looked up,
+written as each request completes, so an interrupted run can be resumed
+without repeating its API calls.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from metrics_cache import OVERVIEW, SUGGESTIONS, api_response, normalize, response_items
+
+def read_journal(path: str) -> Iterator[Tuple[Dict, int]]:
+    """(entry, end offset) for each complete line of a journal"""
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                return
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                return
+            offset += len(line)
+            yield entry, offset
+
+class TopicJournal:
+    """Progress journal wrapped around the keyword API functions
+
+    Each line is one completed lookup:
+        {"endpoint": "keyword_overview", "keyword": ..., "item": {...} | null}
+        {"endpoint": "keyword_suggestions", "keyword": ..., "limit": N, "items": [...]}
+    Lines are flushed and fsynced as they are written. With `resume`, an
+    existing journal is replayed and `overview`/`suggestions` answer
+    journaled keywords from it; otherwise the journal starts empty. A line
+    torn by a crash is dropped. A response that is not a dict (an error
+    payload) is passed through and not journaled.
+    """
+
+    def __init__(self, path: str, overview_fn: Callable, suggestions_fn: Callable,
+                 resume: bool = False):
+        self.path = Path(path)
+        self.overview_fn = overview_fn
+        self.suggestions_fn = suggestions_fn
+        self.overviews: Dict[str, Optional[Dict]] = {}
+        self.suggested: Dict[str, Dict] = {}
+        self.resumed = self.recorded = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            self._replay()
+        else:
+            self.path.write_text("")
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _replay(self) -> None:
+        good = 0
+        for entry, good in read_journal(self.path):
+            self._load(entry)
+        # Cut off a torn final line so new entries start on a line of their own
+        with open(self.path, "r+b") as f:
+            f.truncate(good)
+        self.resumed = len(self.overviews) + len(self.suggested)
+
+    def _load(self, entry: Dict) -> None:
+        key = normalize(entry["keyword"])
+        if entry["endpoint"] == OVERVIEW:
+            self.overviews[key] = entry["item"]
+        elif entry["endpoint"] == SUGGESTIONS:
+            self.suggested[key] = entry
+
+    def _append(self, entries: List[Dict]) -> None:
+        self._file.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        for entry in entries:
+            self._load(entry)
+        self.recorded += len(entries)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def overview(self, keywords: List[str], location_name: str = "United States", **kwargs) -> Dict:
+        pending = [kw for kw in dict.fromkeys(keywords) if normalize(kw) not in self.overviews]
+        cost = 0.0
+        if pending:
+            response = self.overview_fn(keywords=pending, location_name=location_name, **kwargs)
+            if not isinstance(response, dict):
+                return response
+            cost = response.get("cost") or 0.0
+            fetched = {normalize(item["keyword"]): item for item in response_items(response)
+                       if item.get("keyword")}
+            self._append([{"endpoint": OVERVIEW, "keyword": kw, "item": fetched.get(normalize(kw))}
+                          for kw in pending])
+        items = [self.overviews[key] for key in dict.fromkeys(map(normalize, keywords))
+                 if self.overviews[key] is not None]
+        return api_response(items, cost)
+
+    def suggestions(self, keyword: str, location_name: str = "United States",
+                    limit: int = 100, **kwargs) -> Dict:
+        entry = self.suggested.get(normalize(keyword))
+        if entry is not None and entry["limit"] >= limit:
+            return api_response(entry["items"][:limit])
+        response = self.suggestions_fn(keyword=keyword, location_name=location_name,
+                                       limit=limit, **kwargs)
+        if not isinstance(response, dict):
+            return response
+        self._append([{"endpoint": SUGGESTIONS, "keyword": keyword, "limit": limit,
+                       "items": response_items(response)}])
+        return response
+
+    def report(self) -> str:
+        return (f"journal: {self.resumed:,} lookups resumed, {self.recorded:,} recorded "
+                f"({self.path})")
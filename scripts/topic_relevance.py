@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Topic ↔ Verse Relevance
+Scores every verse against every topic (data/topics-master.json) and intent
+(data/intents-master.json) with TF-IDF cosine similarity, keeps the top K
+verses per topic, and writes them as verse_topics / intent_verses rows.
+
+Verse vectors are built once into a term-major sparse matrix; topics are
+scored in chunks with one sparse product per chunk (SciPy when installed,
+else the same product over the postings in Python), so memory is bounded
+by the chunk, not by topics × verses.
+"""
+import argparse
+import heapq
+import json
+import math
+import re
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # scored over the postings in Python instead
+    np = sparse = None
+
+from verse_index import TRANSLATIONS, tokenize
+from verse_pack import DEFAULT_PACK, REPO_ROOT, VersePack
+
+DATA_DIR = REPO_ROOT / 'data'
+TOPICS_FILE = DATA_DIR / 'topics-master.json'
+INTENTS_FILE = DATA_DIR / 'intents-master.json'
+SEED_SQL = REPO_ROOT / 'database' / 'seed-verses.sql'
+OUTPUT_DIR = REPO_ROOT / 'database'
+
+# Term weight multipliers per verse field: the translations say what the
+# verse says, the commentary adds topic vocabulary ("anxiety", "marriage")
+FIELD_WEIGHTS = dict({field: 1.0 for field in TRANSLATIONS},
+                     meaning=0.5, context=0.25, application=0.25)
+
+# intents-master.json slugs ("for-weddings") as intent_pages slugs
+INTENT_SLUG_PREFIX = "bible-verses-"
+
+TOP_K = 20
+MIN_SIMILARITY = 0.05
+CHUNK_SIZE = 256
+ROWS_PER_INSERT = 500
+
+class Query(NamedTuple):
+    slug: str
+    text: str
+
+class Match(NamedTuple):
+    topic: str
+    verse: str
+    similarity: float
+    relevance: int  # 1-10, relative to the topic's best match
+
+def _normalized(weights: Dict[int, float]) -> Dict[int, float]:
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {term: w / norm for term, w in weights.items()} if norm else {}
+
+class VerseMatrix:
+    """L2-normalized TF-IDF verse vectors, stored term-major
+
+    Term t's column is `doc_ids[indptr[t]:indptr[t + 1]]` with weights in
+    `values` (i.e. the transposed verse matrix in CSR form). Term
+    frequencies are sublinear (1 + log tf) after FIELD_WEIGHTS.
+    """
+
+    def __init__(self, slugs: List[str], vocabulary: Dict[str, int], idf: array,
+                 indptr: array, doc_ids: array, values: array):
+        self.slugs = slugs
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.values = values
+        self._transposed = None  # SciPy CSR matrix of the above, built on first use
+
+    @classmethod
+    def from_pack(cls, pack: VersePack,
+                  field_weights: Mapping[str, float] = FIELD_WEIGHTS) -> "VerseMatrix":
+        fields = [field for field in field_weights if field in pack.field_index]
+        columns = [pack.column(field) for field in fields]
+        slugs = list(pack.column("slug"))
+        vocabulary: Dict[str, int] = {}
+        rows: List[Dict[int, float]] = []
+        df = Counter()
+        for texts in zip(*columns):
+            tf: Dict[int, float] = {}
+            for field, text in zip(fields, texts):
+                for term, count in Counter(tokenize(text or "")).items():
+                    t = vocabulary.setdefault(term, len(vocabulary))
+                    tf[t] = tf.get(t, 0.0) + field_weights[field] * count
+            df.update(tf.keys())
+            rows.append(tf)
+
+        n = len(rows)
+        idf = array("d", (math.log((n + 1) / (df[t] + 1)) + 1 for t in range(len(vocabulary))))
+        by_term: List[List[Tuple[int, float]]] = [[] for _ in vocabulary]
+        for doc, tf in enumerate(rows):
+            weights = _normalized({t: (1 + math.log(w)) * idf[t] if w >= 1 else w * idf[t]
+                                   for t, w in tf.items()})
+            for t, w in weights.items():
+                by_term[t].append((doc, w))
+        indptr, doc_ids, values = array("Q", [0]), array("I"), array("d")
+        for postings in by_term:
+            for doc, w in postings:
+                doc_ids.append(doc)
+                values.append(w)
+            indptr.append(len(doc_ids))
+        return cls(slugs, vocabulary, idf, indptr, doc_ids, values)
+
+    def vectorize(self, text: str) -> Dict[int, float]:
+        """L2-normalized TF-IDF vector of a query; unknown terms are dropped"""
+        tf = Counter(self.vocabulary[term] for term in tokenize(text) if term in self.vocabulary)
+        return _normalized({t: (1 + math.log(count)) * self.idf[t] for t, count in tf.items()})
+
+    def _top_python(self, vectors: Sequence[Dict[int, float]], k: int,
+                    min_similarity: float) -> Iterator[List[Tuple[int, float]]]:
+        indptr, doc_ids, values = self.indptr, self.doc_ids, self.values
+        for vector in vectors:
+            scores: Dict[int, float] = {}
+            for t, qw in vector.items():
+                for i in range(indptr[t], indptr[t + 1]):
+                    scores[doc_ids[i]] = scores.get(doc_ids[i], 0.0) + qw * values[i]
+            yield heapq.nsmallest(k, ((doc, s) for doc, s in scores.items() if s >= min_similarity),
+                                  key=lambda item: (-item[1], item[0]))
+
+    def _top_sparse(self, vectors: Sequence[Dict[int, float]], k: int,
+                    min_similarity: float) -> Iterator[List[Tuple[int, float]]]:
+        if self._transposed is None:
+            self._transposed = sparse.csr_matrix(
+                (np.frombuffer(self.values, dtype=np.float64),
+                 np.asarray(self.doc_ids, dtype=np.int32),
+                 np.asarray(self.indptr, dtype=np.int64)),
+                shape=(len(self.vocabulary), len(self.slugs)))
+        indptr, indices, data = [0], [], []
+        for vector in vectors:
+            indices.extend(vector.keys())
+            data.extend(vector.values())
+            indptr.append(len(indices))
+        queries = sparse.csr_matrix((data, indices, indptr),
+                                    shape=(len(vectors), len(self.vocabulary)))
+        scores = (queries @ self._transposed).tocsr()
+        for row in range(len(vectors)):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            docs, sims = scores.indices[start:end], scores.data[start:end]
+            keep = sims >= min_similarity
+            docs, sims = docs[keep], sims[keep]
+            if len(sims) > k:
+                best = np.argpartition(-sims, k - 1)[:k]
+                docs, sims = docs[best], sims[best]
+            yield sorted(zip(docs.tolist(), sims.tolist()), key=lambda item: (-item[1], item[0]))
+
+    def top_k(self, queries: Iterable[Query], k: int = TOP_K, min_similarity: float = MIN_SIMILARITY,
+              chunk_size: int = CHUNK_SIZE) -> Iterator[Match]:
+        """Best k verses per query, `chunk_size` queries per sparse product"""
+        queries = list(queries)
+        top = self._top_python if sparse is None else self._top_sparse
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            vectors = [self.vectorize(query.text) for query in chunk]
+            for query, best in zip(chunk, top(vectors, k, min_similarity)):
+                for doc, similarity in best:
+                    relevance = max(1, math.ceil(10 * similarity / best[0][1] - 1e-9))
+                    yield Match(query.slug, self.slugs[doc], round(similarity, 4), relevance)
+
+def seeded_rows(table: str, path: str = SEED_SQL) -> List[Dict[str, str]]:
+    """Rows of the `INSERT INTO table (...) VALUES` statement in seed-verses.sql"""
+    text = Path(path).read_text(encoding="utf-8")
+    statement = re.search(rf"INSERT INTO {table} \(([^)]*)\) VALUES(.*?);", text, re.S)
+    if statement is None:
+        return []
+    columns = [column.strip() for column in statement.group(1).split(",")]
+    body = re.sub(r"--[^\n]*", "", statement.group(2))
+    value = re.compile(r"'((?:[^']|'')*)'|([^,\s][^,]*)")
+    rows = []
+    for row in re.findall(r"\(((?:'(?:[^']|'')*'|[^()'])*)\)", body):
+        values = [quoted.replace("''", "'") if bare == "" else bare.strip()
+                  for quoted, bare in value.findall(row)]
+        rows.append(dict(zip(columns, values)))
+    return rows
+
+def load_descriptions(path: str = SEED_SQL) -> Dict[str, str]:
+    """{slug: description} of the topics seeded in seed-verses.sql"""
+    return {row["slug"]: row["description"] for row in seeded_rows("topics", path)}
+
+def load_queries(path: str, descriptions: Mapping[str, str] = None) -> List[Query]:
+    """Title plus description (when there is one) of each topic or intent"""
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    descriptions = descriptions or {}
+    return [Query(entry["slug"], f"{entry['title']} {descriptions.get(entry['slug'], '')}".strip())
+            for entry in entries]
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def write_sql(path: str, matches: Iterable[Match], table: str, slug_prefix: str = "") -> int:
+    """INSERT statements for verse_topics or intent_verses; returns the row count
+
+    Rows reference verses and topics/intent pages by slug and are joined
+    against those tables, so a row whose verse or topic is not in the
+    database is skipped instead of failing its statement. Re-running
+    updates the scores, except for verse_topics rows marked manual_review.
+    """
+    if table == "verse_topics":
+        columns, parent, alias, key = ("(verse_id, topic_id, relevance_score)", "topics", "t",
+                                       "topic_slug")
+        ids = "v.id, t.id"
+        conflict = ("ON CONFLICT (verse_id, topic_id) DO UPDATE SET relevance_score = "
+                    "EXCLUDED.relevance_score WHERE NOT verse_topics.manual_review")
+    else:
+        columns, parent, alias, key = ("(intent_id, verse_id, relevance_score)", "intent_pages", "i",
+                                       "intent_slug")
+        ids = "i.id, v.id"
+        conflict = ("ON CONFLICT (intent_id, verse_id) DO UPDATE SET relevance_score = "
+                    "EXCLUDED.relevance_score")
+
+    def flush(f, batch: List[str]) -> None:
+        f.write(f"\nINSERT INTO {table} {columns}\n"
+                f"SELECT {ids}, x.score FROM (VALUES\n" + ",\n".join(batch) + "\n"
+                f") AS x(verse_slug, {key}, score)\n"
+                f"JOIN verses v ON v.slug = x.verse_slug\n"
+                f"JOIN {parent} {alias} ON {alias}.slug = x.{key}\n"
+                f"{conflict};\n")
+
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"-- {table}: top TF-IDF matches, generated by scripts/topic_relevance.py\n")
+        batch: List[str] = []
+        for match in matches:
+            batch.append(f"({_sql_string(match.verse)}, {_sql_string(slug_prefix + match.topic)}, "
+                         f"{match.relevance})")
+            count += 1
+            if len(batch) == ROWS_PER_INSERT:
+                flush(f, batch)
+                batch = []
+        if batch:
+            flush(f, batch)
+    return count
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Top-K verses per topic and intent by TF-IDF")
+    parser.add_argument("--pack", default=str(DEFAULT_PACK))
+    parser.add_argument("--topics", default=str(TOPICS_FILE))
+    parser.add_argument("--intents", default=str(INTENTS_FILE))
+    parser.add_argument("--out-dir", default=str(OUTPUT_DIR),
+                        help="Where verse-topics.sql and intent-verses.sql go (default: database/)")
+    parser.add_argument("--json", help="Also write {topic: {verse: relevance}} here "
+                                       "(the --topics input of verse_sampler.py)")
+    parser.add_argument("-k", type=int, default=TOP_K, help=f"Verses per topic (default: {TOP_K})")
+    parser.add_argument("--min-similarity", type=float, default=MIN_SIMILARITY)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help="Topics per sparse product (bounds memory)")
+    parser.add_argument("--intent-prefix", default=INTENT_SLUG_PREFIX,
+                        help="Prefix turning intents-master slugs into intent_pages slugs")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    with VersePack(args.pack) as pack:
+        matrix = VerseMatrix.from_pack(pack)
+    print(f"Vectorized {len(matrix.slugs):,} verses, {len(matrix.vocabulary):,} terms, "
+          f"{len(matrix.values):,} nonzeros in {time.perf_counter() - start:.2f}s"
+          + ("" if sparse is not None else " (SciPy not installed: scoring in Python)"))
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    topic_matches: Dict[str, Dict[str, int]] = {}
+    jobs = ((args.topics, load_descriptions(), "verse_topics", "", "topics",
+             out_dir / 'verse-topics.sql'),
+            (args.intents, None, "intent_verses", args.intent_prefix, "intent_pages",
+             out_dir / 'intent-verses.sql'))
+    for source, descriptions, table, prefix, parent, path in jobs:
+        start = time.perf_counter()
+        queries = load_queries(source, descriptions)
+        matches = []
+        for match in matrix.top_k(queries, args.k, args.min_similarity, args.chunk_size):
+            matches.append(match)
+            if table == "verse_topics":
+                topic_matches.setdefault(match.topic, {})[match.verse] = match.relevance
+        rows = write_sql(path, matches, table, prefix)
+        matched = len({match.topic for match in matches})
+        print(f"{table}: {rows:,} rows for {matched:,}/{len(queries):,} entries → {path} "
+              f"({time.perf_counter() - start:.2f}s)")
+        seeded = {row["slug"] for row in seeded_rows(parent)}
+        unseeded = [match for match in matches if prefix + match.topic not in seeded]
+        if unseeded:
+            print(f"  {len(unseeded):,} rows ({len({match.topic for match in unseeded}):,} entries) "
+                  f"reference {parent} not in seed-verses.sql; they are skipped on load "
+                  f"unless those {parent} exist")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(topic_matches, f, indent=1)
+        print(f"Topic relevances → {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Verse Full-Text Index
+Inverted index over every translation of the verse corpus (text_kjv,
+text_niv, ...) with BM25F ranking, so "which verses mention anxiety or
+worry" can be answered locally. The index is a directory of immutable
+segment files plus a manifest: `update` indexes new or changed verse files
+into a new segment, `merge` compacts the segments into one.
+
+Layout of a segment (a mapped_file.py container; little-endian, sections
+8-byte aligned):
+    magic    8s   b"VIDXSEG\\0"
+    version  u32
+    metalen  u32
+    meta     JSON {"docs", "terms", "fields": [name, ...],
+                   section: [off, n] for each section below}
+    term_blob     sorted terms, UTF-8
+    term_offsets  u64[terms + 1]
+    postings      varint (doc id delta, term frequency) pairs, per term
+                  and field
+    pointers      u64[terms * F + 1]; postings of term t in field f are
+                  postings[pointers[t * F + f]:pointers[t * F + f + 1]]
+    slug_blob     doc slugs, UTF-8
+    slug_offsets  u64[docs + 1]
+    lengths       u32[docs * F]; tokens in field f of doc d at [d * F + f]
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from mapped_file import MappedFile, write_sections
+from verse_pack import DEFAULT_SOURCE, REPO_ROOT
+
+MAGIC = b"VIDXSEG\0"
+VERSION = 1
+
+DEFAULT_INDEX = REPO_ROOT / 'data' / 'verse-index'
+MANIFEST = "manifest.json"
+
+TRANSLATIONS = ("text_kjv", "text_niv", "text_esv", "text_nlt", "text_msg", "text_nasb")
+
+# BM25F parameters
+K1 = 1.2
+B = 0.75
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from had has have he her him his i in is it its
+me my not of on or our so that the their them they this to was we were which who
+will with ye you your unto thee thou thy shall
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Sections of a segment: (name, array typecode, or None for raw bytes)
+_SECTIONS = (("term_blob", None), ("term_offsets", "Q"), ("postings", None), ("pointers", "Q"),
+             ("slug_blob", None), ("slug_offsets", "Q"), ("lengths", "I"))
+
+def _stem(token: str) -> str:
+    """Fold plurals and -ied/-ies forms: worries, worried -> worry"""
+    if len(token) > 4 and token.endswith(("ies", "ied")):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, stemmed tokens without stopwords or possessive endings"""
+    text = re.sub(r"['’]s\b", "", text.lower())
+    return [_stem(token) for token in _TOKEN.findall(text) if token not in STOPWORDS]
+
+def _varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _decode_postings(data: memoryview) -> Iterator[Tuple[int, int]]:
+    """(doc id, term frequency) pairs of one postings list"""
+    doc = value = shift = 0
+    is_delta = True
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        if is_delta:
+            doc += value
+        else:
+            yield doc, value
+        is_delta = not is_delta
+        value = shift = 0
+
+Document = Tuple[str, Sequence[Mapping[str, int]]]  # (slug, term counts per field)
+
+def analyze(verse: Mapping, fields: Sequence[str] = TRANSLATIONS) -> Document:
+    """Index document of a verse record"""
+    return verse["slug"], [Counter(tokenize(verse.get(field) or "")) for field in fields]
+
+def write_segment(path: str, docs: Sequence[Document], fields: Sequence[str] = TRANSLATIONS) -> int:
+    """Write documents as a segment; doc ids are positions in `docs`"""
+    width = len(fields)
+    postings: Dict[str, List[bytearray]] = {}
+    last: Dict[Tuple[str, int], int] = {}
+    lengths = array("I")
+    for doc, (_, counts) in enumerate(docs):
+        for f, terms in enumerate(counts):
+            lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                lists = postings.setdefault(term, [bytearray() for _ in range(width)])
+                _varint(lists[f], doc - last.get((term, f), 0))
+                _varint(lists[f], tf)
+                last[term, f] = doc
+
+    terms = sorted(postings, key=lambda term: term.encode("utf-8"))
+    term_offsets, pointers, slug_offsets = array("Q", [0]), array("Q", [0]), array("Q", [0])
+    for term in terms:
+        term_offsets.append(term_offsets[-1] + len(term.encode("utf-8")))
+        for data in postings[term]:
+            pointers.append(pointers[-1] + len(data))
+    for slug, _ in docs:
+        slug_offsets.append(slug_offsets[-1] + len(slug.encode("utf-8")))
+    contents = {
+        "term_blob": (term.encode("utf-8") for term in terms),
+        "term_offsets": term_offsets,
+        "postings": (data for term in terms for data in postings[term]),
+        "pointers": pointers,
+        "slug_blob": (slug.encode("utf-8") for slug, _ in docs),
+        "slug_offsets": slug_offsets,
+        "lengths": lengths,
+    }
+
+    with open(path, "wb") as f:
+        write_sections(f, MAGIC, VERSION,
+                       {"docs": len(docs), "terms": len(terms), "fields": list(fields)},
+                       [(name, contents[name]) for name, _ in _SECTIONS])
+    return len(docs)
+
+class Segment:
+    """Read-only mmap view of a segment written by write_segment"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._file = MappedFile(path, MAGIC, VERSION, "verse index segment")
+        meta = self._file.meta
+        self.docs: int = meta["docs"]
+        self.terms: int = meta["terms"]
+        self.fields: List[str] = meta["fields"]
+        sections = {name: self._file.section(meta[name], typecode) for name, typecode in _SECTIONS}
+        self._term_blob = sections["term_blob"]
+        self._term_offsets = sections["term_offsets"]
+        self._postings = sections["postings"]
+        self._pointers = sections["pointers"]
+        self._slug_blob = sections["slug_blob"]
+        self._slug_offsets = sections["slug_offsets"]
+        self.lengths = sections["lengths"]
+
+    def close(self) -> None:
+        """Unmap the segment, unless a `lengths` view is still held: then
+        the mapping stays valid and is freed once it is released"""
+        self._term_blob = self._term_offsets = self._postings = self._pointers = None
+        self._slug_blob = self._slug_offsets = self.lengths = None
+        self._file.close()
+
+    def slug(self, doc: int) -> str:
+        return str(self._slug_blob[self._slug_offsets[doc]:self._slug_offsets[doc + 1]], "utf-8")
+
+    def term(self, term_id: int) -> str:
+        return str(self._term_blob[self._term_offsets[term_id]:self._term_offsets[term_id + 1]],
+                   "utf-8")
+
+    def find(self, term: str) -> Optional[int]:
+        """Term id, by binary search over the sorted terms, or None"""
+        target = term.encode("utf-8")
+        lo, hi = 0, self.terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(self._term_blob[self._term_offsets[mid]:self._term_offsets[mid + 1]]) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.terms and \
+                self._term_blob[self._term_offsets[lo]:self._term_offsets[lo + 1]] == target:
+            return lo
+        return None
+
+    def postings(self, term_id: int, field: int) -> Iterator[Tuple[int, int]]:
+        k = term_id * len(self.fields) + field
+        return _decode_postings(self._postings[self._pointers[k]:self._pointers[k + 1]])
+
+    def documents(self) -> Iterator[Document]:
+        """Every document with its term counts, decoded from the postings"""
+        counts = [[Counter() for _ in self.fields] for _ in range(self.docs)]
+        for term_id in range(self.terms):
+            term = self.term(term_id)
+            for f in range(len(self.fields)):
+                for doc, tf in self.postings(term_id, f):
+                    counts[doc][f][term] = tf
+        for doc in range(self.docs):
+            yield self.slug(doc), counts[doc]
+
+class VerseIndex:
+    """Segmented verse index in a directory
+
+    The manifest lists segments oldest first and the mtime of every indexed
+    verse file. A slug in a newer segment supersedes it in older ones, so
+    re-indexing a changed file is an append. `search` ranks live documents
+    with BM25F over the selected translations.
+    """
+
+    def __init__(self, directory: str = DEFAULT_INDEX):
+        self.directory = Path(directory)
+        manifest_path = self.directory / MANIFEST
+        if manifest_path.exists():
+            self.manifest = json.loads(manifest_path.read_text())
+        else:
+            self.manifest = {"fields": list(TRANSLATIONS), "segments": [], "files": {},
+                             "next_segment": 1}
+        self.fields: List[str] = self.manifest["fields"]
+        self.segments = [Segment(self.directory / name) for name in self.manifest["segments"]]
+        self._refresh()
+
+    def _refresh(self) -> None:
+        """Recompute which docs are live and the per-field average lengths"""
+        width = len(self.fields)
+        seen = set()
+        self._live: List[bytearray] = []
+        totals = [0] * width
+        for segment in reversed(self.segments):
+            live = bytearray(segment.docs)
+            for doc in range(segment.docs):
+                slug = segment.slug(doc)
+                if slug not in seen:
+                    seen.add(slug)
+                    live[doc] = 1
+                    for f in range(width):
+                        totals[f] += segment.lengths[doc * width + f]
+            self._live.insert(0, live)
+        self.count = len(seen)
+        self._avg_lengths = [total / self.count if self.count else 0.0 for total in totals]
+
+    def close(self) -> None:
+        for segment in self.segments:
+            segment.close()
+        self.segments = []
+
+    def __enter__(self) -> "VerseIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _save_manifest(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / MANIFEST
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=2) + "\n")
+        os.replace(tmp, path)
+
+    def _new_segment(self, docs: Sequence[Document]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"segment-{self.manifest['next_segment']:05d}.vidx"
+        self.manifest["next_segment"] += 1
+        write_segment(self.directory / name, docs, self.fields)
+        self.manifest["segments"].append(name)
+        self.segments.append(Segment(self.directory / name))
+
+    def add(self, verses: Iterable[Mapping]) -> int:
+        """Index verse records as a new segment; returns how many"""
+        docs = [analyze(verse, self.fields) for verse in verses]
+        if docs:
+            self._new_segment(docs)
+            self._save_manifest()
+            self._refresh()
+        return len(docs)
+
+    def update(self, source: str = DEFAULT_SOURCE) -> int:
+        """Index verse files that are new or modified since they were indexed"""
+        files = self.manifest["files"]
+        changed = [path for path in sorted(Path(source).glob("*.json"))
+                   if files.get(path.name) != path.stat().st_mtime]
+        verses = []
+        for path in changed:
+            with open(path, encoding="utf-8") as f:
+                verses.append(json.load(f))
+            files[path.name] = path.stat().st_mtime
+        return self.add(verses)
+
+    def merge(self) -> None:
+        """Rewrite the live documents of all segments as one segment"""
+        if len(self.segments) < 2 and all(all(live) for live in self._live):
+            return
+        docs = [doc for segment, live in zip(self.segments, self._live)
+                for i, doc in enumerate(segment.documents()) if live[i]]
+        old = self.segments
+        self.segments, self.manifest["segments"] = [], []
+        self._new_segment(docs)
+        self._save_manifest()
+        for segment in old:
+            segment.close()
+            segment.path.unlink()
+        self._refresh()
+
+    def search(self, query: str, k: int = 10, fields: Sequence[str] = None,
+               weights: Mapping[str, float] = None) -> List[Tuple[str, float]]:
+        """Top k (slug, score) by BM25F over `fields` (default: all)
+
+        A verse matches if any query term occurs in any selected field.
+        Field term frequencies are length-normalized, weighted by
+        `weights` (default 1) and summed before saturation.
+        """
+        selected = [self.fields.index(field) for field in (fields or self.fields)]
+        width = len(self.fields)
+        scores: Dict[Tuple[int, int], float] = {}
+        for term in dict.fromkeys(tokenize(query)):
+            tf_by_doc: Dict[Tuple[int, int], float] = {}
+            for s, (segment, live) in enumerate(zip(self.segments, self._live)):
+                term_id = segment.find(term)
+                if term_id is None:
+                    continue
+                for f in selected:
+                    weight = (weights or {}).get(self.fields[f], 1.0)
+                    avg = self._avg_lengths[f] or 1.0
+                    for doc, tf in segment.postings(term_id, f):
+                        if live[doc]:
+                            norm = 1 - B + B * segment.lengths[doc * width + f] / avg
+                            tf_by_doc[s, doc] = tf_by_doc.get((s, doc), 0.0) + weight * tf / norm
+            df = len(tf_by_doc)
+            idf = math.log(1 + (self.count - df + 0.5) / (df + 0.5))
+            for key, tf in tf_by_doc.items():
+                scores[key] = scores.get(key, 0.0) + idf * tf / (K1 + tf)
+        top = sorted(scores.items(), key=lambda item: -item[1])[:k]
+        return [(self.segments[s].slug(doc), round(score, 4)) for (s, doc), score in top]
+
+    def stats(self) -> Dict[str, object]:
+        return {"verses": self.count, "segments": len(self.segments),
+                "terms": sum(segment.terms for segment in self.segments),
+                "bytes": sum(segment.path.stat().st_size for segment in self.segments),
+                "avg_lengths": {field: round(avg, 1)
+                                for field, avg in zip(self.fields, self._avg_lengths)}}
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build, update or search the verse index")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX),
+                        help="Index directory (default: data/verse-index)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    update = sub.add_parser("update", help="Index new or changed verse files")
+    update.add_argument("--source", default=str(DEFAULT_SOURCE))
+    update.add_argument("--merge", action="store_true", help="Merge segments afterwards")
+    sub.add_parser("merge", help="Merge all segments into one")
+    search = sub.add_parser("search", help="BM25F-ranked verse search")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=10, help="Results (default: 10)")
+    search.add_argument("--field", action="append", choices=TRANSLATIONS,
+                        help="Only these translations (repeatable)")
+    sub.add_parser("stats", help="Summarize the index")
+    args = parser.parse_args(argv)
+
+    with VerseIndex(args.index) as index:
+        if args.command == "update":
+            start = time.perf_counter()
+            added = index.update(args.source)
+            if args.merge:
+                index.merge()
+            print(f"Indexed {added:,} verse files in {time.perf_counter() - start:.2f}s "
+                  f"({index.count:,} verses, {len(index.segments)} segment(s))")
+        elif args.command == "merge":
+            index.merge()
+            print(f"{index.count:,} verses in {len(index.segments)} segment(s)")
+        elif args.command == "search":
+            if not index.segments:
+                sys.exit(f"{args.index}: empty index, run `update` first")
+            start = time.perf_counter()
+            results = index.search(args.query, args.k, args.field)
+            elapsed = time.perf_counter() - start
+            for slug, score in results:
+                print(f"{score:8.3f}  {slug}")
+            print(f"{len(results)} results in {elapsed * 1000:.1f}ms")
+        else:
+            print(json.dumps(index.stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
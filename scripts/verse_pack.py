@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Verse Corpus Pack
+Compiles data/verses/*.json (one file per verse) into a single
+memory-mappable file, with O(1) lookup by slug or by (book, chapter, verse)
+and lazy per-field decoding, so Python jobs can read the corpus without
+thousands of opens and full JSON parses.
+
+Layout (a mapped_file.py container; little-endian, sections 8-byte aligned):
+    magic   8s   b"VRSPACK\\0"
+    version u32
+    metalen u32
+    meta    JSON {"count", "fields": [name, ...], "blob": [off, len],
+                  "starts": [off, n], "spans": [off, n], "refs": [off, n],
+                  "slugs": [off, n]}
+    blob    verse records, each its field values as compact UTF-8 JSON
+    starts  u64[count]; offset of verse i's record in blob
+    spans   u32[count * len(fields) * 2]; (begin, end) of field f of verse
+            i within its record at [2 * (i * F + f)]; begin == end when
+            the verse lacks the field
+    refs    u32[31,102] verse id by canonical verse ordinal (bible_canon),
+            0xFFFFFFFF where the corpus has no verse
+    slugs   u32[2^k] open-addressing table of verse ids by crc32(slug),
+            linear probing, 0xFFFFFFFF empty, at most half full
+
+Verses are stored in canonical order, so ids follow Bible order.
+"""
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'programmatic-seo'))
+from bible_canon import BOOK_NAMES, TOTAL_VERSES, verse_ordinal
+from mapped_file import MappedFile, write_sections
+
+MAGIC = b"VRSPACK\0"
+VERSION = 1
+_EMPTY = 0xFFFFFFFF
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SOURCE = REPO_ROOT / 'data' / 'verses'
+DEFAULT_PACK = REPO_ROOT / 'data' / 'verses.pack'
+
+_BOOK_INDEX = {name: i for i, name in enumerate(BOOK_NAMES)}
+# "John 3:16", "1 John 1:9"
+_REFERENCE = re.compile(r"^(.+) (\d+):(\d+)$")
+
+def _ordinal(verse: Dict) -> Optional[int]:
+    """Canonical ordinal of a verse record, or None if it is not in the canon"""
+    try:
+        return verse_ordinal(_BOOK_INDEX[verse["book"]], verse["chapter"], verse["verse"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _slug_hash(slug: bytes) -> int:
+    return zlib.crc32(slug)
+
+def write_pack(path: str, verses: Iterable[Dict]) -> int:
+    """Write verse records (dicts as in data/verses/*.json) as a pack.
+
+    Records are encoded as they arrive (spooled to a temporary file), so
+    only their slugs and field spans are held in memory. Slugs must be
+    unique. Fields are listed in first-appearance order. Returns the
+    number of verses written.
+    """
+    fields: Dict[str, int] = {}
+    index = []  # (sort key, slug, record start, {field: (begin, end)})
+    with tempfile.TemporaryFile() as spool:
+        for verse in verses:
+            start = spool.tell()
+            spans = {}
+            for name, value in verse.items():
+                encoded = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                begin = spool.tell() - start
+                spool.write(encoded)
+                spans[name] = (begin, begin + len(encoded))
+                fields.setdefault(name, len(fields))
+            ordinal = _ordinal(verse)
+            # Canonical order; verses outside the canon go last, by slug
+            index.append(((ordinal is None, ordinal or 0, verse["slug"]), verse["slug"], start, spans))
+        index.sort(key=lambda entry: entry[0])
+
+        width = len(fields)
+        starts = array("Q", (start for _, _, start, _ in index))
+        spans = array("I", bytes(4 * 2 * width * len(index)))
+        refs = array("I", [_EMPTY]) * TOTAL_VERSES
+        capacity = 8
+        while capacity < 2 * len(index):
+            capacity *= 2
+        slugs = array("I", [_EMPTY]) * capacity
+        for i, ((not_canon, ordinal, _), slug, _, record_spans) in enumerate(index):
+            for name, (begin, end) in record_spans.items():
+                k = 2 * (i * width + fields[name])
+                spans[k], spans[k + 1] = begin, end
+            if not not_canon:
+                refs[ordinal] = i
+            slot = _slug_hash(slug.encode("utf-8")) & (capacity - 1)
+            while slugs[slot] != _EMPTY:
+                if index[slugs[slot]][1] == slug:
+                    raise ValueError(f"duplicate slug: {slug!r}")
+                slot = (slot + 1) & (capacity - 1)
+            slugs[slot] = i
+
+        spool.seek(0)
+        with open(path, "wb") as f:
+            write_sections(f, MAGIC, VERSION, {"count": len(index), "fields": list(fields)},
+                           [("blob", spool), ("starts", starts), ("spans", spans),
+                            ("refs", refs), ("slugs", slugs)])
+    return len(index)
+
+def build_pack(source: str = DEFAULT_SOURCE, path: str = DEFAULT_PACK) -> int:
+    """Compile a directory of per-verse JSON files into a pack"""
+    def verses() -> Iterator[Dict]:
+        for file in sorted(Path(source).glob("*.json")):
+            with open(file, encoding="utf-8") as f:
+                yield json.load(f)
+    return write_pack(path, verses())
+
+class Verse:
+    """Lazy view of one packed verse: fields are decoded on first access
+
+    Supports `verse["text_niv"]`, `verse.get(name)`, `name in verse`,
+    `verse.keys()` and `verse.to_dict()`.
+    """
+
+    __slots__ = ("_pack", "id", "_cache")
+
+    def __init__(self, pack: "VersePack", verse_id: int):
+        self._pack = pack
+        self.id = verse_id
+        self._cache: Dict[str, Any] = {}
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._cache:
+            raw = self._pack.raw(self.id, name)
+            if not raw:
+                raise KeyError(name)
+            self._cache[name] = json.loads(bytes(raw))
+        return self._cache[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._pack.field_index and bool(self._pack.raw(self.id, name))
+
+    def keys(self) -> List[str]:
+        return [name for name in self._pack.fields if bool(self._pack.raw(self.id, name))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: self[name] for name in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"<Verse {self.id}: {self['slug']}>"
+
+class VersePack:
+    """Read-only mmap view of a pack written by write_pack
+
+    Ids are positions in canonical order. `pack[i]` returns a lazy Verse,
+    `get(slug)` probes the slug table, `ref(book, chapter, verse)` indexes
+    the canonical ordinal table, and `column(field)` scans one field of
+    every verse without decoding the rest.
+    """
+
+    def __init__(self, path: str = DEFAULT_PACK):
+        self._file = MappedFile(path, MAGIC, VERSION, "verse pack")
+        meta = self._file.meta
+        self._count = meta["count"]
+        self.fields: List[str] = meta["fields"]
+        self.field_index = {name: f for f, name in enumerate(self.fields)}
+        self._blob = self._file.section(meta["blob"])
+        self._starts = self._file.section(meta["starts"], "Q")
+        self._spans = self._file.section(meta["spans"], "I")
+        self._refs = self._file.section(meta["refs"], "I")
+        self._slugs = self._file.section(meta["slugs"], "I")
+
+    def close(self) -> None:
+        """Unmap the pack, unless a view from raw() is still held: then the
+        mapping stays valid and is freed once the last view is released"""
+        self._blob = self._starts = self._spans = self._refs = self._slugs = None
+        self._file.close()
+
+    def __enter__(self) -> "VersePack":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def raw(self, verse_id: int, name: str) -> memoryview:
+        """Encoded JSON of one field (empty if the verse lacks it)"""
+        k = 2 * (verse_id * len(self.fields) + self.field_index[name])
+        start = self._starts[verse_id]
+        return self._blob[start + self._spans[k]:start + self._spans[k + 1]]
+
+    def __getitem__(self, verse_id: int) -> Verse:
+        if verse_id < 0:
+            verse_id += self._count
+        if not 0 <= verse_id < self._count:
+            raise IndexError("verse id out of range")
+        return Verse(self, verse_id)
+
+    def __iter__(self) -> Iterator[Verse]:
+        for verse_id in range(self._count):
+            yield Verse(self, verse_id)
+
+    def find(self, slug: str) -> Optional[int]:
+        """Id of the verse with this slug, or None"""
+        target = json.dumps(slug, ensure_ascii=False).encode("utf-8")
+        mask = len(self._slugs) - 1
+        slot = _slug_hash(slug.encode("utf-8")) & mask
+        while self._slugs[slot] != _EMPTY:
+            verse_id = self._slugs[slot]
+            if self.raw(verse_id, "slug") == target:
+                return verse_id
+            slot = (slot + 1) & mask
+        return None
+
+    def get(self, slug: str) -> Optional[Verse]:
+        verse_id = self.find(slug)
+        return None if verse_id is None else Verse(self, verse_id)
+
+    def __contains__(self, slug: str) -> bool:
+        return self.find(slug) is not None
+
+    def ref(self, book: Union[str, int], chapter: int, verse: int) -> Optional[Verse]:
+        """Verse by reference (book name or BOOK_NAMES index), or None"""
+        try:
+            book_index = _BOOK_INDEX[book] if isinstance(book, str) else book
+            verse_id = self._refs[verse_ordinal(book_index, chapter, verse)]
+        except (KeyError, IndexError, ValueError):
+            return None
+        return None if verse_id == _EMPTY else Verse(self, verse_id)
+
+    def column(self, name: str) -> Iterator[Any]:
+        """Decoded values of one field for every verse, in id order (None if missing)"""
+        f = self.field_index[name]
+        width = len(self.fields)
+        blob, starts, spans = self._blob, self._starts, self._spans
+        for verse_id in range(self._count):
+            k = 2 * (verse_id * width + f)
+            begin, end = spans[k], spans[k + 1]
+            yield json.loads(bytes(blob[starts[verse_id] + begin:starts[verse_id] + end])) \
+                if begin != end else None
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build or query the verse corpus pack")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Compile per-verse JSON files into a pack")
+    build.add_argument("--source", default=str(DEFAULT_SOURCE),
+                       help="Directory of verse JSON files (default: data/verses)")
+    build.add_argument("--out", default=str(DEFAULT_PACK), help="Pack path (default: data/verses.pack)")
+    get = sub.add_parser("get", help="Print a verse by slug or reference")
+    get.add_argument("key", help='Slug ("john-3-16") or reference ("John 3:16")')
+    get.add_argument("--field", action="append", help="Only these fields (repeatable)")
+    get.add_argument("--pack", default=str(DEFAULT_PACK))
+    stats = sub.add_parser("stats", help="Summarize a pack")
+    stats.add_argument("--pack", default=str(DEFAULT_PACK))
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        count = build_pack(args.source, args.out)
+        size = Path(args.out).stat().st_size
+        print(f"Packed {count:,} verses into {args.out} ({size / 1e6:.1f} MB) "
+              f"in {time.perf_counter() - start:.2f}s")
+        return
+    with VersePack(args.pack) as pack:
+        if args.command == "stats":
+            start = time.perf_counter()
+            chars = sum(len(text or "") for text in pack.column("text"))
+            print(f"{len(pack):,} verses, fields: {', '.join(pack.fields)}")
+            print(f"scanned {chars:,} characters of text in {time.perf_counter() - start:.3f}s")
+            return
+        unknown = [name for name in args.field or () if name not in pack.field_index]
+        if unknown:
+            sys.exit(f"unknown field {unknown[0]!r}; {args.pack} has: {', '.join(pack.fields)}")
+        verse = pack.get(args.key)
+        match = _REFERENCE.match(args.key) if verse is None else None
+        if match:
+            book, chapter, number = match.groups()
+            book = "Psalms" if book == "Psalm" else book
+            verse = pack.ref(book, int(chapter), int(number))
+        if verse is None:
+            sys.exit(f"no verse {args.key!r} in {args.pack} (use a slug or BOOK CH:V)")
+        record = {name: verse[name] for name in args.field} if args.field else verse.to_dict()
+        print(json.dumps(record, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Weighted Verse Sampler
+O(1) weighted random draws of verses with Vose alias tables: uniform or
+popularity-weighted, optionally restricted to a testament, a book or a
+topic, plus a seeded verse of the day for any date. Tables are built once
+from the verse pack and saved to a memory-mappable file, so startup only
+maps it.
+
+Layout of a saved sampler (a mapped_file.py container; little-endian,
+sections 8-byte aligned):
+    magic   8s   b"VSAMPLE\\0"
+    version u32
+    metalen u32
+    meta    JSON {"count", "blob": [off, len], "offsets": [off, count + 1],
+                  "tables": {name: {"ids": [off, n], "prob": [off, n],
+                                    "alias": [off, n]}}}
+    blob    verse slugs, UTF-8
+    offsets u64[count + 1]; slug i is blob[offsets[i]:offsets[i + 1]]
+    tables  per table: ids u32 (slug ids), prob f64, alias u32 (positions
+            within the table)
+"""
+import argparse
+import datetime
+import json
+import random
+import sys
+from array import array
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # batch draws fall back to a Python loop
+    np = None
+
+from mapped_file import MappedFile, write_sections
+from verse_pack import DEFAULT_PACK, REPO_ROOT, VersePack
+
+MAGIC = b"VSAMPLE\0"
+VERSION = 1
+
+DEFAULT_SAMPLER = REPO_ROOT / 'data' / 'verse-sampler.bin'
+
+UNIFORM = "uniform"
+POPULARITY = "popularity"
+WEIGHTINGS = (UNIFORM, POPULARITY)
+RESTRICTIONS = ("testament", "book", "topic")
+
+def table_name(weighting: str = POPULARITY, testament: Optional[str] = None,
+               book: Optional[str] = None, topic: Optional[str] = None) -> str:
+    """Name of the table for a weighting and at most one restriction"""
+    given = [(kind, value) for kind, value in zip(RESTRICTIONS, (testament, book, topic))
+             if value is not None]
+    if len(given) > 1:
+        raise ValueError("restrict to one of testament, book or topic")
+    return weighting + "".join(f"|{kind}={value}" for kind, value in given)
+
+def build_alias(weights: Sequence[float]) -> Tuple[array, array]:
+    """Vose's alias method: (prob, alias) arrays for positive weights
+
+    Position i is drawn by picking i uniformly, then keeping it with
+    probability prob[i] and taking alias[i] otherwise.
+    """
+    n = len(weights)
+    total = float(sum(weights))
+    if not n or total <= 0:
+        raise ValueError("alias table needs at least one positive weight")
+    scaled = [w * n / total for w in weights]
+    prob = array("d", bytes(8 * n))
+    alias = array("I", range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        prob[less] = scaled[less]
+        alias[less] = more
+        scaled[more] = scaled[more] + scaled[less] - 1.0
+        (small if scaled[more] < 1.0 else large).append(more)
+    # Leftovers are 1 up to rounding error
+    for i in large + small:
+        prob[i] = 1.0
+    return prob, alias
+
+class AliasTable:
+    """Alias table over a subset of a sampler's slugs
+
+    `ids` are slug ids, `prob`/`alias` the Vose arrays over positions in
+    `ids`. All three are arrays or memoryviews; `slugs` maps a slug id to
+    its slug.
+    """
+
+    def __init__(self, slugs: Sequence[str], ids: Sequence[int], prob: Sequence[float],
+                 alias: Sequence[int]):
+        self.slugs = slugs
+        self.ids = ids
+        self.prob = prob
+        self.alias = alias
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def draw_id(self, rng: random.Random = random) -> int:
+        i = rng.randrange(len(self.ids))
+        return self.ids[i] if rng.random() < self.prob[i] else self.ids[self.alias[i]]
+
+    def draw(self, rng: random.Random = random) -> str:
+        """One slug, O(1)"""
+        return self.slugs[self.draw_id(rng)]
+
+    def sample(self, k: int, seed: Optional[int] = None) -> List[str]:
+        """k slugs drawn with replacement
+
+        Vectorized with NumPy when it is installed, so the same seed gives a
+        different (equally distributed) sequence with and without NumPy.
+        """
+        if np is None:
+            rng = random.Random(seed)
+            return [self.draw(rng) for _ in range(k)]
+        rng = np.random.default_rng(seed)
+        ids = np.frombuffer(self.ids, dtype=np.uint32)
+        positions = rng.integers(0, len(ids), size=k)
+        keep = rng.random(k) < np.frombuffer(self.prob, dtype=np.float64)[positions]
+        positions = np.where(keep, positions, np.frombuffer(self.alias, dtype=np.uint32)[positions])
+        return [self.slugs[i] for i in ids[positions].tolist()]
+
+    def probabilities(self) -> Dict[str, float]:
+        """Exact draw probability of each slug, from the arrays"""
+        n = len(self.ids)
+        out: Dict[str, float] = {}
+        for i in range(n):
+            keep = self.slugs[self.ids[i]]
+            out[keep] = out.get(keep, 0.0) + self.prob[i] / n
+            other = self.slugs[self.ids[self.alias[i]]]
+            out[other] = out.get(other, 0.0) + (1.0 - self.prob[i]) / n
+        return out
+
+def popularity_weights(pack: VersePack, floor: float = 1.0) -> Dict[str, float]:
+    """{slug: floor + popularity_score}; the floor keeps unscored verses drawable"""
+    return {slug: floor + max(score or 0, 0)
+            for slug, score in zip(pack.column("slug"), pack.column("popularity_score"))}
+
+def load_topics(path: str) -> Dict[str, Dict[str, float]]:
+    """Topic memberships from JSON: {topic: [slug, ...] | {slug: relevance}}"""
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return {topic: dict.fromkeys(members, 1.0) if isinstance(members, list) else
+            {slug: float(w) for slug, w in members.items()}
+            for topic, members in raw.items()}
+
+class VerseSampler:
+    """Named alias tables over one list of verse slugs
+
+    Tables are named by table_name(): "popularity", "uniform|book=John",
+    "popularity|topic=love", ... `from_pack` builds every weighting for the
+    whole corpus and for each testament, book and given topic; topic
+    relevances multiply the base weight. `save`/`load` round-trip through a
+    memory-mapped file.
+    """
+
+    def __init__(self, slugs: Sequence[str], tables: Dict[str, AliasTable],
+                 _file: Optional[MappedFile] = None):
+        self.slugs = slugs
+        self.tables = tables
+        self._file = _file
+
+    @classmethod
+    def from_weights(cls, weightings: Mapping[str, Mapping[str, float]],
+                     groups: Mapping[str, Iterable[str]] = None,
+                     topics: Mapping[str, Mapping[str, float]] = None) -> "VerseSampler":
+        """Tables from {weighting: {slug: weight}}
+
+        `groups` maps "testament=..."/"book=..." to member slugs and `topics`
+        maps a topic to {slug: relevance}. Zero-weight slugs are left out of
+        a table; empty tables are skipped.
+        """
+        slugs = sorted({slug for weights in weightings.values() for slug in weights})
+        slug_id = {slug: i for i, slug in enumerate(slugs)}
+        restrictions = {"": None}
+        for group, members in (groups or {}).items():
+            restrictions[f"|{group}"] = dict.fromkeys(members, 1.0)
+        for topic, members in (topics or {}).items():
+            restrictions[f"|topic={topic}"] = members
+        tables = {}
+        for weighting, weights in weightings.items():
+            for suffix, members in restrictions.items():
+                chosen = [(slug_id[slug], w * (1.0 if members is None else members.get(slug, 0.0)))
+                          for slug, w in weights.items()
+                          if members is None or slug in members]
+                chosen = [(i, w) for i, w in sorted(chosen) if w > 0]
+                if not chosen:
+                    continue
+                prob, alias = build_alias([w for _, w in chosen])
+                tables[weighting + suffix] = AliasTable(slugs, array("I", (i for i, _ in chosen)),
+                                                        prob, alias)
+        return cls(slugs, tables)
+
+    @classmethod
+    def from_pack(cls, pack: VersePack,
+                  topics: Mapping[str, Mapping[str, float]] = None) -> "VerseSampler":
+        popularity = popularity_weights(pack)
+        groups: Dict[str, List[str]] = {}
+        for slug, testament, book in zip(pack.column("slug"), pack.column("testament"),
+                                         pack.column("book")):
+            if testament:
+                groups.setdefault(f"testament={testament}", []).append(slug)
+            if book:
+                groups.setdefault(f"book={book}", []).append(slug)
+        return cls.from_weights({UNIFORM: dict.fromkeys(popularity, 1.0), POPULARITY: popularity},
+                                groups, topics)
+
+    def table(self, weighting: str = POPULARITY, testament: Optional[str] = None,
+              book: Optional[str] = None, topic: Optional[str] = None) -> AliasTable:
+        name = table_name(weighting, testament, book, topic)
+        if name not in self.tables:
+            raise KeyError(f"no sampler table {name!r}")
+        return self.tables[name]
+
+    def draw(self, rng: random.Random = random, **restriction) -> str:
+        return self.table(**restriction).draw(rng)
+
+    def sample(self, k: int, seed: Optional[int] = None, **restriction) -> List[str]:
+        return self.table(**restriction).sample(k, seed)
+
+    def verse_of_the_day(self, date: Optional[datetime.date] = None, salt: str = "",
+                         **restriction) -> str:
+        """Deterministic draw for a date: the same on every machine and run
+
+        The generator is seeded with the date and table name (and `salt`, to
+        give a feed its own sequence), so changing one table or day leaves
+        the others' picks unchanged as long as the table is.
+        """
+        date = date or datetime.date.today()
+        name = table_name(**restriction)
+        return self.table(**restriction).draw(random.Random(f"{salt}|{name}|{date.isoformat()}"))
+
+    def save(self, path: str) -> None:
+        encoded = [slug.encode("utf-8") for slug in self.slugs]
+        offsets = array("Q", [0])
+        for slug in encoded:
+            offsets.append(offsets[-1] + len(slug))
+        sections = [("blob", encoded), ("offsets", offsets)]
+        sections.extend((("tables", name, section), array(typecode, getattr(table, section)))
+                        for name, table in self.tables.items()
+                        for section, typecode in (("ids", "I"), ("prob", "d"), ("alias", "I")))
+        with open(path, "wb") as f:
+            write_sections(f, MAGIC, VERSION, {"count": len(encoded), "tables": {}}, sections)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_SAMPLER) -> "VerseSampler":
+        mapped = MappedFile(path, MAGIC, VERSION, "verse sampler")
+        meta = mapped.meta
+        blob = bytes(mapped.section(meta["blob"]))
+        offsets = mapped.section(meta["offsets"], "Q")
+        slugs = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(meta["count"])]
+        tables = {name: AliasTable(slugs, mapped.section(sections["ids"], "I"),
+                                   mapped.section(sections["prob"], "d"),
+                                   mapped.section(sections["alias"], "I"))
+                  for name, sections in meta["tables"].items()}
+        return cls(slugs, tables, mapped)
+
+    def close(self) -> None:
+        """Unmap a loaded sampler. Tables taken from `tables` stay usable:
+        the mapping is freed once the last of them is released"""
+        self.tables = {}
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> "VerseSampler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build or draw from the weighted verse sampler")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Build alias tables from the verse pack")
+    build.add_argument("--pack", default=str(DEFAULT_PACK))
+    build.add_argument("--topics", help='JSON {topic: [slug, ...] | {slug: relevance}}')
+    build.add_argument("--out", default=str(DEFAULT_SAMPLER),
+                       help="Sampler path (default: data/verse-sampler.bin)")
+    for name, help_text in (("draw", "Draw random verses"), ("daily", "Verse of the day")):
+        command = sub.add_parser(name, help=help_text)
+        command.add_argument("--sampler", default=str(DEFAULT_SAMPLER))
+        command.add_argument("--weighting", choices=WEIGHTINGS, default=POPULARITY)
+        command.add_argument("--testament")
+        command.add_argument("--book")
+        command.add_argument("--topic")
+    sub.choices["draw"].add_argument("-n", type=int, default=1, help="Number of draws")
+    sub.choices["draw"].add_argument("--seed", type=int)
+    sub.choices["daily"].add_argument("--date", type=datetime.date.fromisoformat,
+                                      help="YYYY-MM-DD (default: today)")
+    sub.choices["daily"].add_argument("--days", type=int, default=1,
+                                      help="Print this many consecutive days")
+    sub.choices["daily"].add_argument("--salt", default="")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        topics = load_topics(args.topics) if args.topics else None
+        with VersePack(args.pack) as pack:
+            sampler = VerseSampler.from_pack(pack, topics)
+        sampler.save(args.out)
+        print(f"Built {len(sampler.tables):,} alias tables over {len(sampler.slugs):,} verses "
+              f"into {args.out}")
+        return
+    restriction = dict(weighting=args.weighting, testament=args.testament, book=args.book,
+                       topic=args.topic)
+    sampler = VerseSampler.load(args.sampler)
+    try:
+        if args.command == "draw":
+            for slug in sampler.sample(args.n, args.seed, **restriction):
+                print(slug)
+        else:
+            start = args.date or datetime.date.today()
+            for day in range(args.days):
+                date = start + datetime.timedelta(days=day)
+                print(date.isoformat(), sampler.verse_of_the_day(date, args.salt, **restriction))
+    except (KeyError, ValueError) as e:
+        sys.exit(e.args[0])
+
+if __name__ == "__main__":
+    main()